@@ -8,12 +8,20 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from app.config import Config
 
-from .extensions import db, jwt
-from .utils.helpers import check_database_extensions
+from .extensions import db, jwt, quote_cache, market_data_poller, ticker_tape
+from .extensions import quote_broadcaster, symbol_index, provider_pool
+from .extensions import matching_engine, response_compressor, password_hasher
+from .extensions import replica_router, startup_checks
+from .cli import prices_cli, market_data_cli, search_cli, tickers_cli
+from .cli import positions_cli, transactions_cli, snapshots_cli
+from .utils.db_routing import configure_engines
+from .utils.json_provider import json_provider_class
 from .routes.stock import stock_bp
 from .routes.auth import auth_bp
 from .routes.trades import transactions_bp
+from .routes.orders import orders_bp
 from .routes.portfolio import portfolio_bp
+from .routes.monitoring import monitoring_bp
 
 migrate = Migrate()
 
@@ -33,6 +41,10 @@ def create_app(config_class=Config):
     app.config['JWT_COOKIE_CSRF_PROTECT'] = False
     app.config['JWT_COOKIE_SAMESITE'] = 'None'
 
+    # Serialize JSON responses with the configured provider
+    app.json_provider_class = json_provider_class(app.config['JSON_PROVIDER'])
+    app.json = app.json_provider_class(app)
+
     # Configure logging
     if not app.debug and not app.testing:
         if not os.path.exists('logs'):
@@ -48,18 +60,42 @@ def create_app(config_class=Config):
     app.logger.setLevel(logging.INFO)
     app.logger.info('YourApp startup')
 
+    # Pool sizing for the primary and replica engines
+    configure_engines(app.config)
+
     # Initialize extensions
     db.init_app(app)
+    replica_router.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)  # Ensure this is correctly referencing Migrate
-
-    with app.app_context():
-        # Check database extensions
-        check_database_extensions()
+    quote_cache.init_app(app)
+    provider_pool.init_app(app)
+    market_data_poller.init_app(app)
+    ticker_tape.init_app(app)
+    quote_broadcaster.init_app(app)
+    symbol_index.init_app(app)
+    matching_engine.init_app(app)
+    response_compressor.init_app(app)
+    password_hasher.init_app(app)
+    startup_checks.init_app(app)
 
     app.register_blueprint(stock_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(transactions_bp, url_prefix='/api')
+    app.register_blueprint(orders_bp, url_prefix='/api')
     app.register_blueprint(portfolio_bp, url_prefix='/api')
+    app.register_blueprint(monitoring_bp, url_prefix='/api')
+
+    app.cli.add_command(prices_cli)
+    app.cli.add_command(market_data_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(tickers_cli)
+    app.cli.add_command(positions_cli)
+    app.cli.add_command(transactions_cli)
+    app.cli.add_command(snapshots_cli)
+
+    # Check database extensions and warm the search index, blocking or
+    # deferred per DATABASE_STARTUP_CHECK
+    startup_checks.start()
 
     return app
@@ -0,0 +1,257 @@
+# app/cli.py
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+
+from .extensions import db
+
+prices_cli = AppGroup('prices', help='Manage the OHLCV price history store.')
+market_data_cli = AppGroup('market-data', help='Market data ingestion.')
+search_cli = AppGroup('search', help='Ticker search backends.')
+tickers_cli = AppGroup('tickers', help='Manage the ticker universe.')
+positions_cli = AppGroup('positions', help='Materialized positions.')
+transactions_cli = AppGroup('transactions', help='The transactions ledger.')
+snapshots_cli = AppGroup('snapshots', help='Daily portfolio snapshots.')
+
+
+@prices_cli.command('init')
+def init_prices():
+    """Create price_bars and, on TimescaleDB, its hypertable and aggregates."""
+    from .models.price_bar import PriceBar
+    from .utils.timescale import has_timescaledb, setup_price_bars
+
+    PriceBar.__table__.create(db.engine, checkfirst=True)
+    if has_timescaledb():
+        setup_price_bars()
+        click.echo('price_bars hypertable and continuous aggregates ready.')
+    else:
+        click.echo('TimescaleDB not available; aggregates will be computed '
+                   'on read.')
+
+
+@prices_cli.command('backfill')
+@click.argument('symbols', nargs=-1, required=True)
+@click.option('--days', default=30, show_default=True,
+              help='Number of days of history to download.')
+@click.option('--interval', default='1d', show_default=True,
+              help='Bar size to ingest (e.g. 1m, 1d).')
+def backfill_prices(symbols, days, interval):
+    """Download and store bars for SYMBOLS in one batched request."""
+    from .services.price_store import backfill_price_bars
+
+    end = datetime.utcnow()
+    written = backfill_price_bars(
+        [symbol.upper() for symbol in symbols],
+        end - timedelta(days=days), end, interval=interval)
+    click.echo(f'Stored {written} bars.')
+
+
+@prices_cli.command('refresh')
+@click.option('--days', default=None, type=int,
+              help='Only refresh the last N days (default: all time).')
+def refresh_prices(days):
+    """Materialize the price_bars continuous aggregates."""
+    from .utils.timescale import has_timescaledb, refresh_price_bar_aggregates
+
+    if not has_timescaledb():
+        click.echo('TimescaleDB not available; nothing to refresh.')
+        return
+    start = datetime.utcnow() - timedelta(days=days) if days else None
+    refresh_price_bar_aggregates(start=start)
+    click.echo('Aggregates refreshed.')
+
+
+@market_data_cli.command('poll')
+@click.option('--once', is_flag=True, help='Poll a single time and exit.')
+@click.option('--interval', type=int, default=None,
+              help='Seconds between polls (default: MARKET_DATA_POLL_INTERVAL).')
+def poll_market_data(once, interval):
+    """Poll quotes for held and ticker-tape symbols into the price store."""
+    from .extensions import market_data_poller as poller
+
+    poller.persist = True
+    if interval is not None:
+        poller.interval = interval
+
+    if once:
+        fetched = poller.poll_once()
+        click.echo(f'Fetched {len(fetched)} quotes.')
+        return
+
+    click.echo(f'Polling every {poller.interval}s, Ctrl+C to stop.')
+    try:
+        poller.run_forever()
+    except KeyboardInterrupt:
+        poller.stop()
+
+
+@search_cli.command('init')
+def init_search():
+    """Enable pg_trgm and create trigram indexes for the trigram backend."""
+    from sqlalchemy import text
+
+    if db.engine.dialect.name != 'postgresql':
+        click.echo('pg_trgm requires Postgres; use SEARCH_BACKEND=memory.')
+        return
+
+    db.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_stock_ticker_symbol_trgm '
+        'ON stock_ticker USING gin (symbol gin_trgm_ops)'))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_stock_ticker_name_trgm '
+        'ON stock_ticker USING gin (name gin_trgm_ops)'))
+    db.session.commit()
+    click.echo('Trigram indexes ready.')
+
+
+@search_cli.command('reindex')
+def reindex_search():
+    """Rebuild the in-process symbol index and report its size."""
+    from .extensions import symbol_index
+
+    symbol_index.load()
+    click.echo(f"Indexed {symbol_index.stats()['size']} tickers.")
+
+
+@tickers_cli.command('load')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['txt', 'csv']),
+              default=None, help='Input format (default: from extension).')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows per INSERT statement.')
+@click.option('--update', is_flag=True,
+              help='Fill in name/exchange for symbols that already exist.')
+def load_tickers_command(path, file_format, batch_size, update):
+    """Bulk load tickers from a TXT or CSV file."""
+    from .extensions import symbol_index
+    from .services.ticker_loader import load_ticker_file
+
+    written, skipped = load_ticker_file(
+        path, file_format=file_format, batch_size=batch_size, update=update)
+    symbol_index.invalidate()
+    label = 'Inserted or updated' if update else 'Inserted'
+    click.echo(f'{label} {written} tickers, skipped {skipped}.')
+
+
+@tickers_cli.command('refresh-metadata')
+@click.option('--limit', default=500, show_default=True,
+              help='Maximum symbols refreshed per pass, oldest first.')
+@click.option('--interval', type=int, default=None,
+              help='Keep running, refreshing every N seconds.')
+def refresh_metadata_command(limit, interval):
+    """Refetch stored ticker metadata older than TICKER_METADATA_TTL."""
+    import time
+    from .services.ticker_metadata import refresh_stale_metadata
+
+    while True:
+        refreshed, failed = refresh_stale_metadata(limit=limit)
+        click.echo(f'Refreshed {refreshed} tickers, {failed} failed.')
+        if interval is None:
+            return
+        try:
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            return
+
+
+@positions_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None,
+              help='Only rebuild this user (default: everyone).')
+def rebuild_positions_command(user_id):
+    """Rebuild portfolio_view from the transactions ledger."""
+    from .services.positions import rebuild_positions
+
+    upserted, deleted = rebuild_positions(user_id)
+    click.echo(f'Rebuilt {upserted} positions, removed {deleted} orphaned.')
+
+
+@positions_cli.command('verify')
+@click.option('--user-id', type=int, default=None,
+              help='Only verify this user (default: everyone).')
+def verify_positions_command(user_id):
+    """Diff portfolio_view against the transactions ledger."""
+    from .services.positions import verify_positions
+
+    diffs = verify_positions(user_id)
+    for diff in diffs:
+        click.echo(
+            f"user {diff['user_id']} {diff['ticker']} {diff['field']}: "
+            f"ledger={diff['ledger']} materialized={diff['materialized']}")
+    if diffs:
+        raise SystemExit(f'{len(diffs)} differences found.')
+    click.echo('Positions match the ledger.')
+
+
+@transactions_cli.command('init')
+def init_transactions():
+    """Convert transactions to a compressed TimescaleDB hypertable."""
+    from flask import current_app
+    from .utils.timescale import has_timescaledb, setup_transactions
+
+    if not has_timescaledb():
+        click.echo('TimescaleDB not available; transactions left unchanged.')
+        return
+
+    config = current_app.config
+    try:
+        setup_transactions(
+            chunk_interval=config['TRANSACTIONS_CHUNK_INTERVAL'],
+            compress_after=config['TRANSACTIONS_COMPRESS_AFTER'],
+            retention=config['TRANSACTIONS_RETENTION'])
+    except ValueError as e:
+        raise SystemExit(f'transactions left unchanged: {e}')
+    click.echo('transactions hypertable and policies ready.')
+
+
+@transactions_cli.command('archive')
+@click.option('--older-than', default=None,
+              help='Interval such as "2 years" '
+                   '(default: TRANSACTIONS_ARCHIVE_AFTER).')
+def archive_transactions_command(older_than):
+    """Move old ledger chunks into transactions_archive."""
+    from flask import current_app
+    from .utils.timescale import archive_transactions, has_timescaledb
+
+    if not has_timescaledb():
+        click.echo('TimescaleDB not available; nothing to archive.')
+        return
+
+    archived = archive_transactions(
+        older_than or current_app.config['TRANSACTIONS_ARCHIVE_AFTER'])
+    click.echo(f'Archived {archived} transactions.')
+
+
+@snapshots_cli.command('run')
+@click.option('--user-id', type=int, multiple=True,
+              help='Only snapshot these users (default: everyone).')
+def run_snapshots(user_id):
+    """Snapshot every day since each user's latest snapshot, up to today."""
+    from .services.snapshots import build_snapshots
+
+    written, at_cost = build_snapshots(list(user_id) or None)
+    report_snapshots(written, at_cost)
+
+
+@snapshots_cli.command('backfill')
+@click.option('--days', default=180, show_default=True,
+              help='Number of days to recompute.')
+@click.option('--user-id', type=int, multiple=True,
+              help='Only backfill these users (default: everyone).')
+def backfill_snapshots(days, user_id):
+    """Recompute snapshots for the last N days from the ledger and prices."""
+    from .services.snapshots import build_snapshots
+
+    start = (datetime.utcnow() - timedelta(days=days)).date()
+    written, at_cost = build_snapshots(list(user_id) or None, start=start)
+    report_snapshots(written, at_cost)
+    if at_cost:
+        raise SystemExit('Backfill incomplete: some days have no closing price.')
+
+
+def report_snapshots(written, at_cost):
+    click.echo(f'Wrote {written} snapshots.')
+    for ticker, days in sorted(at_cost.items()):
+        click.echo(f'  {ticker}: {days} holding-days valued at cost '
+                   f'(no closing price)', err=True)
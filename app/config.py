@@ -8,4 +8,135 @@ dotenv.load_dotenv(os.path.join(basedir, '..', '.env'))
 class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URI_CONNECTION')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replica; views marked read_only query it while its replay
+    # lag stays under REPLICA_MAX_LAG seconds, else they use the primary
+    DATABASE_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URI') or None
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5))
+    REPLICA_LAG_CHECK_INTERVAL = float(
+        os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 5))
+
+    # Connection pool per engine (primary and replica); timeouts in seconds
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get(
+        'DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+
+    # When the database extension check runs: 'blocking' (before serving; a
+    # failure aborts startup), 'background' or 'probe' (on GET /api/ready).
+    # Until it passes /api/ready answers 503 and retries it.
+    DATABASE_STARTUP_CHECK = os.environ.get(
+        'DATABASE_STARTUP_CHECK', 'background')
+    STARTUP_CHECK_RETRY_INTERVAL = float(
+        os.environ.get('STARTUP_CHECK_RETRY_INTERVAL', 5))
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'Pranav@123'
+
+    # Quote cache shared by every request in the process
+    QUOTE_CACHE_TTL = int(os.environ.get('QUOTE_CACHE_TTL', 15))
+    QUOTE_CACHE_MAX_ENTRIES = int(
+        os.environ.get('QUOTE_CACHE_MAX_ENTRIES', 5000))
+    # Where quote cache misses are fetched from: 'yfinance', or 'store' when a
+    # separate `flask market-data poll` process keeps price_bars up to date
+    QUOTE_PROVIDER = os.environ.get('QUOTE_PROVIDER', 'yfinance')
+
+    # Background market data poller
+    MARKET_DATA_POLLER_ENABLED = os.environ.get(
+        'MARKET_DATA_POLLER_ENABLED', 'false').lower() == 'true'
+    MARKET_DATA_POLL_INTERVAL = int(
+        os.environ.get('MARKET_DATA_POLL_INTERVAL', 15))
+    MARKET_DATA_POLL_BATCH_SIZE = int(
+        os.environ.get('MARKET_DATA_POLL_BATCH_SIZE', 50))
+    MARKET_DATA_POLL_MAX_BACKOFF = int(
+        os.environ.get('MARKET_DATA_POLL_MAX_BACKOFF', 300))
+
+    # Ticker tape symbols and how often its snapshot is rebuilt (seconds)
+    TICKER_TAPE_SYMBOLS = [
+        symbol.strip().upper() for symbol in os.environ.get(
+            'TICKER_TAPE_SYMBOLS',
+            'AAPL,MSFT,GOOGL,AMZN,TSLA,FB,BRK-B,JPM,V,JNJ').split(',')
+        if symbol.strip()
+    ]
+    TICKER_TAPE_REFRESH_INTERVAL = int(
+        os.environ.get('TICKER_TAPE_REFRESH_INTERVAL', 15))
+
+    # Server-Sent Events streams. Each open stream holds one worker thread,
+    # so keep STREAM_MAX_SUBSCRIBERS (per process) below the worker's thread
+    # count to leave threads for ordinary requests
+    STREAM_HEARTBEAT_INTERVAL = int(
+        os.environ.get('STREAM_HEARTBEAT_INTERVAL', 15))
+    STREAM_MAX_SUBSCRIBERS = int(
+        os.environ.get('STREAM_MAX_SUBSCRIBERS', 32))
+
+    # Ticker search: 'memory' (in-process index) or 'trigram' (Postgres pg_trgm)
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'memory')
+    SEARCH_INDEX_REFRESH_INTERVAL = int(
+        os.environ.get('SEARCH_INDEX_REFRESH_INTERVAL', 300))
+
+    # Maximum concurrent calls per provider from the async service layer
+    PROVIDER_CONCURRENCY = {
+        'market_data': int(os.environ.get('MARKET_DATA_MAX_CONCURRENCY', 8)),
+        'price_store': int(os.environ.get('PRICE_STORE_MAX_CONCURRENCY', 4)),
+    }
+
+    # Bounded thread pool for parallel provider calls (timeouts in seconds)
+    PROVIDER_POOL_SIZE = int(os.environ.get('PROVIDER_POOL_SIZE', 16))
+    PROVIDER_POOL_MAX_QUEUE = int(os.environ.get('PROVIDER_POOL_MAX_QUEUE', 256))
+    PROVIDER_CALL_TIMEOUT = float(os.environ.get('PROVIDER_CALL_TIMEOUT', 5))
+    PROVIDER_REQUEST_DEADLINE = float(
+        os.environ.get('PROVIDER_REQUEST_DEADLINE', 8))
+
+    # Maximum number of orders accepted by /orders/batch
+    ORDER_BATCH_MAX_SIZE = int(os.environ.get('ORDER_BATCH_MAX_SIZE', 100))
+
+    # Orders sent without a price execute at the cached quote if it is at most
+    # this many seconds old; older quotes are refetched or the order refused
+    TRADE_QUOTE_MAX_AGE = int(os.environ.get('TRADE_QUOTE_MAX_AGE', 15))
+
+    # Limit order matching: fills written per transaction, and how often the
+    # in-process order books are reconciled with open orders (seconds)
+    ORDER_FILL_BATCH_SIZE = int(os.environ.get('ORDER_FILL_BATCH_SIZE', 500))
+    ORDER_BOOK_SYNC_INTERVAL = int(
+        os.environ.get('ORDER_BOOK_SYNC_INTERVAL', 5))
+
+    # transactions hypertable (`flask transactions init`): chunk size, age at
+    # which chunks are compressed, and optional retention (e.g. '7 years';
+    # empty keeps everything). `flask transactions archive` moves chunks older
+    # than TRANSACTIONS_ARCHIVE_AFTER into transactions_archive instead.
+    TRANSACTIONS_CHUNK_INTERVAL = os.environ.get(
+        'TRANSACTIONS_CHUNK_INTERVAL', '30 days')
+    TRANSACTIONS_COMPRESS_AFTER = os.environ.get(
+        'TRANSACTIONS_COMPRESS_AFTER', '90 days')
+    TRANSACTIONS_RETENTION = os.environ.get('TRANSACTIONS_RETENTION') or None
+    TRANSACTIONS_ARCHIVE_AFTER = os.environ.get(
+        'TRANSACTIONS_ARCHIVE_AFTER', '2 years')
+
+    # Stored /ticker metadata older than this many seconds is refetched by
+    # `flask tickers refresh-metadata`
+    TICKER_METADATA_TTL = int(os.environ.get('TICKER_METADATA_TTL', 86400))
+
+    # JSON serialization: 'orjson' (falls back to 'default' if not installed)
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
+
+    # Response compression (brotli when installed, else gzip) for bodies of
+    # at least COMPRESS_MIN_SIZE bytes; disable if a proxy already compresses
+    COMPRESS_ENABLED = os.environ.get(
+        'COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+
+    # Password hashing (werkzeug method string, e.g. 'pbkdf2:sha256:600000' or
+    # 'scrypt:32768:8:1'); stored hashes made with another method are
+    # upgraded on the next successful login. Hashing runs in a process pool
+    # of PASSWORD_HASH_WORKERS with a bounded queue. The limit is per app
+    # process: N gunicorn workers start up to N x PASSWORD_HASH_WORKERS
+    # hashing processes, so keep it small and size it with the worker count.
+    PASSWORD_HASH_METHOD = os.environ.get(
+        'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', 64))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
@@ -2,6 +2,29 @@ from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
-db = SQLAlchemy()
+from app.services.market_data_poller import MarketDataPoller
+from app.services.order_book import MatchingEngine
+from app.services.password_hasher import PasswordHasher
+from app.services.provider_pool import ProviderPool
+from app.services.quote_cache import QuoteCache
+from app.services.quote_stream import QuoteBroadcaster
+from app.services.readiness import StartupChecks
+from app.services.symbol_index import SymbolIndex
+from app.services.ticker_tape import TickerTapeSnapshot
+from app.utils.compression import ResponseCompressor
+from app.utils.db_routing import ReplicaRouter, RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
+quote_cache = QuoteCache()
+market_data_poller = MarketDataPoller(quote_cache)
+ticker_tape = TickerTapeSnapshot()
+quote_broadcaster = QuoteBroadcaster()
+symbol_index = SymbolIndex()
+provider_pool = ProviderPool()
+matching_engine = MatchingEngine()
+response_compressor = ResponseCompressor()
+password_hasher = PasswordHasher()
+replica_router = ReplicaRouter()
+startup_checks = StartupChecks()
@@ -3,3 +3,7 @@ from .user import User
 from .transaction import Transaction
 from .portfolio import Portfolio
 from .stock_ticker import StockTicker
+from .price_bar import PriceBar
+from .order import Order
+from .portfolio_snapshot import PortfolioSnapshot
+from .ticker_metadata import TickerMetadata
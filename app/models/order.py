@@ -0,0 +1,46 @@
+# app/models/order.py
+from datetime import datetime
+
+from ..extensions import db
+
+
+class Order(db.Model):
+    __tablename__ = 'orders'
+
+    # Resting limit orders; open orders are mirrored in the in-process
+    # order book and filled against incoming quotes
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ticker = db.Column(db.String(10), nullable=False)
+    side = db.Column(db.String(4), nullable=False)  # 'BUY' or 'SELL'
+    quantity = db.Column(db.Integer, nullable=False)
+    limit_price = db.Column(db.Float, nullable=False)
+    # 'open', 'filled', 'cancelled' or 'rejected'
+    status = db.Column(db.String(10), nullable=False,
+                       default='open', server_default='open')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    filled_at = db.Column(db.DateTime, nullable=True)
+    fill_price = db.Column(db.Float, nullable=True)
+    # Not a foreign key: transactions is a hypertable keyed on (id, timestamp)
+    transaction_id = db.Column(db.Integer, nullable=True)
+    reject_reason = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_orders_status_id', 'status', 'id'),
+        db.Index('ix_orders_user_id', 'user_id', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ticker': self.ticker,
+            'side': self.side,
+            'quantity': self.quantity,
+            'limit_price': self.limit_price,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'filled_at': self.filled_at.isoformat() if self.filled_at else None,
+            'fill_price': self.fill_price,
+            'transaction_id': self.transaction_id,
+            'reject_reason': self.reject_reason
+        }
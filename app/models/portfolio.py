@@ -1,15 +1,29 @@
 # app/models/portfolio.py
+from datetime import datetime
+
 from ..extensions import db
 
 
 class Portfolio(db.Model):
     __tablename__ = 'portfolio_view'
 
+    # Materialized from the transactions ledger: applied incrementally on
+    # every trade and rebuildable with `flask positions rebuild`
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     ticker = db.Column(db.String(10), nullable=False)
     total_quantity = db.Column(db.Integer, nullable=False)
     average_price = db.Column(db.Float, nullable=False)
+    # Cost of the shares still held (total_quantity * average_price)
+    cost_basis = db.Column(db.Float, nullable=False,
+                           default=0.0, server_default='0')
+    # Profit/loss locked in by sells, and the cost of the shares sold
+    realized_pnl = db.Column(db.Float, nullable=False,
+                             default=0.0, server_default='0')
+    realized_cost_basis = db.Column(db.Float, nullable=False,
+                                    default=0.0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
 
     # Ensure that each user can only have one unique ticker in their portfolio
     __table_args__ = (db.UniqueConstraint(
@@ -0,0 +1,32 @@
+# app/models/portfolio_snapshot.py
+from ..extensions import db
+
+
+class PortfolioSnapshot(db.Model):
+    __tablename__ = 'portfolio_snapshots'
+
+    # One row per user per day, valued at that day's close by
+    # `flask snapshots run`; (user_id, date) is the chart range-read key
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'),
+                        primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    holdings_value = db.Column(db.Float, nullable=False)
+    cash_balance = db.Column(db.Float, nullable=False)
+    # Cost of the shares held, and P&L on them and locked in by sells
+    cost_basis = db.Column(db.Float, nullable=False)
+    unrealized_pnl = db.Column(db.Float, nullable=False)
+    realized_pnl = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<PortfolioSnapshot {self.user_id} {self.date}>'
+
+    def to_dict(self):
+        return {
+            'date': self.date.isoformat(),
+            'holdings_value': self.holdings_value,
+            'cash_balance': self.cash_balance,
+            'total_value': self.holdings_value + self.cash_balance,
+            'cost_basis': self.cost_basis,
+            'unrealized_pnl': self.unrealized_pnl,
+            'realized_pnl': self.realized_pnl
+        }
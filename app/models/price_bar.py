@@ -0,0 +1,29 @@
+# app/models/price_bar.py
+from ..extensions import db
+
+
+class PriceBar(db.Model):
+    __tablename__ = 'price_bars'
+
+    # (symbol, timestamp) is both the primary key and the upsert conflict
+    # target; on TimescaleDB the table is a hypertable partitioned on timestamp
+    symbol = db.Column(db.String(10), primary_key=True)
+    timestamp = db.Column(db.DateTime, primary_key=True)
+    open = db.Column(db.Float, nullable=False)
+    high = db.Column(db.Float, nullable=False)
+    low = db.Column(db.Float, nullable=False)
+    close = db.Column(db.Float, nullable=False)
+    volume = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PriceBar {self.symbol} {self.timestamp}>'
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
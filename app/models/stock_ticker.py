@@ -8,6 +8,15 @@ class StockTicker(db.Model):
     id = db.Column(db.Integer, autoincrement=True)
     symbol = db.Column(db.String(10), nullable=False,
                        unique=True, primary_key=True)
+    name = db.Column(db.String(255), nullable=True)
+    exchange = db.Column(db.String(32), nullable=True)
 
     def __repr__(self):
         return f'<StockTicker {self.symbol}>'
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'name': self.name,
+            'exchange': self.exchange
+        }
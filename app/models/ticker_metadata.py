@@ -0,0 +1,22 @@
+# app/models/ticker_metadata.py
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import JSONB
+
+from ..extensions import db
+
+
+class TickerMetadata(db.Model):
+    __tablename__ = 'ticker_metadata'
+
+    # Company profile and key statistics per symbol as returned by the
+    # market-data provider; served by /ticker and refreshed once older than
+    # TICKER_METADATA_TTL by `flask tickers refresh-metadata`
+    symbol = db.Column(db.String(10), primary_key=True)
+    data = db.Column(db.JSON().with_variant(JSONB, 'postgresql'),
+                     nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False,
+                           default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<TickerMetadata {self.symbol}>'
@@ -6,6 +6,9 @@ from datetime import datetime
 class Transaction(db.Model):
     __tablename__ = 'transactions'
 
+    # `flask transactions init` widens the primary key to (id, timestamp) in
+    # the database when it makes the table a TimescaleDB hypertable; id stays
+    # unique, so the model keeps it as the only key
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     ticker = db.Column(db.String(10), nullable=False)
@@ -13,4 +16,27 @@ class Transaction(db.Model):
     transaction_type = db.Column(
         db.String(4), nullable=False)  # 'BUY' or 'SELL'
     price = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False,
+                          default=datetime.utcnow)
+    # When the server priced the fill, the time of the quote it used
+    quote_timestamp = db.Column(db.DateTime, nullable=True)
+
+    # Per-ticker history and the unfiltered keyset-paged history
+    __table_args__ = (
+        db.Index('ix_transactions_user_ticker_timestamp',
+                 'user_id', 'ticker', 'timestamp'),
+        db.Index('ix_transactions_user_timestamp_id',
+                 'user_id', 'timestamp', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ticker': self.ticker,
+            'quantity': self.quantity,
+            'transaction_type': self.transaction_type,
+            'price': self.price,
+            'timestamp': self.timestamp.isoformat(),
+            'quote_timestamp': (self.quote_timestamp.isoformat()
+                                if self.quote_timestamp else None)
+        }
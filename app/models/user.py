@@ -1,6 +1,5 @@
 # app/models/user.py
-from ..extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..extensions import db, password_hasher
 from datetime import datetime
 
 
@@ -20,8 +19,14 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.email}>'
 
+    # Hashing runs on the bounded password_hasher pool and raises
+    # HasherSaturated when it is full, HasherUnavailable when its workers
+    # cannot be started
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return password_hasher.needs_rehash(self.password_hash)
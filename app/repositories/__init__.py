@@ -0,0 +1,3 @@
+# app/repositories/__init__.py
+from .transaction_repository import get_transactions_by_ticker
+from .transaction_repository import get_transaction_page, iter_transactions
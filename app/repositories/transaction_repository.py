@@ -0,0 +1,160 @@
+# app/repositories/transaction_repository.py
+import base64
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+
+from ..extensions import db
+from ..models.transaction import Transaction
+
+
+def get_transactions_by_ticker(user_id, tickers=None, limit=None):
+    """
+    Load a user's transactions for many tickers in a single query.
+
+    :param user_id: The owner of the transactions.
+    :param tickers: Optional iterable of tickers to restrict the result to.
+    :param limit: Optional maximum number of transactions returned per ticker
+                  (the most recent ones).
+    :return: A dict mapping each ticker to its transactions, newest first.
+    """
+    filters = [Transaction.user_id == user_id]
+    if tickers is not None:
+        tickers = list(tickers)
+        if not tickers:
+            return {}
+        filters.append(Transaction.ticker.in_(tickers))
+
+    newest_first = (Transaction.timestamp.desc(), Transaction.id.desc())
+
+    if limit:
+        # Rank each ticker's fills so the cap is applied inside the database
+        ranked = db.session.query(
+            Transaction.id,
+            func.row_number().over(
+                partition_by=Transaction.ticker,
+                order_by=newest_first
+            ).label('rank')
+        ).filter(*filters).subquery()
+        query = Transaction.query.join(
+            ranked, ranked.c.id == Transaction.id
+        ).filter(ranked.c.rank <= limit)
+    else:
+        query = Transaction.query.filter(*filters)
+
+    grouped = defaultdict(list)
+    for txn in query.order_by(Transaction.ticker, *newest_first):
+        grouped[txn.ticker].append(txn)
+    return grouped
+
+
+HISTORY_COLUMNS = ('id', 'ticker', 'quantity', 'transaction_type', 'price',
+                   'timestamp', 'quote_timestamp')
+
+
+def encode_cursor(timestamp, txn_id):
+    """Opaque keyset cursor for the position just after (timestamp, id)."""
+    raw = f"{timestamp.isoformat()}|{txn_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    :return: A (timestamp, id) tuple.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        timestamp, txn_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(txn_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def transaction_history_query(user_id, ticker=None, transaction_type=None,
+                              start=None, end=None, after=None):
+    """
+    Build the select for a user's transaction history, newest first.
+
+    Ordered by (timestamp, id) descending so it pages by keyset: pass the
+    last row's (timestamp, id) as ``after`` to continue past it.
+
+    :param user_id: The owner of the transactions.
+    :param ticker: Optional ticker filter.
+    :param transaction_type: Optional 'BUY' or 'SELL' filter.
+    :param start: Optional inclusive lower bound on the timestamp.
+    :param end: Optional exclusive upper bound on the timestamp.
+    :param after: Optional (timestamp, id) keyset position.
+    :return: A SQLAlchemy ``Select`` of the HISTORY_COLUMNS.
+    """
+    table = Transaction.__table__
+    query = select(*(table.c[name] for name in HISTORY_COLUMNS)).where(
+        table.c.user_id == user_id)
+
+    if ticker:
+        query = query.where(table.c.ticker == ticker.upper())
+    if transaction_type:
+        query = query.where(table.c.transaction_type == transaction_type)
+    if start is not None:
+        query = query.where(table.c.timestamp >= start)
+    if end is not None:
+        query = query.where(table.c.timestamp < end)
+    if after is not None:
+        query = query.where(
+            tuple_(table.c.timestamp, table.c.id) < tuple_(*after))
+
+    return query.order_by(table.c.timestamp.desc(), table.c.id.desc())
+
+
+def get_transaction_page(user_id, limit=50, **filters):
+    """
+    Fetch one page of a user's transaction history.
+
+    :param limit: Page size.
+    :param filters: Keyword filters for ``transaction_history_query``.
+    :return: A (rows, next_cursor) tuple; next_cursor is None on the last page.
+    """
+    # Fetch one extra row to learn whether another page exists
+    rows = db.session.execute(
+        transaction_history_query(user_id, **filters).limit(limit + 1)
+    ).mappings().all()
+
+    if len(rows) <= limit:
+        return [history_row(row) for row in rows], None
+    rows = rows[:limit]
+    last = rows[-1]
+    return [history_row(row) for row in rows], \
+        encode_cursor(last['timestamp'], last['id'])
+
+
+def iter_transactions(user_id, chunk_size=1000, **filters):
+    """
+    Stream a user's entire (filtered) history without loading it into memory.
+
+    Rows are fetched through a server-side cursor ``chunk_size`` at a time
+    and yielded as plain dicts; no ORM objects are built.
+
+    :param user_id: The owner of the transactions.
+    :param chunk_size: Rows fetched per round trip.
+    :param filters: Keyword filters for ``transaction_history_query``.
+    """
+    result = db.session.execute(
+        transaction_history_query(user_id, **filters).execution_options(
+            stream_results=True, yield_per=chunk_size))
+    try:
+        for row in result.mappings():
+            yield history_row(row)
+    finally:
+        result.close()
+
+
+def history_row(row):
+    """Serialize a history row like ``Transaction.to_dict``."""
+    data = dict(row)
+    data['timestamp'] = data['timestamp'].isoformat()
+    if data['quote_timestamp'] is not None:
+        data['quote_timestamp'] = data['quote_timestamp'].isoformat()
+    return data
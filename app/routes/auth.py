@@ -3,8 +3,9 @@ from flask import Blueprint, make_response, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, set_access_cookies, unset_jwt_cookies
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..extensions import db
+from ..extensions import db, password_hasher
 from ..models.user import User
+from ..services.password_hasher import HasherSaturated, HasherUnavailable
 
 # Create a Blueprint for the authentication routes
 auth_bp = Blueprint('auth', __name__)
@@ -40,6 +41,12 @@ def register():
 
         return jsonify({"message": "User registered successfully"}), 201
 
+    except HasherSaturated:
+        db.session.rollback()
+        return too_busy()
+    except HasherUnavailable:
+        db.session.rollback()
+        return hasher_unavailable()
     except SQLAlchemyError as e:
         db.session.rollback()  # Rollback the session in case of error
         return jsonify({"error": "Something went wrong"}), 500
@@ -63,6 +70,16 @@ def login():
         if not user or not user.check_password(password):
             return jsonify({"error": "Invalid username or password"}), 401
 
+        # Upgrade hashes made with older parameters while we have the password
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+                password_hasher.rehashed += 1
+            except (HasherSaturated, HasherUnavailable, SQLAlchemyError) as e:
+                db.session.rollback()
+                print(f"Error upgrading password hash for user {user.id}: {e}")
+
         # Create JWT token with no expiration
         access_token = create_access_token(
             identity=user.id, expires_delta=False)
@@ -73,9 +90,27 @@ def login():
 
         return response
 
+    except HasherSaturated:
+        return too_busy()
+    except HasherUnavailable:
+        return hasher_unavailable()
     except SQLAlchemyError as e:
         return jsonify({"error": "You need to sign-up"}), 500
 
+
+def too_busy():
+    # Password hashing pool is full; ask the client to retry shortly
+    response = jsonify({"error": "Too many requests, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 429
+
+
+def hasher_unavailable():
+    # Hash workers keep dying; the next call starts fresh ones
+    response = jsonify({"error": "Password checks are unavailable, please retry"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # Get User Endpoint
 @auth_bp.route('/user', methods=['GET'])
 @jwt_required()  # Require a valid JWT token to access this route
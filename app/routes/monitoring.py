@@ -0,0 +1,43 @@
+# app/routes/monitoring.py
+from flask import Blueprint, jsonify
+
+from ..extensions import market_data_poller, quote_broadcaster, quote_cache, ticker_tape
+from ..extensions import matching_engine, provider_pool, response_compressor, symbol_index
+from ..extensions import password_hasher, replica_router, startup_checks
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+
+@monitoring_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    API endpoint exposing in-process cache and worker metrics.
+
+    Example: /metrics
+    """
+    return jsonify({
+        'quote_cache': quote_cache.stats(),
+        'market_data_poller': market_data_poller.stats(),
+        'ticker_tape': ticker_tape.stats(),
+        'streams': quote_broadcaster.stats(),
+        'symbol_index': symbol_index.stats(),
+        'provider_pool': provider_pool.stats(),
+        'matching_engine': matching_engine.stats(),
+        'compression': response_compressor.stats(),
+        'password_hasher': password_hasher.stats(),
+        'database': replica_router.stats(),
+        'startup_checks': startup_checks.stats()
+    }), 200
+
+
+@monitoring_bp.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe: 200 once the startup database checks have passed,
+    503 (with the last error) until then.
+
+    Example: /ready
+    """
+    if startup_checks.ready():
+        return jsonify({'ready': True}), 200
+    return jsonify({'ready': False, 'error': startup_checks.error}), 503
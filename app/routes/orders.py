@@ -0,0 +1,114 @@
+# app/routes/orders.py
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db, matching_engine
+from ..models.order import Order
+from ..services.order_book import resting_order
+from ..utils.db_routing import read_only
+
+orders_bp = Blueprint('orders', __name__)
+
+ORDER_STATUSES = ('open', 'filled', 'cancelled', 'rejected')
+
+
+@orders_bp.route('/orders', methods=['POST'])
+@jwt_required()
+def place_limit_order():
+    """
+    Rest a limit order on the book; it fills when a quote tick crosses it.
+
+    Example: POST /orders {"ticker": "AAPL", "side": "BUY", "quantity": 10,
+                           "limit_price": 175}
+    """
+    data = request.get_json() or {}
+    ticker = data.get('ticker')
+    side = data.get('side')
+    quantity = data.get('quantity')
+    limit_price = data.get('limit_price')
+
+    # Input validation
+    if not all([ticker, side, quantity, limit_price]):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    if not isinstance(side, str) or side.upper() not in ('BUY', 'SELL'):
+        return jsonify({'error': 'side must be BUY or SELL'}), 400
+
+    # bool is an int subclass; JSON true/false are not quantities or prices
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or \
+            not isinstance(limit_price, (int, float)) or \
+            isinstance(limit_price, bool):
+        return jsonify({'error': 'quantity and limit_price must be numbers'}), 400
+
+    if quantity <= 0 or limit_price <= 0:
+        return jsonify({'error': 'Quantity and limit price must be positive'}), 400
+
+    order = Order(
+        user_id=get_jwt_identity(),
+        ticker=ticker.upper(),
+        side=side.upper(),
+        quantity=quantity,
+        limit_price=limit_price
+    )
+
+    try:
+        db.session.add(order)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Order failed', 'details': str(e)}), 500
+
+    # Only rest the order once it is durable
+    matching_engine.submit(resting_order(order))
+
+    return jsonify(order.to_dict()), 201
+
+
+@orders_bp.route('/orders', methods=['GET'])
+@jwt_required()
+@read_only
+def list_orders():
+    """
+    API endpoint to list the current user's orders, newest first.
+
+    Example: /orders?status=open&limit=50
+    """
+    status = request.args.get('status')
+    limit = min(request.args.get('limit', default=100, type=int), 500)
+
+    if status is not None and status not in ORDER_STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(ORDER_STATUSES)}"}), 400
+
+    query = Order.query.filter_by(user_id=get_jwt_identity())
+    if status is not None:
+        query = query.filter_by(status=status)
+    orders = query.order_by(Order.id.desc()).limit(limit).all()
+
+    return jsonify([order.to_dict() for order in orders]), 200
+
+
+@orders_bp.route('/orders/<int:order_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_order(order_id):
+    user_id = get_jwt_identity()
+
+    try:
+        # Conditional update so an order filled in the meantime stays filled
+        cancelled = Order.query.filter_by(
+            id=order_id, user_id=user_id, status='open'
+        ).update({'status': 'cancelled'}, synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Cancel failed', 'details': str(e)}), 500
+
+    if not cancelled:
+        order = Order.query.filter_by(id=order_id, user_id=user_id).first()
+        if order is None:
+            return jsonify({'error': 'Order not found'}), 404
+        return jsonify({'error': f'Order is already {order.status}'}), 409
+
+    matching_engine.cancel(order_id)
+
+    return jsonify({'message': 'Order cancelled'}), 200
@@ -1,21 +1,63 @@
 # app/routes/portfolio.py
-from flask import Blueprint, jsonify
+import asyncio
+
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func
 from datetime import datetime, timedelta
 
-from app.services.stock_service import get_current_price, get_historical_prices
+from app.extensions import provider_pool
+from app.services.stock_service import get_current_prices_async, get_portfolio_value_series_async
+from app.services.stock_service import get_historical_prices_many_async, resolve_price, with_deadline
 from ..models.portfolio import Portfolio
 from ..models.user import User
 from ..models.transaction import Transaction
-import yfinance as yf
+from ..repositories.transaction_repository import get_transactions_by_ticker
+from ..services.snapshots import get_snapshot_series
+from ..utils.db_routing import read_only
 
 portfolio_bp = Blueprint('portfolio', __name__)
 
 
+def realized_summary(entry, transactions_list):
+    """Summarize a squared off position from its materialized realized P&L."""
+    total_invested = entry.realized_cost_basis or 0.0
+    realized = entry.realized_pnl or 0.0
+    return {
+        'ticker': entry.ticker,
+        'total_invested': total_invested,
+        'total_returned': total_invested + realized,
+        'profit_loss': {
+            'dollars': realized,
+            'percent': round(realized / total_invested * 100, 2)
+            if total_invested else 0
+        },
+        'transactions': transactions_list
+    }
+
+
+def sample_snapshots(snapshots, start, every_days=30):
+    """Holdings value every N days from start, from the daily snapshots."""
+    by_date = {snapshot['date']: snapshot for snapshot in snapshots}
+    samples = []
+    day = start
+    while day <= datetime.utcnow().date():
+        snapshot = by_date.get(day.isoformat())
+        if snapshot is not None:
+            samples.append({'date': snapshot['date'],
+                            'value': snapshot['holdings_value']})
+        day += timedelta(days=every_days)
+    return samples
+
+
+async def resolved(value):
+    return value
+
+
 @portfolio_bp.route('/portfolio', methods=['GET'])
 @jwt_required()
-def view_portfolio():
+@read_only
+async def view_portfolio():
     user_id = get_jwt_identity()  # Get the user ID from the JWT token
 
     user = User.query.get(user_id)  # Fetch the user from the database
@@ -28,12 +70,40 @@ def view_portfolio():
     portfolio = []
     squared_off_positions = []
 
+    # Fetch current prices for every holding in one batched lookup, bounded
+    # by the request deadline; late prices fall back below and are flagged
+    current_prices, _ = await with_deadline(get_current_prices_async(
+        [entry.ticker for entry in portfolio_entries if entry.total_quantity > 0]),
+        provider_pool.deadline())
+    stale_tickers = set()
+
+    # Fetch the transactions of every holding in a single query, optionally
+    # capped to the most recent N per ticker
+    transactions_by_ticker = get_transactions_by_ticker(
+        user_id,
+        [entry.ticker for entry in portfolio_entries],
+        limit=request.args.get('transactions_limit', type=int)
+    )
+
     for entry in portfolio_entries:
-        # Get the current price of the stock
-        current_price = get_current_price(entry.ticker)
-        if current_price is None:
-            # Fallback to average price if current price is not available
-            current_price = entry.average_price
+        # Transactions for this ticker were loaded up front
+        transactions_list = [
+            txn.to_dict() for txn in transactions_by_ticker.get(entry.ticker, [])
+        ]
+
+        if entry.total_quantity <= 0:
+            # Only include necessary fields for squared off positions,
+            # using the P&L realized when the shares were sold
+            squared_off_positions.append(realized_summary(
+                entry, transactions_list))
+            continue
+
+        # Get the current price of the stock, falling back to the last cached
+        # quote or the average price if the lookup was late or failed
+        current_price, price_status = resolve_price(
+            entry.ticker, current_prices, entry.average_price)
+        if price_status != 'live':
+            stale_tickers.add(entry.ticker)
 
         # Calculate total value of the position
         total_value = entry.total_quantity * current_price
@@ -44,56 +114,31 @@ def view_portfolio():
         profit_loss_percent = (
             profit_loss_dollars / total_invested) * 100 if total_invested != 0 else 0  # Calculate profit/loss in percent
 
-        # Fetch all transactions for this ticker
-        transactions = Transaction.query.filter_by(
-            user_id=user_id, ticker=entry.ticker
-        ).order_by(Transaction.timestamp.desc()).all()
-        transactions_list = [
-            {
-                'id': txn.id,
-                'ticker': txn.ticker,  # Include ticker for clarity
-                'quantity': txn.quantity,
-                'transaction_type': txn.transaction_type,
-                'price': txn.price,
-                'timestamp': txn.timestamp.isoformat()
-            }
-            for txn in transactions
-        ]
-
         portfolio_data = {
             'ticker': entry.ticker,
             'shares': entry.total_quantity,
             'average_price': entry.average_price,
             'current_price': current_price,
+            'price_status': price_status,
             'total_value': total_value,
             'profit_loss': {
                 'dollars': profit_loss_dollars,
                 'percent': round(profit_loss_percent, 2)
             },
+            'realized_profit_loss': entry.realized_pnl,
             'transactions': transactions_list
         }
 
-        if entry.total_quantity > 0:
-            # Add to portfolio if shares are still held
-            portfolio.append(portfolio_data)
-        else:
-            # Only include necessary fields for squared off positions
-            squared_off_positions.append({
-                'ticker': entry.ticker,
-                'total_invested': total_invested,
-                'total_returned': total_value,
-                'profit_loss': {
-                    'dollars': profit_loss_dollars,
-                    'percent': round(profit_loss_percent, 2)
-                },
-                'transactions': transactions_list
-            })
+        # Add to portfolio, shares are still held
+        portfolio.append(portfolio_data)
 
     # Prepare the response
     response = {
         'user_id': user_id,
         'portfolio': portfolio,
-        'squared_off_positions': squared_off_positions
+        'squared_off_positions': squared_off_positions,
+        'partial': bool(stale_tickers),
+        'stale_tickers': sorted(stale_tickers)
     }
 
     if hasattr(user, 'cash_balance'):
@@ -105,7 +150,8 @@ def view_portfolio():
 
 @portfolio_bp.route('/analytics', methods=['GET'])
 @jwt_required()
-def view_analytics():
+@read_only
+async def view_analytics():
     user_id = get_jwt_identity()  # Get the user ID from the JWT token
 
     user = User.query.get(user_id)  # Fetch the user from the database
@@ -128,24 +174,70 @@ def view_analytics():
     # Fetch recent transactions (e.g., last 5)
     recent_transactions_query = Transaction.query.filter_by(
         user_id=user_id).order_by(Transaction.timestamp.desc()).limit(5).all()
-    recent_transactions = [
-        {
-            'id': txn.id,
-            'ticker': txn.ticker,
-            'quantity': txn.quantity,
-            'transaction_type': txn.transaction_type,
-            'price': txn.price,
-            'timestamp': txn.timestamp.isoformat()
-        }
-        for txn in recent_transactions_query
-    ]
+    recent_transactions = [txn.to_dict() for txn in recent_transactions_query]
+
+    # Quotes, per-holding history and the performance series are independent
+    # provider lookups, so await them concurrently. Each is bounded by the
+    # per-call timeout and all of them by one request deadline; whatever is
+    # late is replaced by stale or fallback values and flagged.
+    tickers = [entry.ticker for entry in portfolio_entries
+               if entry.total_quantity > 0]
+    today = datetime.utcnow()
+    deadline = provider_pool.deadline()
+
+    # Portfolio value every 30 days over the last 6 months, read from the
+    # daily snapshots; until `flask snapshots run` has produced them it is
+    # estimated by valuing the current holdings at past closes
+    performance_start = (today - timedelta(days=30 * 5)).date()
+    snapshots = get_snapshot_series(user_id, performance_start)
+    if snapshots:
+        performance_series = resolved(
+            (sample_snapshots(snapshots, performance_start), False))
+    else:
+        performance_series = with_deadline(get_portfolio_value_series_async(
+            {entry.ticker: entry.total_quantity for entry in portfolio_entries},
+            start=today - timedelta(days=30 * 5),
+            end=today,
+            freq='30D',
+            # Fallback to average price if no data
+            fallback_prices={
+                entry.ticker: entry.average_price for entry in portfolio_entries}
+        ), deadline, default=[])
+
+    (current_prices, _), (performance_data, performance_late), history = await asyncio.gather(
+        with_deadline(get_current_prices_async(tickers), deadline),
+        performance_series,
+        get_historical_prices_many_async(tickers, days=30, deadline=deadline)
+    )
+    stale_tickers = set(history.timed_out) | set(history.failed)
+
+    # Fetch the transactions of every holding in a single query, optionally
+    # capped to the most recent N per ticker
+    transactions_by_ticker = get_transactions_by_ticker(
+        user_id,
+        [entry.ticker for entry in portfolio_entries],
+        limit=request.args.get('transactions_limit', type=int)
+    )
 
     for entry in portfolio_entries:
-        # Get the current price of the stock
-        current_price = get_current_price(entry.ticker)
-        if current_price is None:
-            # Fallback to average price if current price is not available
-            current_price = entry.average_price
+        # Transactions for this ticker were loaded up front
+        transactions_list = [
+            txn.to_dict() for txn in transactions_by_ticker.get(entry.ticker, [])
+        ]
+
+        if entry.total_quantity <= 0:
+            # Only include necessary fields for squared off positions,
+            # using the P&L realized when the shares were sold
+            squared_off_positions.append(realized_summary(
+                entry, transactions_list))
+            continue
+
+        # Get the current price of the stock, falling back to the last cached
+        # quote or the average price if the lookup was late or failed
+        current_price, price_status = resolve_price(
+            entry.ticker, current_prices, entry.average_price)
+        if price_status != 'live':
+            stale_tickers.add(entry.ticker)
 
         total_entry_value = entry.total_quantity * \
             current_price  # Calculate total value of the position
@@ -171,9 +263,8 @@ def view_analytics():
             best_performance = profit_loss_percent
             best_performer = entry.ticker
 
-        # Calculate stock performance (assuming you have historical prices)
-        historical_prices = get_historical_prices(
-            entry.ticker, days=30)
+        # Calculate stock performance from the last 30 days of closes
+        historical_prices = history.results.get(entry.ticker)
         if historical_prices:
             initial_price = historical_prices[0]['price']
             current_performance = (
@@ -186,92 +277,47 @@ def view_analytics():
             'performance': round(current_performance, 2)
         })
 
-        # Fetch all transactions for this ticker
-        transactions = Transaction.query.filter_by(
-            user_id=user_id, ticker=entry.ticker
-        ).order_by(Transaction.timestamp.desc()).all()
-        transactions_list = [
-            {
-                'id': txn.id,
-                'ticker': txn.ticker,  # Include ticker for clarity
-                'quantity': txn.quantity,
-                'transaction_type': txn.transaction_type,
-                'price': txn.price,
-                'timestamp': txn.timestamp.isoformat()
-            }
-            for txn in transactions
-        ]
-
         portfolio_data = {
             'ticker': entry.ticker,
             'shares': entry.total_quantity,
             'average_price': entry.average_price,
             'current_price': current_price,
+            'price_status': price_status,
             'total_value': total_entry_value,
             'profit_loss': {
                 'dollars': profit_loss_dollars,
                 'percent': round(profit_loss_percent, 2)
             },
+            'realized_profit_loss': entry.realized_pnl,
             'transactions': transactions_list
         }
 
-        if entry.total_quantity > 0:
-            # Add to portfolio if shares are still held
-            portfolio.append(portfolio_data)
-        else:
-            # Only include necessary fields for squared off positions
-            squared_off_positions.append({
-                'ticker': entry.ticker,
-                'total_invested': total_invested,
-                'total_returned': total_entry_value,
-                'profit_loss': {
-                    'dollars': profit_loss_dollars,
-                    'percent': round(profit_loss_percent, 2)
-                },
-                'transactions': transactions_list
-            })
+        # Add to portfolio, shares are still held
+        portfolio.append(portfolio_data)
 
     # Calculate total stocks
     total_stocks = len(portfolio_composition)
 
-    # Prepare performance data (e.g., monthly portfolio values)
-    performance_data = []
-    today = datetime.utcnow()
-    for i in range(6):  # Last 6 months
-        month_date = today - timedelta(days=30*i)
-        month_date_str = month_date.strftime('%Y-%m-%d')
-
-        # Calculate portfolio value on the given date
-        portfolio_value_on_date = 0
-        for entry in portfolio_entries:
-            ticker = entry.ticker
-            stock = yf.Ticker(ticker)
-            historical_data = stock.history(
-                start=month_date_str, end=month_date_str)
-            if not historical_data.empty:
-                historical_price = historical_data['Close'].iloc[0]
-            else:
-                historical_price = entry.average_price  # Fallback to average price if no data
-
-            portfolio_value_on_date += entry.total_quantity * historical_price
-
-        performance_data.append({
-            'date': month_date_str,
-            'value': portfolio_value_on_date
-        })
+    # Performance data was fetched above; present it most recent first
+    performance_data.reverse()
 
     # Prepare the response
     response = {
         'totalValue': total_value,
         'totalStocks': total_stocks,
         'totalProfitLoss': total_profit_loss,
+        'totalRealizedProfitLoss': sum(
+            entry.realized_pnl or 0.0 for entry in portfolio_entries),
         'bestPerformer': best_performer,
         'recentTransactions': recent_transactions,
         'portfolioComposition': portfolio_composition,
         'performanceData': performance_data,
         'stockPerformance': stock_performance,
         'portfolio': portfolio,
-        'squared_off_positions': squared_off_positions
+        'squared_off_positions': squared_off_positions,
+        # Set when some lookups missed the deadline and values are stale
+        'partial': performance_late or bool(stale_tickers),
+        'staleTickers': sorted(stale_tickers)
     }
 
     if hasattr(user, 'cash_balance'):
@@ -279,3 +325,21 @@ def view_analytics():
         response['cash_balance'] = user.cash_balance
 
     return jsonify(response), 200  # Return the response as JSON
+
+
+@portfolio_bp.route('/portfolio/performance', methods=['GET'])
+@jwt_required()
+@read_only
+def portfolio_performance():
+    """
+    API endpoint for the daily portfolio value chart.
+
+    Served from the end-of-day snapshots in one indexed range read.
+
+    Example: /portfolio/performance?days=180
+    """
+    user_id = get_jwt_identity()
+    days = min(max(request.args.get('days', 180, type=int), 1), 3650)
+    start = (datetime.utcnow() - timedelta(days=days)).date()
+
+    return jsonify(get_snapshot_series(user_id, start)), 200
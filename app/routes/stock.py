@@ -1,26 +1,44 @@
 # app/routes/stock.py
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, current_app, request, jsonify, make_response
 from flask_cors import cross_origin
-from app.services.stock_service import fetch_ticker_details, get_ticker_tape
-from app.services.stock_service import search_ticker_in_db
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from app.extensions import db, quote_broadcaster, quote_cache, ticker_tape
+from app.models.portfolio import Portfolio
+from app.models.user import User
+from app.services.quote_stream import SubscriberLimitReached, revalue_portfolio
+from app.services.stock_service import get_ticker_metadata_async, get_ticker_tape_async
+from app.services.stock_service import search_ticker_in_db, with_deadline
+from app.utils.db_routing import read_only
 
 stock_bp = Blueprint('stock', __name__)
 
 
 @stock_bp.route('/ticker', methods=['GET'])
-def get_ticker_details():
+async def get_ticker_details():
     """
     API endpoint to fetch details of a stock ticker.
 
-    Example: /ticker?ticker=AAPL
+    Served from stored metadata; pass fields= to receive only those keys.
+
+    Example: /ticker?ticker=AAPL&fields=shortName,sector,marketCap
     """
     ticker = request.args.get('ticker')
 
     if not ticker:
         return jsonify({"error": "Ticker symbol is required"}), 400
 
-    data = fetch_ticker_details(ticker)
+    fields = [field.strip() for field in request.args.get('fields', '').split(',')
+              if field.strip()]
+
+    data, late = await with_deadline(
+        get_ticker_metadata_async(ticker, fields or None))
 
+    if late:
+        response = jsonify({"error": "Ticker details are temporarily unavailable"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
     if data is None:
         return jsonify({"error": "Could not fetch ticker details"}), 404
 
@@ -28,33 +46,174 @@ def get_ticker_details():
 
 
 @stock_bp.route('/search', methods=['GET'])
+@read_only
 def search_stocks():
     """
     API endpoint to search for stocks by ticker symbol or company name from the local database.
 
-    Example: /search?query=AAPL
+    Results are ranked exact symbol > prefix > substring and limited.
+
+    Example: /search?query=AAPL&limit=10
     """
     query = request.args.get('query')
 
     if not query:
         return jsonify({"error": "Search query is required"}), 400
 
-    results = search_ticker_in_db(query)
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    results = search_ticker_in_db(query, limit=limit)
 
     return jsonify(results), 200
 
 
 @stock_bp.route('/ticker-tape', methods=['GET'])
-def ticker_tape_endpoint():
+async def ticker_tape_endpoint():
     """
     API endpoint to fetch ticker tape data for major stocks.
 
+    Serves a periodically refreshed snapshot and honours If-None-Match /
+    If-Modified-Since so pollers get a 304 while it is unchanged.
+
     Example: /ticker-tape
     """
     try:
-        data = get_ticker_tape()
-        return jsonify(data), 200
+        # Serve the previous snapshot if a rebuild is late or fails
+        snapshot, late = await with_deadline(get_ticker_tape_async())
+        if late:
+            snapshot = ticker_tape.peek()
+        if snapshot is None:
+            response = jsonify({"error": "Ticker tape is temporarily unavailable"})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        response = make_response(jsonify(snapshot.data), 200)
+        response.set_etag(snapshot.etag)
+        response.last_modified = snapshot.generated_at
+        response.cache_control.public = True
+        response.cache_control.max_age = ticker_tape.refresh_interval
+        return response.make_conditional(request)
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
         return jsonify({"error": "An error occurred while fetching ticker tape data.", "details": str(e)}), 500
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _load_holdings(user_id):
+    """
+    The streaming user's cash and open positions.
+
+    :return: A (cash_balance, holdings) tuple, with holdings mapping ticker
+             to (quantity, average_price); (None, {}) without a user.
+    """
+    if user_id is None:
+        return None, {}
+    try:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None, {}
+        return user.cash_balance, {
+            entry.ticker: (entry.total_quantity, entry.average_price)
+            for entry in Portfolio.query.filter(
+                Portfolio.user_id == user_id,
+                Portfolio.total_quantity > 0
+            )
+        }
+    finally:
+        # Hand the connection back to the pool; streams are long-lived
+        db.session.remove()
+
+
+@stock_bp.route('/stream', methods=['GET'])
+def stream_updates():
+    """
+    Server-Sent Events stream of ticker tape and quote updates. When called
+    with a valid JWT cookie it also streams portfolio revaluations whenever a
+    held symbol's quote changes.
+
+    Updates fan out from the shared market data poller and ticker tape
+    snapshot. Each open stream holds a worker thread waiting on its
+    subscription, so at most STREAM_MAX_SUBSCRIBERS streams are served per
+    process and the rest get 503. Holdings are reloaded when a trade in this
+    process changes them, and on every heartbeat to pick up trades served by
+    other processes.
+
+    Example: /stream?symbols=AAPL,MSFT
+    """
+    symbols = [
+        symbol.strip().upper()
+        for symbol in request.args.get('symbols', '').split(',')
+        if symbol.strip()
+    ]
+
+    verify_jwt_in_request(optional=True)
+    user_id = get_jwt_identity()
+    cash_balance, holdings = _load_holdings(user_id)
+
+    try:
+        subscription = quote_broadcaster.subscribe(
+            (symbols + list(holdings)) or None, user_id=user_id)
+    except SubscriberLimitReached as e:
+        return jsonify({"error": str(e)}), 503
+
+    app = current_app._get_current_object()
+    heartbeat = app.config.get('STREAM_HEARTBEAT_INTERVAL', 15)
+    prices = {ticker: quote_cache.peek(ticker) for ticker in holdings}
+
+    def refresh():
+        # Returns True when the holdings or cash changed
+        nonlocal cash_balance, holdings
+        with app.app_context():
+            latest = _load_holdings(user_id)
+        if latest == (cash_balance, holdings):
+            return False
+        cash_balance, holdings = latest
+        subscription.follow((symbols + list(holdings)) or None)
+        for ticker in holdings:
+            if prices.get(ticker) is None:
+                prices[ticker] = quote_cache.peek(ticker)
+        return True
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            with app.app_context():
+                yield _sse('tape', ticker_tape.get().data)
+            if holdings:
+                yield _sse('portfolio', revalue_portfolio(
+                    holdings, prices, cash_balance))
+
+            while True:
+                batch = subscription.next_batch(heartbeat)
+                if not batch:
+                    # Idle streams drive the shared tape refresh; a changed
+                    # tape is published to every subscriber
+                    with app.app_context():
+                        ticker_tape.get()
+                    if user_id is not None and refresh():
+                        yield _sse('portfolio', revalue_portfolio(
+                            holdings, prices, cash_balance))
+                    yield ": keep-alive\n\n"
+                    continue
+
+                revalue = False
+                for (event, key), data in batch.items():
+                    if event == 'positions':
+                        revalue = refresh() or revalue
+                        continue
+                    yield _sse(event, data)
+                    if event == 'quote' and key in holdings:
+                        prices[key] = data['price']
+                        revalue = True
+                if revalue:
+                    yield _sse('portfolio', revalue_portfolio(
+                        holdings, prices, cash_balance))
+        finally:
+            quote_broadcaster.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -1,11 +1,21 @@
 # app/routes/transactions.py
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask import stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError
 from ..extensions import db
-from ..models.transaction import Transaction
-from ..models.portfolio import Portfolio
-from ..models.user import User
+from ..repositories.transaction_repository import HISTORY_COLUMNS, \
+    decode_cursor, get_transaction_page, iter_transactions
+from ..services.positions import TradeRejected, execute_batch, \
+    execute_trade
+from ..services.price_oracle import check_limit, execution_price, \
+    get_execution_quote
+from ..utils.db_routing import read_only
 
 transactions_bp = Blueprint('transactions', __name__)
 
@@ -13,124 +23,259 @@ transactions_bp = Blueprint('transactions', __name__)
 @transactions_bp.route('/buy', methods=['POST'])
 @jwt_required()
 def buy_stock():
-    data = request.get_json()
-    ticker = data.get('ticker')
-    quantity = data.get('quantity')
-    price = data.get('price')
+    return place_order('BUY', 'Stock bought successfully')
 
-    # Input validation
-    if not all([ticker, quantity, price]):
-        return jsonify({'error': 'Missing required fields'}), 400
 
-    if quantity <= 0 or price <= 0:
-        return jsonify({'error': 'Quantity and price must be positive'}), 400
+@transactions_bp.route('/sell', methods=['POST'])
+@jwt_required()
+def sell_stock():
+    return place_order('SELL', 'Stock sold successfully')
+
 
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+def place_order(side, message):
+    """
+    Execute a single buy or sell for the current user.
 
-    # (Optional) Check if user has enough cash
-    total_cost = quantity * price
-    if hasattr(user, 'cash_balance'):
-        if user.cash_balance < total_cost:
-            return jsonify({'error': 'Insufficient funds'}), 400
-        user.cash_balance -= total_cost
+    Without a ``price`` the order executes at the server's current quote,
+    optionally guarded by ``limit_price``; otherwise at the price given.
+    """
+    data = request.get_json() or {}
+    order = dict(data, side=side)
+
+    # Input validation
+    error = validate_order(order)
+    if error:
+        return jsonify({'error': error}), 400
+
+    user_id = get_jwt_identity()
 
     try:
-        # Create Transaction
-        transaction = Transaction(
-            user_id=user_id,
-            ticker=ticker.upper(),
-            quantity=quantity,
-            transaction_type='BUY',
-            price=price
-        )
-        db.session.add(transaction)
-
-        # Update Portfolio
-        portfolio = Portfolio.query.filter_by(
-            user_id=user_id, ticker=ticker.upper()).first()
-        if portfolio:
-            # Calculate new average price
-            new_total_quantity = portfolio.total_quantity + quantity
-            new_average_price = (
-                (portfolio.average_price * portfolio.total_quantity) + (price * quantity)) / new_total_quantity
-            portfolio.total_quantity = new_total_quantity
-            portfolio.average_price = new_average_price
-        else:
-            # Create new portfolio entry if it doesn't exist
-            portfolio = Portfolio(
-                user_id=user_id,
-                ticker=ticker.upper(),
-                total_quantity=quantity,
-                average_price=price
-            )
-            db.session.add(portfolio)
+        ticker = order['ticker'].upper()
+        price, quote_timestamp = order.get('price'), None
+        if price is None:
+            price, quote_timestamp = execution_price(
+                ticker, side, order.get('limit_price'))
 
-        db.session.commit()
+        # Move cash, update the position and record the fill atomically
+        transaction = execute_trade(user_id, ticker, side, order['quantity'],
+                                    price, quote_timestamp=quote_timestamp)
 
-        return jsonify({'message': 'Stock bought successfully'}), 200
+        return jsonify({
+            'message': message,
+            'transaction': transaction.to_dict()
+        }), 200
 
+    except TradeRejected as e:
+        return jsonify({'error': e.message}), e.status_code
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': 'Transaction failed', 'details': str(e)}), 500
 
 
-@transactions_bp.route('/sell', methods=['POST'])
+@transactions_bp.route('/transactions', methods=['GET'])
 @jwt_required()
-def sell_stock():
-    data = request.get_json()
-    ticker = data.get('ticker')
-    quantity = data.get('quantity')
-    price = data.get('price')
+@read_only
+def transaction_history():
+    """
+    API endpoint for the current user's transaction history, newest first.
 
-    # Input validation
-    if not all([ticker, quantity, price]):
-        return jsonify({'error': 'Missing required fields'}), 400
+    Pages by keyset: pass the returned next_cursor as ?cursor= to continue.
+    With format=ndjson or format=csv the whole filtered history is streamed
+    instead.
 
-    if quantity <= 0 or price <= 0:
-        return jsonify({'error': 'Quantity and price must be positive'}), 400
+    Example: /transactions?ticker=AAPL&type=BUY&start=2024-01-01&limit=50
+    """
+    output = request.args.get('format', 'json')
+    if output not in ('json', 'ndjson', 'csv'):
+        return jsonify({'error': 'format must be json, ndjson or csv'}), 400
+
+    transaction_type = request.args.get('type')
+    if transaction_type is not None:
+        transaction_type = transaction_type.upper()
+        if transaction_type not in ('BUY', 'SELL'):
+            return jsonify({'error': 'type must be BUY or SELL'}), 400
+
+    try:
+        start = parse_timestamp(request.args.get('start'))
+        end = parse_timestamp(request.args.get('end'))
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+    filters = {
+        'ticker': request.args.get('ticker'),
+        'transaction_type': transaction_type,
+        'start': start,
+        'end': end,
+        'after': after
+    }
+
+    if output == 'json':
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        transactions, next_cursor = get_transaction_page(
+            user_id, limit=limit, **filters)
+        return jsonify({
+            'transactions': transactions,
+            'next_cursor': next_cursor
+        }), 200
 
-    portfolio = Portfolio.query.filter_by(
-        user_id=user_id, ticker=ticker.upper()).first()
-    if not portfolio or portfolio.total_quantity < quantity:
-        return jsonify({'error': 'Insufficient stock quantity to sell'}), 400
+    rows = iter_transactions(user_id, **filters)
+    if output == 'ndjson':
+        lines = (json.dumps(row) + '\n' for row in rows)
+        return Response(stream_with_context(lines),
+                        mimetype='application/x-ndjson')
 
+    response = Response(stream_with_context(csv_lines(rows)),
+                        mimetype='text/csv')
+    response.headers['Content-Disposition'] = \
+        'attachment; filename=transactions.csv'
+    return response
+
+
+def parse_timestamp(value):
+    """Parse an optional ISO date or datetime query parameter."""
+    if not value:
+        return None
     try:
-        # Create Transaction
-        transaction = Transaction(
-            user_id=user_id,
-            ticker=ticker.upper(),
-            quantity=quantity,
-            transaction_type='SELL',
-            price=price
-        )
-        db.session.add(transaction)
-
-        # Update Portfolio
-        portfolio.total_quantity -= quantity
-        if portfolio.total_quantity == 0:
-            # Remove portfolio entry if all stocks are sold
-            db.session.delete(portfolio)
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+
+
+def csv_lines(rows):
+    """Render history rows as CSV, one chunk per row after the header."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=HISTORY_COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when there are no rows
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+@transactions_bp.route('/orders/batch', methods=['POST'])
+@jwt_required()
+def submit_order_batch():
+    data = request.get_json() or {}
+    orders = data.get('orders')
+    atomic = data.get('atomic', True)
+
+    # Input validation
+    if not isinstance(orders, list) or not orders:
+        return jsonify({'error': 'orders must be a non-empty list'}), 400
+    if not isinstance(atomic, bool):
+        return jsonify({'error': 'atomic must be true or false'}), 400
+
+    max_size = current_app.config['ORDER_BATCH_MAX_SIZE']
+    if len(orders) > max_size:
+        return jsonify({'error': f'At most {max_size} orders per batch'}), 400
+
+    # Validate every order before touching the database
+    validated, errors = [], []
+    for index, order in enumerate(orders):
+        error = validate_order(order)
+        if error:
+            errors.append({'index': index, 'error': error})
         else:
-            # Average price remains unchanged on selling
-            pass
+            validated.append({
+                'ticker': order['ticker'].upper(),
+                'side': order['side'].upper(),
+                'quantity': order['quantity'],
+                'price': order.get('price'),
+                'limit_price': order.get('limit_price')
+            })
+    if errors:
+        return jsonify({'error': 'Invalid orders', 'orders': errors}), 400
 
-        # (Optional) Update user's cash balance
-        if hasattr(user, 'cash_balance'):
-            total_revenue = quantity * price
-            user.cash_balance += total_revenue
+    user_id = get_jwt_identity()
 
-        db.session.commit()
+    # Price market orders from the quote cache, one lookup per ticker
+    quotes, unpriced, status = {}, {}, 400
+    for index, order in enumerate(validated):
+        if order['price'] is not None:
+            continue
+        try:
+            if order['ticker'] not in quotes:
+                quotes[order['ticker']] = get_execution_quote(order['ticker'])
+            quote = quotes[order['ticker']]
+            check_limit(order['side'], quote.price, order['limit_price'])
+        except TradeRejected as e:
+            unpriced[index] = e.message
+            status = max(status, e.status_code)
+            continue
+        order['price'] = quote.price
+        order['quote_timestamp'] = datetime.utcfromtimestamp(quote.quoted_at)
+    if unpriced and atomic:
+        # 503 when any order lacked a fresh quote, as for single orders
+        errors = [{'index': index, 'error': error}
+                  for index, error in sorted(unpriced.items())]
+        return jsonify({'error': 'Orders could not be priced',
+                        'orders': errors}), status
 
-        return jsonify({'message': 'Stock sold successfully'}), 200
+    try:
+        # One transaction and one commit for the whole batch; without atomic
+        # the unpriced orders are reported as rejected and the rest execute
+        committed, results = execute_batch(user_id, validated, atomic=atomic,
+                                           rejected=unpriced)
 
+        filled = sum(1 for result in results if result['status'] == 'filled')
+        response = {
+            'results': results,
+            'filled': filled,
+            'rejected': len(results) - filled
+        }
+        if not committed:
+            response['error'] = 'Batch rejected; no orders were executed'
+            return jsonify(response), 400
+        return jsonify(response), 200
+
+    except TradeRejected as e:
+        return jsonify({'error': e.message}), e.status_code
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': 'Transaction failed', 'details': str(e)}), 500
+
+
+def validate_order(order):
+    """
+    Check the shape of a single batch order.
+
+    :param order: The order as sent by the client.
+    :return: An error message, or None when the order is valid.
+    """
+    if not isinstance(order, dict):
+        return 'Order must be an object'
+
+    ticker = order.get('ticker')
+    side = order.get('side')
+    quantity = order.get('quantity')
+    price = order.get('price')
+    limit_price = order.get('limit_price')
+
+    # price is optional: without it the order executes at the market quote
+    if not all([ticker, side, quantity]):
+        return 'Missing required fields'
+    if not isinstance(ticker, str) or not isinstance(side, str):
+        return 'ticker and side must be strings'
+    if side.upper() not in ('BUY', 'SELL'):
+        return 'side must be BUY or SELL'
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        return 'quantity must be an integer'
+    for value in (price, limit_price):
+        if value is None:
+            continue
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return 'price and limit_price must be numbers'
+        if value <= 0:
+            return 'Quantity and price must be positive'
+    if quantity <= 0:
+        return 'Quantity and price must be positive'
+    if price is not None and limit_price is not None:
+        return 'limit_price only applies to orders without a price'
+    return None
@@ -0,0 +1,179 @@
+# app/services/market_data_poller.py
+import random
+import threading
+import time
+
+
+class MarketDataPoller:
+    """
+    Background worker that keeps quotes fresh so request handlers only read.
+
+    Every ``interval`` seconds it polls the symbols currently held in
+    ``portfolio_view`` plus the ticker tape, ``batch_size`` symbols per
+    provider call, and writes the prices into the quote cache (and, when
+    ``persist`` is set, into the price store). Provider errors back off
+    exponentially up to ``max_backoff`` seconds.
+    """
+
+    def __init__(self, cache, provider=None, interval=15, batch_size=50,
+                 max_backoff=300, persist=False):
+        self.cache = cache
+        self.provider = provider
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.persist = persist
+        self.app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_updated = {}
+        self._listeners = []
+        self._symbol_sources = []
+        self.polls = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.last_poll = None
+        self.last_error = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('MARKET_DATA_POLL_INTERVAL', self.interval)
+        self.batch_size = app.config.get(
+            'MARKET_DATA_POLL_BATCH_SIZE', self.batch_size)
+        self.max_backoff = app.config.get(
+            'MARKET_DATA_POLL_MAX_BACKOFF', self.max_backoff)
+        if self.provider is None:
+            from app.services.quote_providers import YFinanceQuoteProvider
+            self.provider = YFinanceQuoteProvider()
+        app.extensions['market_data_poller'] = self
+
+        # Start on the first request so CLI invocations never spawn the thread
+        if app.config.get('MARKET_DATA_POLLER_ENABLED'):
+            app.before_request(self._ensure_started)
+
+    def add_listener(self, listener):
+        """Call ``listener(prices)`` with every batch of freshly polled prices."""
+        # Registered from init_app, which runs again for every app created
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def add_symbol_source(self, source):
+        """Also poll the symbols returned by ``source()`` on every cycle."""
+        if source not in self._symbol_sources:
+            self._symbol_sources.append(source)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.run_forever, name='market-data-poller', daemon=True)
+            self._thread.start()
+        self.app.logger.info('Market data poller started')
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            with self.app.app_context():
+                self.poll_once()
+            self._stop.wait(self.next_delay())
+
+    def next_delay(self):
+        if not self.consecutive_failures:
+            return self.interval
+        backoff = self.interval * 2 ** self.consecutive_failures
+        return min(backoff, self.max_backoff) * random.uniform(0.8, 1.0)
+
+    def tracked_symbols(self):
+        """
+        Symbols held in any portfolio, the ticker tape and any registered
+        symbol sources, deduplicated.
+        """
+        from app.extensions import db
+        from app.models.portfolio import Portfolio
+        from app.services.stock_service import get_ticker_tape_symbols
+
+        held = db.session.query(Portfolio.ticker).filter(
+            Portfolio.total_quantity > 0).distinct()
+        symbols = [row.ticker.upper() for row in held] + \
+            get_ticker_tape_symbols()
+        for source in self._symbol_sources:
+            symbols.extend(source())
+        return list(dict.fromkeys(symbols))
+
+    def poll_once(self):
+        """
+        Poll every tracked symbol once.
+
+        :return: A dict mapping each symbol fetched to its price.
+        """
+        symbols = self.tracked_symbols()
+        fetched = {}
+        failed = False
+
+        for start in range(0, len(symbols), self.batch_size):
+            batch = symbols[start:start + self.batch_size]
+            try:
+                prices = self.provider.get_quotes(batch)
+            except Exception as e:
+                failed = True
+                self.errors += 1
+                self.last_error = str(e)
+                self.app.logger.warning(
+                    f"Market data poll failed for {', '.join(batch)}: {e}")
+                continue
+
+            now = time.time()
+            for symbol, price in prices.items():
+                if price is None:
+                    continue
+                self.cache.set(symbol, price, fetched_at=now)
+                self._last_updated[symbol] = now
+                fetched[symbol] = price
+
+        if self.persist and fetched:
+            from app.services.price_store import record_quote_ticks
+            record_quote_ticks(fetched)
+
+        if fetched:
+            for listener in self._listeners:
+                try:
+                    listener(fetched)
+                except Exception as e:
+                    self.app.logger.warning(f"Quote listener failed: {e}")
+
+        self.polls += 1
+        self.last_poll = time.time()
+        self.consecutive_failures = self.consecutive_failures + 1 if failed else 0
+        return fetched
+
+    def stats(self):
+        now = time.time()
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'batch_size': self.batch_size,
+            'polls': self.polls,
+            'errors': self.errors,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'last_poll_age': now - self.last_poll if self.last_poll else None,
+            'staleness': {
+                symbol: round(now - updated, 3)
+                for symbol, updated in sorted(self._last_updated.items())
+            }
+        }
+
+    def _ensure_started(self):
+        if not self.running and not self._stop.is_set():
+            self.start()
@@ -0,0 +1,352 @@
+# app/services/order_book.py
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from sqlalchemy import text
+
+RestingOrder = namedtuple('RestingOrder', ['order_id', 'user_id', 'ticker',
+                                           'side', 'quantity', 'limit_price'])
+Fill = namedtuple('Fill', ['order', 'price', 'quoted_at'])
+
+# Cancelled entries are dropped lazily; rebuild the heaps once they dominate
+_COMPACT_THRESHOLD = 1024
+
+# Marks the order filled only if it is still open, so an order cancelled (or
+# filled by another process) after it was matched is never executed twice
+_CLAIM_ORDER_SQL = text("""
+    UPDATE orders SET status = 'filled', filled_at = :now,
+                      fill_price = :price, transaction_id = :transaction_id
+    WHERE id = :order_id AND status = 'open'
+    RETURNING id
+""")
+
+_REJECT_ORDER_SQL = text("""
+    UPDATE orders SET status = 'rejected', reject_reason = :reason
+    WHERE id = :order_id AND status = 'open'
+""")
+
+
+class _OrderGone(Exception):
+    pass
+
+
+def resting_order(order):
+    """Build the book entry for an ``Order`` row."""
+    return RestingOrder(order.id, order.user_id, order.ticker.upper(),
+                        order.side, order.quantity, order.limit_price)
+
+
+class OrderBook:
+    """
+    Resting limit orders for one symbol in price-time priority.
+
+    Bids sit in a max-heap and asks in a min-heap keyed on (limit price,
+    arrival sequence). Cancels only drop the order from the live map; the heap
+    entry is discarded when it reaches the top.
+    """
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self._bids = []
+        self._asks = []
+        self._live = {}
+        self._dead = 0
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._live)
+
+    def __contains__(self, order_id):
+        return order_id in self._live
+
+    def add(self, order):
+        if order.order_id in self._live:
+            return
+        if order.side == 'BUY':
+            heapq.heappush(self._bids,
+                           (-order.limit_price, next(self._seq), order))
+        else:
+            heapq.heappush(self._asks,
+                           (order.limit_price, next(self._seq), order))
+        self._live[order.order_id] = order
+
+    def cancel(self, order_id):
+        if self._live.pop(order_id, None) is None:
+            return False
+        self._dead += 1
+        if self._dead > _COMPACT_THRESHOLD and self._dead > len(self._live):
+            self._compact()
+        return True
+
+    def order_ids(self):
+        return list(self._live)
+
+    def best_bid(self):
+        self._prune(self._bids)
+        return -self._bids[0][0] if self._bids else None
+
+    def best_ask(self):
+        self._prune(self._asks)
+        return self._asks[0][0] if self._asks else None
+
+    def match(self, price):
+        """
+        Remove and return every order the price crosses.
+
+        :param price: The latest traded/quoted price.
+        :return: Bids limited at or above ``price`` followed by asks limited
+                 at or below it, each in price-time priority.
+        """
+        matched = []
+        for heap, crosses in ((self._bids, lambda key: -key >= price),
+                              (self._asks, lambda key: key <= price)):
+            while heap and crosses(heap[0][0]):
+                order = heapq.heappop(heap)[2]
+                if self._live.get(order.order_id) is order:
+                    del self._live[order.order_id]
+                    matched.append(order)
+                else:
+                    self._dead -= 1
+        return matched
+
+    def _prune(self, heap):
+        while heap and self._live.get(heap[0][2].order_id) is not heap[0][2]:
+            heapq.heappop(heap)
+            self._dead -= 1
+
+    def _compact(self):
+        self._bids = [entry for entry in self._bids
+                      if self._live.get(entry[2].order_id) is entry[2]]
+        self._asks = [entry for entry in self._asks
+                      if self._live.get(entry[2].order_id) is entry[2]]
+        heapq.heapify(self._bids)
+        heapq.heapify(self._asks)
+        self._dead = 0
+
+
+class MatchingEngine:
+    """
+    Per-symbol order books for this process, matched against quote ticks.
+
+    Ticks arrive from the market data poller. Matching only touches memory;
+    the resulting fills are queued and written ``batch_size`` per database
+    transaction. Open orders are reconciled with the ``orders`` table every
+    ``sync_interval`` seconds, which picks up orders placed or cancelled by
+    other processes and re-queues any whose fill failed to commit.
+    """
+
+    def __init__(self, batch_size=500, sync_interval=5):
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.app = None
+        self._books = {}
+        self._tickers = {}
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._latencies = deque(maxlen=10000)
+        self._synced_at = 0
+        self.submitted = 0
+        self.matched = 0
+        self.filled = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('ORDER_FILL_BATCH_SIZE',
+                                         self.batch_size)
+        self.sync_interval = app.config.get('ORDER_BOOK_SYNC_INTERVAL',
+                                            self.sync_interval)
+        poller = app.extensions.get('market_data_poller')
+        if poller is not None:
+            poller.add_symbol_source(self.symbols)
+            poller.add_listener(self.on_quotes)
+        app.extensions['matching_engine'] = self
+
+    def submit(self, order):
+        """Rest a ``RestingOrder`` on its symbol's book."""
+        with self._lock:
+            book = self._books.get(order.ticker)
+            if book is None:
+                book = self._books[order.ticker] = OrderBook(order.ticker)
+            if order.order_id not in book:
+                book.add(order)
+                self._tickers[order.order_id] = order.ticker
+                self.submitted += 1
+
+    def cancel(self, order_id):
+        """Drop an order from its book; returns False if it was not resting."""
+        with self._lock:
+            ticker = self._tickers.pop(order_id, None)
+            return ticker is not None and self._books[ticker].cancel(order_id)
+
+    def symbols(self):
+        """Symbols with resting orders, so the poller keeps them quoted."""
+        with self._lock:
+            return [symbol for symbol, book in self._books.items() if book]
+
+    def book(self, symbol):
+        return self._books.get(symbol.upper())
+
+    def match(self, prices, quoted_at=None):
+        """
+        Match a batch of ticks against the books and queue the fills.
+
+        :param prices: A dict mapping symbol to its latest price.
+        :param quoted_at: Epoch seconds of the ticks (default: now).
+        :return: The list of ``Fill``s queued.
+        """
+        quoted_at = quoted_at or time.time()
+        started = time.perf_counter()
+        fills = []
+        with self._lock:
+            for symbol, price in prices.items():
+                book = self._books.get(symbol)
+                if not book or price is None:
+                    continue
+                for order in book.match(price):
+                    self._tickers.pop(order.order_id, None)
+                    fills.append(Fill(order, price, quoted_at))
+            self.matched += len(fills)
+        self._pending.extend(fills)
+        self._latencies.append(time.perf_counter() - started)
+        return fills
+
+    def on_quotes(self, prices):
+        """Poller listener: match the ticks, write the fills, then resync."""
+        self.match(prices)
+        self.flush()
+        self.sync()
+
+    def flush(self):
+        """
+        Write every queued fill, ``batch_size`` fills per transaction.
+
+        :return: The number of fills written.
+        """
+        written = 0
+        with self._flush_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popleft())
+                written += self._write(batch)
+        return written
+
+    def sync(self, force=False):
+        """
+        Reconcile the books with the open orders in the database.
+
+        :param force: Sync even if ``sync_interval`` has not elapsed.
+        :return: A (added, removed) tuple.
+        """
+        if not force and time.time() - self._synced_at < self.sync_interval:
+            return 0, 0
+
+        from app.models.order import Order
+
+        with self._flush_lock:
+            open_orders = {
+                order.id: resting_order(order)
+                for order in Order.query.filter_by(status='open')
+            }
+            self._synced_at = time.time()
+
+            added = removed = 0
+            for order_id in set(self._tickers) - set(open_orders):
+                removed += self.cancel(order_id)
+            for order_id, order in open_orders.items():
+                if order_id not in self._tickers:
+                    self.submit(order)
+                    added += 1
+        return added, removed
+
+    def stats(self):
+        with self._lock:
+            resting = sum(len(book) for book in self._books.values())
+            symbols = sum(1 for book in self._books.values() if book)
+        latencies = sorted(self._latencies)
+        return {
+            'resting': resting,
+            'symbols': symbols,
+            'pending_fills': len(self._pending),
+            'submitted': self.submitted,
+            'matched': self.matched,
+            'filled': self.filled,
+            'rejected': self.rejected,
+            'skipped': self.skipped,
+            'batches': self.batches,
+            'errors': self.errors,
+            'match_latency_ms': {
+                name: round(percentile(latencies, q) * 1000, 3)
+                for name, q in (('p50', 50), ('p95', 95), ('p99', 99))
+            } if latencies else None
+        }
+
+    def _write(self, batch):
+        from app.extensions import db, quote_broadcaster
+        from app.services.positions import TradeRejected, execute_trade
+
+        now = datetime.utcnow()
+        filled = rejected = skipped = 0
+        traders = set()
+        try:
+            for fill in batch:
+                order = fill.order
+                try:
+                    with db.session.begin_nested():
+                        transaction = execute_trade(
+                            order.user_id, order.ticker, order.side,
+                            order.quantity, fill.price, commit=False,
+                            quote_timestamp=datetime.utcfromtimestamp(
+                                fill.quoted_at))
+                        db.session.flush()
+                        claimed = db.session.execute(_CLAIM_ORDER_SQL, {
+                            'order_id': order.order_id,
+                            'now': now,
+                            'price': fill.price,
+                            'transaction_id': transaction.id
+                        }).first()
+                        if claimed is None:
+                            raise _OrderGone()
+                    filled += 1
+                    traders.add(order.user_id)
+                except _OrderGone:
+                    skipped += 1
+                except TradeRejected as e:
+                    db.session.execute(_REJECT_ORDER_SQL, {
+                        'order_id': order.order_id, 'reason': e.message})
+                    rejected += 1
+            db.session.commit()
+        except Exception as e:
+            # The orders are still open in the database; the next sync
+            # puts them back on the books
+            db.session.rollback()
+            self.errors += 1
+            self._synced_at = 0
+            print(f"Error writing {len(batch)} order fills: {e}")
+            return 0
+
+        quote_broadcaster.publish_positions(traders)
+        self.filled += filled
+        self.rejected += rejected
+        self.skipped += skipped
+        self.batches += 1
+        return filled
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1,
+                      math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
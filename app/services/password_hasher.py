@@ -0,0 +1,273 @@
+# app/services/password_hasher.py
+import json
+import select
+import subprocess
+import sys
+import threading
+import time
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherSaturated(Exception):
+    pass
+
+
+class HasherUnavailable(Exception):
+    pass
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method,
+                                  salt_length=salt_length)
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+# The worker program. It is passed to the interpreter with -c, so a worker
+# imports werkzeug and nothing else: not the app, and not the parent's main
+# script, which multiprocessing's spawn method would re-run in every child.
+# Requests and replies are JSON lines on stdin and stdout.
+_WORKER = """
+import json, sys
+from werkzeug.security import check_password_hash, generate_password_hash
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method,
+                                  salt_length=salt_length)
+
+calls = {'_hash': _hash, '_verify': check_password_hash}
+for line in sys.stdin.buffer:
+    name, args = json.loads(line)
+    try:
+        reply = [True, calls[name](*args)]
+    except Exception as e:
+        reply = [False, f'{type(e).__name__}: {e}']
+    sys.stdout.write(json.dumps(reply) + '\\n')
+    sys.stdout.flush()
+"""
+
+
+class _WorkerDied(Exception):
+    pass
+
+
+class _Worker:
+    """One hashing process; serves a single call at a time."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', _WORKER],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def call(self, name, args, timeout):
+        """
+        Run ``name(*args)`` in the worker.
+
+        :raises _WorkerDied: If the process exited before replying.
+        :raises TimeoutError: If no reply came within ``timeout`` seconds.
+        :raises ValueError: If the call itself failed in the worker.
+        """
+        try:
+            self.process.stdin.write(json.dumps([name, args]).encode() + b'\n')
+            self.process.stdin.flush()
+        except OSError as e:
+            raise _WorkerDied(str(e))
+        ready, _, _ = select.select([self.process.stdout], [], [],
+                                    max(timeout, 0))
+        if not ready:
+            raise TimeoutError(name)
+        line = self.process.stdout.readline()
+        if not line:
+            raise _WorkerDied(f'exited with {self.process.wait()}')
+        ok, value = json.loads(line)
+        if not ok:
+            raise ValueError(value)
+        return value
+
+    def close(self):
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification in a bounded pool of processes.
+
+    Key stretching is deliberately CPU heavy; doing it in request workers
+    lets a login burst starve every other endpoint. Here at most
+    ``max_workers`` hashes run at once per app process and at most
+    ``max_queue`` more may wait; beyond that calls raise ``HasherSaturated``
+    so the caller can answer 429. Workers start on first use. One that dies
+    is replaced and the call retried once; if the replacement fails too the
+    call raises ``HasherUnavailable``. Until ``init_app`` (or with
+    ``inline=True``) hashing runs in the calling thread.
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', salt_length=16,
+                 max_workers=2, max_queue=64, timeout=10.0, inline=True):
+        self.method = method
+        self.inline = inline
+        self.salt_length = salt_length
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._idle = []
+        self._started = 0
+        self._stored_method = None
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.replaced = 0
+
+    def init_app(self, app):
+        self.inline = False
+        self._stored_method = None
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.salt_length = app.config.get(
+            'PASSWORD_SALT_LENGTH', self.salt_length)
+        self.max_workers = app.config.get(
+            'PASSWORD_HASH_WORKERS') or self.max_workers
+        self.max_queue = app.config.get('PASSWORD_HASH_MAX_QUEUE', self.max_queue)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(
+            self.max_workers + self.max_queue)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        """Hash a password with the configured method."""
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        """Check a password against a stored hash."""
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if a stored hash was made with other parameters than configured."""
+        return pwhash.split('$', 1)[0] != self.stored_method
+
+    @property
+    def stored_method(self):
+        """
+        The configured method as werkzeug writes it into hashes, with every
+        default filled in (e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000').
+        """
+        if self._stored_method is None:
+            # Costs one hash, once per process
+            self._stored_method = _hash('', self.method, 1).split('$', 1)[0]
+        return self._stored_method
+
+    def shutdown(self):
+        """Stop the idle workers."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.close()
+
+    def stats(self):
+        return {
+            'method': self.method.split(':', 1)[0],
+            'workers': self.max_workers,
+            'started': self._started,
+            'max_queue': self.max_queue,
+            'active': self.active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'rehashed': self.rehashed,
+            'replaced': self.replaced
+        }
+
+    def _run(self, fn, *args):
+        if self.inline:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherSaturated('Too many concurrent password checks')
+        with self._lock:
+            self.active += 1
+        try:
+            return self._call(fn.__name__, args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def _call(self, name, args):
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(2):
+            worker = self._checkout(deadline)
+            try:
+                result = worker.call(name, args, deadline - time.monotonic())
+            except _WorkerDied as e:
+                self._discard(worker, replaced=True)
+                print(f"Password hash worker died ({e}); "
+                      f"{'retrying' if attempt == 0 else 'giving up'}")
+                continue
+            except TimeoutError:
+                # The hash may still be running; drop the worker with it
+                self._discard(worker)
+                raise HasherSaturated('Password check timed out')
+            except ValueError:
+                self._checkin(worker)
+                raise
+            except BaseException:
+                self._discard(worker)
+                raise
+            self._checkin(worker)
+            return result
+        raise HasherUnavailable('Password hashing workers keep exiting')
+
+    def _checkout(self, deadline):
+        with self._available:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    # Died while idle; replace it without spending a retry
+                    self._started -= 1
+                    self.replaced += 1
+                    worker.close()
+                if self._started < self.max_workers:
+                    self._started += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise HasherSaturated('Password check timed out')
+                self._available.wait(remaining)
+        try:
+            return _Worker()
+        except OSError as e:
+            self._discard(None)
+            raise HasherUnavailable(f'Could not start a hash worker: {e}')
+
+    def _checkin(self, worker):
+        with self._available:
+            self._idle.append(worker)
+            self._available.notify()
+
+    def _discard(self, worker, replaced=False):
+        if worker is not None:
+            worker.close()
+        with self._available:
+            self._started -= 1
+            if replaced:
+                self.replaced += 1
+            self._available.notify()
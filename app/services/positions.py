@@ -0,0 +1,432 @@
+# app/services/positions.py
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.extensions import db, quote_broadcaster
+from app.models.portfolio import Portfolio
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.utils.timescale import TRANSACTIONS_ARCHIVE, relation_exists
+
+POSITION_FIELDS = ['total_quantity', 'average_price', 'cost_basis',
+                   'realized_pnl', 'realized_cost_basis']
+
+# Fills per (user, ticker) in replay order; ledger_positions folds them
+_LEDGER_FILLS_SQL = """
+SELECT user_id, ticker, quantity, transaction_type, price
+FROM {source}
+{where}
+ORDER BY user_id, ticker, timestamp, id
+"""
+
+LedgerPosition = namedtuple('LedgerPosition',
+                            ['user_id', 'ticker'] + POSITION_FIELDS)
+
+REBUILD_BATCH_SIZE = 5000
+
+_UPSERT_POSITION_SQL = text("""
+    INSERT INTO portfolio_view (user_id, ticker, total_quantity,
+                                average_price, cost_basis, realized_pnl,
+                                realized_cost_basis, updated_at)
+    VALUES (:user_id, :ticker, :total_quantity, :average_price, :cost_basis,
+            :realized_pnl, :realized_cost_basis, :now)
+    ON CONFLICT (user_id, ticker) DO UPDATE SET
+        total_quantity = excluded.total_quantity,
+        average_price = excluded.average_price,
+        cost_basis = excluded.cost_basis,
+        realized_pnl = excluded.realized_pnl,
+        realized_cost_basis = excluded.realized_cost_basis,
+        updated_at = excluded.updated_at
+""")
+
+
+class TradeRejected(Exception):
+    """A trade that cannot be applied (unknown user, no funds, no shares)."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+# Each statement below checks and updates a single row atomically, so
+# concurrent trades for the same user serialize on that row's lock instead of
+# racing a read-modify-write in Python. Both sides touch users before
+# portfolio_view, so a buy and a sell never wait on each other's locks.
+
+_DEBIT_CASH_SQL = text("""
+    UPDATE users SET cash_balance = cash_balance - :amount
+    WHERE id = :user_id AND cash_balance >= :amount
+    RETURNING cash_balance
+""")
+
+_CREDIT_CASH_SQL = text("""
+    UPDATE users SET cash_balance = cash_balance + :amount
+    WHERE id = :user_id
+    RETURNING cash_balance
+""")
+
+_ADD_TO_POSITION_SQL = text("""
+    INSERT INTO portfolio_view (user_id, ticker, total_quantity, average_price,
+                                cost_basis, realized_pnl, realized_cost_basis,
+                                updated_at)
+    VALUES (:user_id, :ticker, :quantity, :price, :quantity * :price, 0, 0, :now)
+    ON CONFLICT (user_id, ticker) DO UPDATE SET
+        total_quantity = portfolio_view.total_quantity + excluded.total_quantity,
+        cost_basis = portfolio_view.cost_basis + excluded.cost_basis,
+        average_price = (portfolio_view.cost_basis + excluded.cost_basis)
+            / (portfolio_view.total_quantity + excluded.total_quantity),
+        updated_at = excluded.updated_at
+    RETURNING total_quantity, average_price
+""")
+
+# The average price is unchanged on selling; the difference is realized.
+# Squared off positions are kept so their realized P&L stays visible.
+_REDUCE_POSITION_SQL = text("""
+    UPDATE portfolio_view SET
+        total_quantity = total_quantity - :quantity,
+        cost_basis = (total_quantity - :quantity) * average_price,
+        realized_pnl = realized_pnl + :quantity * (:price - average_price),
+        realized_cost_basis = realized_cost_basis + :quantity * average_price,
+        updated_at = :now
+    WHERE user_id = :user_id AND ticker = :ticker AND total_quantity >= :quantity
+    RETURNING total_quantity, average_price
+""")
+
+
+def execute_trade(user_id, ticker, side, quantity, price, commit=True,
+                  quote_timestamp=None):
+    """
+    Record a fill and apply it to the user's cash and materialized position.
+
+    A buy is a conditional cash debit plus a position upsert; a sell is a
+    cash credit plus a conditional position decrement. Either way the user's
+    row is locked first, the trade costs a fixed three statements and stays
+    correct under concurrency.
+
+    :param user_id: The trading user.
+    :param ticker: Ticker symbol (upper-cased here).
+    :param side: "BUY" or "SELL".
+    :param quantity: Number of shares filled.
+    :param price: Fill price.
+    :param commit: Commit the transaction; pass False to batch several trades
+                   in one transaction owned by the caller.
+    :param quote_timestamp: Time of the quote a server-priced fill used.
+    :return: The new ``Transaction``.
+    :raises TradeRejected: If funds or shares are insufficient; the session is
+                           rolled back when ``commit`` is set, otherwise the
+                           caller must roll back (or use a savepoint).
+    """
+    ticker = ticker.upper()
+    params = {
+        'user_id': user_id,
+        'ticker': ticker,
+        'quantity': quantity,
+        'price': price,
+        'amount': quantity * price,
+        'now': datetime.utcnow()
+    }
+
+    try:
+        if side == 'BUY':
+            if db.session.execute(_DEBIT_CASH_SQL, params).first() is None:
+                raise _rejection(user_id, 'Insufficient funds')
+            db.session.execute(_ADD_TO_POSITION_SQL, params)
+        elif side == 'SELL':
+            # The credit is undone by the rollback if the decrement fails
+            if db.session.execute(_CREDIT_CASH_SQL, params).first() is None:
+                raise TradeRejected('User not found', status_code=404)
+            if db.session.execute(_REDUCE_POSITION_SQL, params).first() is None:
+                raise TradeRejected('Insufficient stock quantity to sell')
+        else:
+            raise TradeRejected(f"Unknown transaction type: {side}")
+
+        transaction = Transaction(
+            user_id=user_id,
+            ticker=ticker,
+            quantity=quantity,
+            transaction_type=side,
+            price=price,
+            quote_timestamp=quote_timestamp
+        )
+        db.session.add(transaction)
+
+        if commit:
+            db.session.commit()
+            quote_broadcaster.publish_positions([user_id])
+        return transaction
+
+    except TradeRejected:
+        if commit:
+            db.session.rollback()
+        raise
+
+
+def _rejection(user_id, message):
+    # Only reached on the failure path, so the extra lookup is rare
+    if db.session.get(User, user_id) is None:
+        return TradeRejected('User not found', status_code=404)
+    return TradeRejected(message)
+
+
+def execute_batch(user_id, orders, atomic=True, rejected=None):
+    """
+    Apply a list of orders for one user in a single database transaction.
+
+    The user's cash and the affected positions are loaded in one query each
+    and the batch is checked against them up front, so an atomic batch that
+    cannot fill is rejected before anything is written. Orders are then
+    applied in submission order with one commit at the end, so a sell can
+    fund a later buy. Every order locks the user's row first, so concurrent
+    batches for the same user run one after the other.
+
+    :param user_id: The trading user.
+    :param orders: Validated dicts with 'ticker', 'side', 'quantity', 'price'
+                   and optionally 'quote_timestamp'.
+    :param atomic: All-or-nothing when True; otherwise each order runs in its
+                   own savepoint and rejected orders are skipped.
+    :param rejected: Optional {index: error} of orders the caller already
+                     refused (e.g. unpriceable ones); they are not applied.
+    :return: A (committed, results) tuple; results hold one dict per order
+             with 'status' of 'filled', 'rejected' or 'cancelled'.
+    :raises TradeRejected: If the user does not exist.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise TradeRejected('User not found', status_code=404)
+
+    tickers = {order['ticker'].upper() for order in orders}
+    held = {
+        position.ticker: position.total_quantity
+        for position in Portfolio.query.filter(
+            Portfolio.user_id == user_id, Portfolio.ticker.in_(tickers))
+    }
+
+    # Replay the batch against the loaded state to find orders that cannot fill
+    cash = user.cash_balance
+    errors = dict(rejected or {})
+    for index, order in enumerate(orders):
+        if index in errors:
+            continue
+        ticker = order['ticker'].upper()
+        amount = order['quantity'] * order['price']
+        if order['side'] == 'BUY':
+            if amount > cash:
+                errors[index] = 'Insufficient funds'
+                continue
+            cash -= amount
+            held[ticker] = held.get(ticker, 0) + order['quantity']
+        else:
+            if order['quantity'] > held.get(ticker, 0):
+                errors[index] = 'Insufficient stock quantity to sell'
+                continue
+            cash += amount
+            held[ticker] -= order['quantity']
+
+    if atomic and errors:
+        db.session.rollback()
+        return False, _batch_results(orders, errors, {}, 'cancelled')
+
+    filled = {}
+    try:
+        for index, order in enumerate(orders):
+            if index in errors:
+                continue
+            try:
+                if atomic:
+                    filled[index] = _execute_order(user_id, order)
+                else:
+                    with db.session.begin_nested():
+                        filled[index] = _execute_order(user_id, order)
+            except TradeRejected as e:
+                # The row changed under us since the up-front check
+                if atomic:
+                    db.session.rollback()
+                    errors[index] = e.message
+                    return False, _batch_results(orders, errors, {},
+                                                 'cancelled')
+                errors[index] = e.message
+
+        # Flush so ids and timestamps can be reported without reloading
+        db.session.flush()
+        results = _batch_results(orders, errors, filled, 'rejected')
+        db.session.commit()
+        if filled:
+            quote_broadcaster.publish_positions([user_id])
+        return True, results
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _execute_order(user_id, order):
+    return execute_trade(user_id, order['ticker'], order['side'],
+                         order['quantity'], order['price'], commit=False,
+                         quote_timestamp=order.get('quote_timestamp'))
+
+
+def _batch_results(orders, errors, filled, unfilled_status):
+    results = []
+    for index in range(len(orders)):
+        if index in filled:
+            results.append({'index': index, 'status': 'filled',
+                            'transaction': filled[index].to_dict()})
+        elif index in errors:
+            results.append({'index': index, 'status': 'rejected',
+                            'error': errors[index]})
+        else:
+            results.append({'index': index, 'status': unfilled_status})
+    return results
+
+
+def ledger_source():
+    """
+    FROM clause for the full ledger. Fills moved out by `flask transactions
+    archive` are still part of it, so they are read along with the live table.
+    """
+    if relation_exists(TRANSACTIONS_ARCHIVE):
+        return (f"(SELECT * FROM transactions UNION ALL "
+                f"SELECT * FROM {TRANSACTIONS_ARCHIVE}) AS transactions")
+    return 'transactions'
+
+
+def iter_ledger_positions(user_id=None):
+    """
+    Compute positions straight from the transactions ledger.
+
+    Fills are streamed in (user, ticker, fill) order and folded with the
+    average-cost method in one pass: buys add to the cost basis, sells
+    release it at the running average and realize the difference.
+
+    :param user_id: Optional user to restrict the computation to.
+    :return: A generator of ``LedgerPosition`` tuples, one per (user, ticker).
+    """
+    where = 'WHERE user_id = :user_id' if user_id is not None else ''
+    rows = db.session.execute(
+        text(_LEDGER_FILLS_SQL.format(source=ledger_source(), where=where)),
+        {'user_id': user_id},
+        execution_options={'stream_results': True}
+    )
+
+    key = None
+    for row in rows:
+        buy = row.transaction_type == 'BUY'
+        if (row.user_id, row.ticker) != key:
+            if key is not None:
+                yield LedgerPosition(*key, quantity, average, cost,
+                                     realized, realized_cost)
+            key = (row.user_id, row.ticker)
+            quantity = row.quantity if buy else -row.quantity
+            average = float(row.price)
+            cost = float(row.quantity * row.price) if buy else 0.0
+            realized = realized_cost = 0.0
+        elif buy:
+            cost += row.quantity * row.price
+            quantity += row.quantity
+            average = cost / quantity if quantity else average
+        else:
+            realized += row.quantity * (row.price - average)
+            realized_cost += row.quantity * average
+            quantity -= row.quantity
+            cost = quantity * average
+    if key is not None:
+        yield LedgerPosition(*key, quantity, average, cost, realized,
+                             realized_cost)
+
+
+def ledger_positions(user_id=None):
+    """
+    Compute positions straight from the transactions ledger.
+
+    :param user_id: Optional user to restrict the computation to.
+    :return: A list of ``LedgerPosition`` tuples (see iter_ledger_positions).
+    """
+    return list(iter_ledger_positions(user_id))
+
+
+def rebuild_positions(user_id=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Rebuild materialized positions from the ledger, upserting them in
+    batches as the replay produces them, and drop positions that have no
+    fills at all.
+
+    :param user_id: Optional user to restrict the rebuild to (default: all).
+    :param batch_size: Positions sent per upsert.
+    :return: A tuple (upserted, deleted) of row counts.
+    """
+    now = datetime.utcnow()
+
+    upserted = 0
+    batch = []
+    for position in iter_ledger_positions(user_id):
+        batch.append(dict(position._asdict(), now=now))
+        if len(batch) >= batch_size:
+            db.session.execute(_UPSERT_POSITION_SQL, batch)
+            upserted += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(_UPSERT_POSITION_SQL, batch)
+        upserted += len(batch)
+
+    user_filter = 'AND portfolio_view.user_id = :user_id' \
+        if user_id is not None else ''
+    archived = ''
+    if relation_exists(TRANSACTIONS_ARCHIVE):
+        archived = f"""
+          AND NOT EXISTS (
+            SELECT 1 FROM {TRANSACTIONS_ARCHIVE} a
+            WHERE a.user_id = portfolio_view.user_id
+              AND a.ticker = portfolio_view.ticker
+          )"""
+    deleted = db.session.execute(text(f"""
+        DELETE FROM portfolio_view
+        WHERE NOT EXISTS (
+            SELECT 1 FROM transactions t
+            WHERE t.user_id = portfolio_view.user_id
+              AND t.ticker = portfolio_view.ticker
+        ) {archived} {user_filter}
+    """), {'user_id': user_id}).rowcount
+
+    db.session.commit()
+    return upserted, deleted
+
+
+def verify_positions(user_id=None, tolerance=1e-6):
+    """
+    Diff the materialized positions against the ledger.
+
+    :param user_id: Optional user to restrict the check to (default: all).
+    :param tolerance: Absolute tolerance for monetary fields.
+    :return: A list of {'user_id', 'ticker', 'field', 'ledger',
+             'materialized'} differences; empty when they agree.
+    """
+    expected = {
+        (row.user_id, row.ticker): row for row in ledger_positions(user_id)
+    }
+    query = Portfolio.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    actual = {(row.user_id, row.ticker): row for row in query}
+
+    diffs = []
+    for key in sorted(set(expected) | set(actual)):
+        ledger, materialized = expected.get(key), actual.get(key)
+        if ledger is None or materialized is None:
+            diffs.append({
+                'user_id': key[0], 'ticker': key[1], 'field': 'row',
+                'ledger': ledger is not None,
+                'materialized': materialized is not None
+            })
+            continue
+        for field in POSITION_FIELDS:
+            want = getattr(ledger, field)
+            have = getattr(materialized, field)
+            if abs((want or 0) - (have or 0)) > tolerance:
+                diffs.append({
+                    'user_id': key[0], 'ticker': key[1], 'field': field,
+                    'ledger': want, 'materialized': have
+                })
+    return diffs
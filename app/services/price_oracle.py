@@ -0,0 +1,69 @@
+# app/services/price_oracle.py
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import quote_cache
+from app.services.positions import TradeRejected
+
+
+def get_execution_quote(ticker, max_age=None):
+    """
+    Return a quote fresh enough to trade at.
+
+    A cached quote quoted more than ``max_age`` seconds ago is dropped and
+    fetched again once; if the provider still cannot supply a fresh price, or
+    fails, the trade is refused.
+
+    :param ticker: Ticker symbol.
+    :param max_age: Maximum quote age in seconds (default: TRADE_QUOTE_MAX_AGE).
+    :return: A ``Quote``.
+    :raises TradeRejected: With status 503 when no fresh quote is available.
+    """
+    if max_age is None:
+        max_age = current_app.config['TRADE_QUOTE_MAX_AGE']
+
+    try:
+        quote = quote_cache.get_quote(ticker)
+        if quote is None or time.time() - quote.quoted_at > max_age:
+            quote_cache.invalidate(ticker)
+            quote = quote_cache.get_quote(ticker)
+    except Exception as e:
+        print(f"Error fetching execution quote for {ticker}: {e}")
+        quote = None
+
+    if quote is None or time.time() - quote.quoted_at > max_age:
+        raise TradeRejected(f"No fresh quote available for {ticker.upper()}",
+                            status_code=503)
+    return quote
+
+
+def execution_price(ticker, side, limit_price=None, max_age=None):
+    """
+    Resolve the price a market order executes at.
+
+    :param ticker: Ticker symbol.
+    :param side: "BUY" or "SELL".
+    :param limit_price: Optional guard; a buy never fills above it and a sell
+                        never fills below it.
+    :param max_age: Maximum quote age in seconds (default: TRADE_QUOTE_MAX_AGE).
+    :return: A (price, quote_timestamp) tuple, the timestamp a naive UTC
+             datetime like ``Transaction.timestamp``.
+    :raises TradeRejected: If no fresh quote exists or the limit is crossed.
+    """
+    quote = get_execution_quote(ticker, max_age)
+    check_limit(side, quote.price, limit_price)
+    return quote.price, datetime.utcfromtimestamp(quote.quoted_at)
+
+
+def check_limit(side, price, limit_price):
+    """Refuse a fill at ``price`` that is worse than ``limit_price``."""
+    if limit_price is None:
+        return
+    if side == 'BUY' and price > limit_price:
+        raise TradeRejected(
+            f"Market price {price} is above the limit price {limit_price}")
+    if side == 'SELL' and price < limit_price:
+        raise TradeRejected(
+            f"Market price {price} is below the limit price {limit_price}")
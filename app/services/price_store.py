@@ -0,0 +1,400 @@
+# app/services/price_store.py
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, text
+
+from app.extensions import db
+from app.models.price_bar import PriceBar
+from app.utils.timescale import has_timescaledb, refresh_price_bar_aggregates, \
+    relation_exists
+from app.utils.upsert import replace, upsert
+
+# Continuous aggregate backing each interval coarser than the raw bars
+AGGREGATE_VIEWS = {
+    '1h': 'price_bars_1h',
+    '1d': 'price_bars_1d',
+}
+
+# pandas resampling rule used when the aggregates are not available
+RESAMPLE_RULES = {
+    '1h': '60min',
+    '1d': 'D',
+}
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+UPSERT_BATCH_SIZE = 5000
+
+# Stored bars may start or end this far inside a window (weekends, holidays)
+# and still count as covering it
+_COVERAGE_TOLERANCE = timedelta(days=4)
+
+# A window backfilled this recently is not requested again, even if upstream
+# returned nothing for it (unlisted symbols, history starting later); a
+# failed download is retried after the shorter backoff
+BACKFILL_RETRY_INTERVAL = 3600
+BACKFILL_FAILURE_BACKOFF = 60
+_backfilled = {}
+_backfilled_lock = threading.Lock()
+
+# One lock per symbol, held while backfilling it, so concurrent lookups over
+# overlapping windows (e.g. one request's value series and price history)
+# download bars once while unrelated symbols backfill in parallel
+_backfill_locks = {}
+
+
+def upsert_price_bars(bars, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Insert or update OHLCV bars in bulk.
+
+    Bars should be ingested at a single resolution per symbol (e.g. all 1m or
+    all 1d) so the rolled-up aggregates stay meaningful.
+
+    :param bars: An iterable of dicts with symbol, timestamp, open, high, low,
+                 close and volume keys.
+    :param batch_size: Number of rows sent per INSERT statement.
+    :return: The number of bars written.
+    """
+    table = PriceBar.__table__
+    merge = {column: replace for column in BAR_COLUMNS}
+
+    written = 0
+    batch = []
+    for bar in bars:
+        batch.append(bar)
+        if len(batch) >= batch_size:
+            upsert(table, batch, ['symbol', 'timestamp'], merge)
+            written += len(batch)
+            batch = []
+    if batch:
+        upsert(table, batch, ['symbol', 'timestamp'], merge)
+        written += len(batch)
+
+    db.session.commit()
+    return written
+
+
+def record_quote_ticks(prices, at=None):
+    """
+    Fold the latest quotes into the current one-minute bar of each symbol.
+
+    The first tick of a minute opens the bar; later ticks extend its high and
+    low and replace its close.
+
+    :param prices: A dict mapping symbol to its latest price.
+    :param at: Time of the quotes (defaults to now, UTC).
+    :return: The number of bars written.
+    """
+    minute = (at or datetime.utcnow()).replace(second=0, microsecond=0)
+    rows = [
+        {'symbol': symbol, 'timestamp': minute, 'open': price, 'high': price,
+         'low': price, 'close': price, 'volume': 0}
+        for symbol, price in prices.items() if price is not None
+    ]
+    if not rows:
+        return 0
+
+    # Two-argument max()/min() are scalar functions on SQLite
+    if db.engine.dialect.name == 'sqlite':
+        greatest, least = func.max, func.min
+    else:
+        greatest, least = func.greatest, func.least
+
+    upsert(PriceBar.__table__, rows, ['symbol', 'timestamp'],
+           {'high': greatest, 'low': least, 'close': replace})
+    db.session.commit()
+    return len(rows)
+
+
+def get_latest_closes(symbols):
+    """
+    Latest stored close for each symbol.
+
+    :param symbols: A list of stock ticker symbols.
+    :return: A dict mapping each symbol with stored bars to (close, timestamp).
+    """
+    latest = db.session.query(
+        PriceBar.symbol, func.max(PriceBar.timestamp).label('timestamp')
+    ).filter(PriceBar.symbol.in_(symbols)).group_by(PriceBar.symbol).subquery()
+
+    rows = db.session.query(
+        PriceBar.symbol, PriceBar.close, PriceBar.timestamp
+    ).join(
+        latest,
+        (PriceBar.symbol == latest.c.symbol) &
+        (PriceBar.timestamp == latest.c.timestamp)
+    ).all()
+    return {row.symbol: (row.close, row.timestamp) for row in rows}
+
+
+def get_price_bars(symbol, start, end, interval='1d'):
+    """
+    Read OHLCV bars for a symbol from the store.
+
+    Hourly and daily bars come from the TimescaleDB continuous aggregates.
+    On databases without them (plain Postgres, SQLite) the raw bars are
+    resampled in memory instead.
+
+    :param symbol: The stock ticker symbol.
+    :param start: Start of the range (inclusive).
+    :param end: End of the range (exclusive).
+    :param interval: One of "1m" (raw bars), "1h" or "1d".
+    :return: A list of bar dictionaries in chronological order.
+    """
+    symbol = symbol.upper()
+    if interval != '1m' and interval not in AGGREGATE_VIEWS:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    if interval == '1m':
+        bars = PriceBar.query.filter(
+            PriceBar.symbol == symbol,
+            PriceBar.timestamp >= start,
+            PriceBar.timestamp < end
+        ).order_by(PriceBar.timestamp).all()
+        return [bar.to_dict() for bar in bars]
+
+    view = AGGREGATE_VIEWS[interval]
+    if has_timescaledb() and relation_exists(view):
+        rows = db.session.execute(text(f"""
+            SELECT bucket, open, high, low, close, volume
+            FROM {view}
+            WHERE symbol = :symbol AND bucket >= :start AND bucket < :end
+            ORDER BY bucket
+        """), {'symbol': symbol, 'start': start, 'end': end})
+        return [
+            {
+                'timestamp': row.bucket.isoformat(),
+                'open': row.open,
+                'high': row.high,
+                'low': row.low,
+                'close': row.close,
+                'volume': row.volume
+            }
+            for row in rows
+        ]
+
+    frame = _resample(_raw_frame([symbol], start, end), interval)
+    if frame.empty:
+        return []
+    return [
+        dict(timestamp=bucket.isoformat(),
+             **{column: row[column] for column in BAR_COLUMNS})
+        for (_, bucket), row in frame.iterrows()
+    ]
+
+
+def get_daily_closes(tickers, start, end):
+    """
+    Daily closing prices for several tickers from the store, backfilling
+    tickers whose stored bars do not cover the window from the market-data
+    provider in one call.
+
+    :param tickers: A list of stock ticker symbols.
+    :param start: First date of the window (inclusive).
+    :param end: Last date of the window (inclusive).
+    :return: A DataFrame of closes indexed by date with one column per ticker.
+    """
+    import pandas as pd
+
+    tickers = [ticker.upper() for ticker in tickers]
+    if not tickers:
+        return pd.DataFrame()
+
+    start = pd.Timestamp(start).normalize().to_pydatetime()
+    end = (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_pydatetime()
+
+    stale = _stale_tickers(tickers, start, end)
+    if stale:
+        with _backfill_locks_held(stale):
+            # Re-check: a concurrent lookup may have just backfilled them
+            stale = _stale_tickers(stale, start, end)
+            if stale:
+                try:
+                    backfill_price_bars(stale, start, end, interval='1d')
+                except Exception as e:
+                    db.session.rollback()
+                    _record_backfill(stale, start, end,
+                                     BACKFILL_FAILURE_BACKOFF)
+                    print(f"Error backfilling price bars for "
+                          f"{', '.join(stale)}: {e}")
+                else:
+                    _record_backfill(stale, start, end,
+                                     BACKFILL_RETRY_INTERVAL)
+
+    closes = _daily_close_frame(tickers, start, end)
+    if closes.empty:
+        return closes
+    return closes.pivot(index='bucket', columns='symbol', values='close')
+
+
+def backfill_price_bars(tickers, start, end, interval='1d'):
+    """
+    Download bars for several tickers in one provider call and store them.
+
+    On TimescaleDB the continuous aggregates are refreshed over the days the
+    new bars cover: their refresh policies only reach back a few weeks, so
+    older history would otherwise never show up in hourly or daily reads.
+
+    :param tickers: A list of stock ticker symbols.
+    :param start: Start of the range.
+    :param end: End of the range.
+    :param interval: Bar size understood by yfinance (e.g. "1m", "1d").
+    :return: The number of bars written.
+    """
+    import pandas as pd
+    import yfinance as yf
+
+    tickers = list(tickers)
+    data = yf.download(tickers, start=pd.Timestamp(start), end=pd.Timestamp(end),
+                       interval=interval, threads=True, group_by='ticker',
+                       progress=False)
+    if data.empty:
+        return 0
+
+    bars = []
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in set(data.columns.get_level_values(0)):
+                continue
+            frame = data[ticker]
+        else:
+            frame = data
+        frame = frame.dropna(subset=['Close'])
+        if frame.index.tz is not None:
+            frame = frame.tz_convert(None)
+        for timestamp, row in frame.iterrows():
+            bars.append({
+                'symbol': ticker,
+                'timestamp': timestamp.to_pydatetime(),
+                'open': float(row['Open']),
+                'high': float(row['High']),
+                'low': float(row['Low']),
+                'close': float(row['Close']),
+                'volume': int(row['Volume']) if pd.notna(row['Volume']) else 0
+            })
+
+    written = upsert_price_bars(bars)
+    if written and has_timescaledb() and relation_exists(AGGREGATE_VIEWS['1d']):
+        # Whole days, so the daily buckets the bars fall in are recomputed
+        timestamps = [bar['timestamp'] for bar in bars]
+        first = min(timestamps).replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+        last = max(timestamps).replace(hour=0, minute=0, second=0,
+                                       microsecond=0)
+        refresh_price_bar_aggregates(start=first, end=last + timedelta(days=1))
+    return written
+
+
+def _stale_tickers(tickers, start, end):
+    # A ticker is stale when its bars in the window start later than a long
+    # weekend after the window start or end earlier than one before its end,
+    # unless that window was already backfilled recently
+    coverage = {
+        row.symbol: (row.earliest, row.latest)
+        for row in db.session.query(
+            PriceBar.symbol,
+            func.min(PriceBar.timestamp).label('earliest'),
+            func.max(PriceBar.timestamp).label('latest')
+        ).filter(
+            PriceBar.symbol.in_(tickers),
+            PriceBar.timestamp >= start,
+            PriceBar.timestamp < end
+        ).group_by(PriceBar.symbol)
+    }
+
+    head = start + _COVERAGE_TOLERANCE
+    horizon = min(end, datetime.utcnow()) - _COVERAGE_TOLERANCE
+    stale = []
+    for ticker in tickers:
+        earliest, latest = coverage.get(ticker, (None, None))
+        if earliest is not None and earliest <= head and latest >= horizon:
+            continue
+        if not _recently_backfilled(ticker, start, end):
+            stale.append(ticker)
+    return stale
+
+
+@contextmanager
+def _backfill_locks_held(tickers):
+    # Acquired in sorted order so lookups over overlapping sets cannot deadlock
+    with _backfilled_lock:
+        locks = [_backfill_locks.setdefault(ticker, threading.Lock())
+                 for ticker in sorted(set(tickers))]
+    for lock in locks:
+        lock.acquire()
+    try:
+        yield
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+
+def _record_backfill(tickers, start, end, retry_after):
+    retry_at = time.monotonic() + retry_after
+    with _backfilled_lock:
+        for ticker in tickers:
+            _backfilled[ticker] = (start, end, retry_at)
+
+
+def _recently_backfilled(ticker, start, end):
+    with _backfilled_lock:
+        attempt = _backfilled.get(ticker)
+    if attempt is None:
+        return False
+    attempted_start, attempted_end, retry_at = attempt
+    return (attempted_start <= start and attempted_end >= end and
+            time.monotonic() < retry_at)
+
+
+def _daily_close_frame(tickers, start, end):
+    import pandas as pd
+
+    if has_timescaledb() and relation_exists('price_bars_1d'):
+        rows = db.session.execute(text("""
+            SELECT symbol, bucket, close
+            FROM price_bars_1d
+            WHERE symbol IN :symbols AND bucket >= :start AND bucket < :end
+        """).bindparams(bindparam('symbols', expanding=True)),
+            {'symbols': tickers, 'start': start, 'end': end})
+        return pd.DataFrame(rows.fetchall(), columns=['symbol', 'bucket', 'close'])
+
+    frame = _resample(_raw_frame(tickers, start, end), '1d')
+    return frame.reset_index()[['symbol', 'bucket', 'close']]
+
+
+def _raw_frame(tickers, start, end):
+    import pandas as pd
+
+    rows = db.session.query(
+        PriceBar.symbol, PriceBar.timestamp, PriceBar.open, PriceBar.high,
+        PriceBar.low, PriceBar.close, PriceBar.volume
+    ).filter(
+        PriceBar.symbol.in_(tickers),
+        PriceBar.timestamp >= start,
+        PriceBar.timestamp < end
+    ).order_by(PriceBar.symbol, PriceBar.timestamp).all()
+    return pd.DataFrame(rows, columns=['symbol', 'timestamp', *BAR_COLUMNS])
+
+
+def _resample(frame, interval):
+    # Degraded rollup used when the continuous aggregates are unavailable
+    import pandas as pd
+
+    if frame.empty:
+        return pd.DataFrame(
+            columns=BAR_COLUMNS,
+            index=pd.MultiIndex.from_arrays([[], []], names=['symbol', 'bucket'])
+        )
+
+    frame = frame.set_index('timestamp')
+    rolled = frame.groupby('symbol').resample(RESAMPLE_RULES[interval]).agg({
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last',
+        'volume': 'sum'
+    }).dropna(subset=['close'])
+    rolled.index = rolled.index.set_names(['symbol', 'bucket'])
+    return rolled
@@ -0,0 +1,187 @@
+# app/services/provider_pool.py
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+FanOutResult = namedtuple('FanOutResult', ['results', 'timed_out', 'failed'])
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class Deadline:
+    """An overall time budget, e.g. for one request's provider lookups."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() == 0.0
+
+
+class ProviderPool:
+    """
+    Bounded thread pool for parallel provider calls.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    may wait; beyond that ``submit`` raises ``PoolSaturated`` instead of
+    queueing without bound. Calls run inside an app context of their own.
+    """
+
+    def __init__(self, max_workers=16, max_queue=256, call_timeout=5.0,
+                 request_deadline=8.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.call_timeout = call_timeout
+        self.request_deadline = request_deadline
+        self.app = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.max_workers = app.config.get('PROVIDER_POOL_SIZE', self.max_workers)
+        self.max_queue = app.config.get('PROVIDER_POOL_MAX_QUEUE', self.max_queue)
+        self.call_timeout = app.config.get(
+            'PROVIDER_CALL_TIMEOUT', self.call_timeout)
+        self.request_deadline = app.config.get(
+            'PROVIDER_REQUEST_DEADLINE', self.request_deadline)
+        app.extensions['provider_pool'] = self
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._slots = threading.BoundedSemaphore(
+                        self.max_workers + self.max_queue)
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix='provider')
+        return self._executor
+
+    def deadline(self, seconds=None):
+        """Start a ``Deadline`` of ``seconds`` (default PROVIDER_REQUEST_DEADLINE)."""
+        return Deadline(self.request_deadline if seconds is None else seconds)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule ``fn(*args, **kwargs)`` on the pool.
+
+        :return: A ``concurrent.futures.Future``.
+        :raises PoolSaturated: If every worker is busy and the queue is full.
+        """
+        executor = self.executor
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(
+                f"Provider pool saturated ({self.max_workers} workers, "
+                f"{self.max_queue} queued)")
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+        try:
+            future = executor.submit(self._run, fn, args, kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # Runs on completion and on cancellation of a still-queued call
+        future.add_done_callback(self._release)
+        return future
+
+    def map(self, fn, items, call_timeout=None, deadline=None):
+        """
+        Call ``fn(item)`` for every item in parallel and wait for the results.
+
+        Each call gets ``call_timeout`` seconds from submission (time spent
+        queued counts), capped by what is left of ``deadline``. Calls still
+        running at that point are abandoned and reported as timed out.
+
+        :param fn: Callable taking a single item.
+        :param items: Iterable of hashable items.
+        :param call_timeout: Per-call timeout (default PROVIDER_CALL_TIMEOUT).
+        :param deadline: Optional ``Deadline`` bounding the whole fan-out.
+        :return: A ``FanOutResult`` of (results dict, timed_out set, failed dict).
+        """
+        call_timeout = self.call_timeout if call_timeout is None else call_timeout
+        budget = call_timeout if deadline is None \
+            else min(call_timeout, deadline.remaining())
+
+        futures = {}
+        failed = {}
+        for item in dict.fromkeys(items):
+            try:
+                futures[self.submit(fn, item)] = item
+            except PoolSaturated as e:
+                failed[item] = e
+
+        done, not_done = wait(futures, timeout=budget)
+
+        results = {}
+        for future in done:
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                failed[item] = e
+
+        timed_out = set()
+        for future in not_done:
+            future.cancel()
+            timed_out.add(futures[future])
+        with self._lock:
+            self.timeouts += len(timed_out)
+
+        return FanOutResult(results, timed_out, failed)
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'call_timeout': self.call_timeout,
+            'request_deadline': self.request_deadline,
+            'active': self.active,
+            'queued': self.queued,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts
+        }
+
+    def _release(self, future):
+        if future is None or future.cancelled():
+            with self._lock:
+                self.queued -= 1
+        self._slots.release()
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            with self.app.app_context():
+                result = fn(*args, **kwargs)
+            with self._lock:
+                self.completed += 1
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
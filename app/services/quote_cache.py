@@ -0,0 +1,176 @@
+# app/services/quote_cache.py
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from app.utils.single_flight import SingleFlight
+
+# fetched_at is when the cache stored the price; quoted_at is when the price
+# was quoted upstream, which for stored bars can be much earlier
+Quote = namedtuple('Quote', ['symbol', 'price', 'fetched_at', 'quoted_at'])
+
+
+class QuoteCache:
+    """
+    Process-wide cache of the latest quote per symbol.
+
+    Entries expire after ``ttl`` seconds and the least recently used entry is
+    evicted once ``max_entries`` symbols are held. Concurrent misses for the
+    same symbol share a single provider fetch.
+    """
+
+    def __init__(self, provider=None, ttl=15, max_entries=5000):
+        self.provider = provider
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.ttl = app.config.get('QUOTE_CACHE_TTL', self.ttl)
+        self.max_entries = app.config.get(
+            'QUOTE_CACHE_MAX_ENTRIES', self.max_entries)
+        if self.provider is None:
+            from app.services.quote_providers import QUOTE_PROVIDERS
+            self.provider = QUOTE_PROVIDERS[
+                app.config.get('QUOTE_PROVIDER', 'yfinance')]()
+        app.extensions['quote_cache'] = self
+
+    def set_provider(self, provider):
+        """Swap the upstream provider and drop everything cached from the old one."""
+        self.provider = provider
+        self.clear()
+
+    def get_quote(self, symbol):
+        """
+        Return the cached quote for a symbol, fetching it on a miss.
+
+        :param symbol: The stock ticker symbol.
+        :return: A ``Quote`` or None if the provider has no price.
+        """
+        symbol = symbol.upper()
+        quote = self._lookup(symbol)
+        if quote is not None:
+            return quote
+        return self._flights.do(symbol, self._load, symbol)
+
+    def get(self, symbol):
+        """Return the cached price for a symbol, fetching it on a miss."""
+        quote = self.get_quote(symbol)
+        return quote.price if quote is not None else None
+
+    def peek(self, symbol):
+        """Return the last known price for a symbol without fetching or counting."""
+        with self._lock:
+            quote = self._entries.get(symbol.upper())
+        return quote.price if quote is not None else None
+
+    def get_many(self, symbols):
+        """
+        Return cached prices for several symbols, fetching all misses in one
+        batched provider call.
+
+        :param symbols: Iterable of stock ticker symbols.
+        :return: A dict mapping each upper-cased symbol to its price or None.
+        """
+        prices = {}
+        missing = []
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            quote = self._lookup(symbol)
+            if quote is not None:
+                prices[symbol] = quote.price
+            else:
+                missing.append(symbol)
+
+        if missing:
+            loaded = self._flights.do_many(missing, self._load_many)
+            for symbol in missing:
+                quote = loaded.get(symbol)
+                prices[symbol] = quote.price if quote is not None else None
+        return prices
+
+    def set(self, symbol, price, fetched_at=None, quoted_at=None):
+        """Store a price for a symbol, evicting the least recently used entry if full."""
+        fetched_at = fetched_at or time.time()
+        quote = Quote(symbol.upper(), price, fetched_at, quoted_at or fetched_at)
+        with self._lock:
+            self._entries[quote.symbol] = quote
+            self._entries.move_to_end(quote.symbol)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return quote
+
+    def invalidate(self, symbol):
+        with self._lock:
+            self._entries.pop(symbol.upper(), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'coalesced': self._flights.shared,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl
+        }
+
+    def _lookup(self, symbol):
+        now = time.time()
+        with self._lock:
+            quote = self._entries.get(symbol)
+            if quote is not None and now - quote.fetched_at < self.ttl:
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return quote
+            self.misses += 1
+            return None
+
+    def _load(self, symbol):
+        # Another caller may have filled the entry while we waited to lead
+        with self._lock:
+            quote = self._entries.get(symbol)
+        if quote is not None and time.time() - quote.fetched_at < self.ttl:
+            return quote
+
+        price, quoted_at = _unpack(self.provider.get_quote(symbol))
+        if price is None:
+            return None
+        return self.set(symbol, price, quoted_at=quoted_at)
+
+    def _load_many(self, symbols):
+        if hasattr(self.provider, 'get_quotes'):
+            prices = self.provider.get_quotes(symbols)
+        else:
+            prices = {}
+            for symbol in symbols:
+                try:
+                    prices[symbol] = self.provider.get_quote(symbol)
+                except Exception as e:
+                    print(f"Error fetching quote for {symbol}: {e}")
+
+        loaded = {}
+        for symbol, value in prices.items():
+            price, quoted_at = _unpack(value)
+            if price is not None:
+                loaded[symbol] = self.set(symbol, price, quoted_at=quoted_at)
+        return loaded
+
+
+def _unpack(value):
+    # Providers return a price, or a (price, quoted_at) tuple when the price
+    # is older than the fetch (e.g. the latest stored bar)
+    if isinstance(value, tuple):
+        return value
+    return value, None
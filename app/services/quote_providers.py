@@ -0,0 +1,77 @@
+# app/services/quote_providers.py
+from datetime import timezone
+
+
+class YFinanceQuoteProvider:
+    """
+    Quote provider backed by yfinance.
+
+    Any object exposing ``get_quote(symbol)`` and optionally
+    ``get_quotes(symbols)`` can be used in its place, e.g. a local stub in
+    tests (see ``QuoteCache.set_provider``). Prices may be returned as
+    ``(price, quoted_at)`` tuples, quoted_at in epoch seconds, when they are
+    not live.
+    """
+
+    def get_quote(self, symbol):
+        """
+        Fetch the latest price for a symbol.
+
+        :param symbol: The stock ticker symbol (e.g., "AAPL").
+        :return: The current price as a float.
+        """
+        import yfinance as yf
+
+        return yf.Ticker(symbol).info['currentPrice']
+
+    def get_quotes(self, symbols):
+        """
+        Fetch the latest prices for several symbols in one download.
+
+        :param symbols: A list of stock ticker symbols.
+        :return: A dict mapping each symbol found to its latest price.
+        """
+        if not symbols:
+            return {}
+
+        import yfinance as yf
+
+        data = yf.download(symbols, period="1d", interval="1m",
+                           threads=True, group_by='ticker', progress=False)
+
+        prices = {}
+        for symbol in symbols:
+            try:
+                closes = data[symbol]['Close'].dropna()
+            except KeyError:
+                continue
+            if not closes.empty:
+                prices[symbol] = float(closes.iloc[-1])
+        return prices
+
+
+class PriceStoreQuoteProvider:
+    """
+    Quote provider that reads the latest bar from the price store.
+
+    Used when a separate market-data poller process keeps price_bars up to
+    date, so request handlers never call upstream themselves.
+    """
+
+    def get_quote(self, symbol):
+        return self.get_quotes([symbol]).get(symbol)
+
+    def get_quotes(self, symbols):
+        from app.services.price_store import get_latest_closes
+
+        # Bars are stored as naive UTC; the bar time is when it was quoted
+        return {
+            symbol: (close, timestamp.replace(tzinfo=timezone.utc).timestamp())
+            for symbol, (close, timestamp) in get_latest_closes(symbols).items()
+        }
+
+
+QUOTE_PROVIDERS = {
+    'yfinance': YFinanceQuoteProvider,
+    'store': PriceStoreQuoteProvider,
+}
@@ -0,0 +1,169 @@
+# app/services/quote_stream.py
+import threading
+import time
+
+
+class SubscriberLimitReached(Exception):
+    pass
+
+
+class Subscription:
+    """
+    One streaming client's pending updates.
+
+    Updates are conflated per (event, key): a client that falls behind only
+    ever receives the latest quote for each symbol, so an idle or slow
+    connection holds at most one pending update per symbol.
+    """
+
+    def __init__(self, symbols=None, user_id=None):
+        self.symbols = set(symbols) if symbols else None
+        self.user_id = user_id
+        self._pending = {}
+        self._cond = threading.Condition()
+
+    def wants(self, symbol):
+        return self.symbols is None or symbol in self.symbols
+
+    def follow(self, symbols=None):
+        """Replace the symbols whose quotes are delivered (None for all)."""
+        self.symbols = set(symbols) if symbols else None
+
+    def push(self, event, key, data):
+        with self._cond:
+            self._pending[(event, key)] = data
+            self._cond.notify()
+
+    def next_batch(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for updates.
+
+        :return: A dict of (event, key) to data, empty on timeout.
+        """
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            batch, self._pending = self._pending, {}
+        return batch
+
+
+class QuoteBroadcaster:
+    """
+    Fan out quote and ticker tape updates from one shared source to every
+    streaming subscriber.
+
+    The market data poller and the ticker tape snapshot publish into it, and
+    trades announce changed positions with ``publish_positions``; tests can
+    drive it directly with ``publish_quotes`` / ``publish_tape``.
+
+    Each open stream holds a worker thread blocked on its subscription, so
+    ``max_subscribers`` bounds the threads streams may take per process.
+    """
+
+    def __init__(self, max_subscribers=32):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def init_app(self, app):
+        self.max_subscribers = app.config.get(
+            'STREAM_MAX_SUBSCRIBERS', self.max_subscribers)
+        poller = app.extensions.get('market_data_poller')
+        if poller is not None:
+            poller.add_listener(self.publish_quotes)
+        tape = app.extensions.get('ticker_tape')
+        if tape is not None:
+            tape.add_listener(self.publish_tape)
+        app.extensions['quote_broadcaster'] = self
+
+    def subscribe(self, symbols=None, user_id=None):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise SubscriberLimitReached(
+                    f"At most {self.max_subscribers} streams are allowed")
+            subscription = Subscription(symbols, user_id)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish_quotes(self, prices):
+        """
+        Publish new prices to every subscriber interested in them.
+
+        :param prices: A dict mapping symbol to its latest price.
+        """
+        now = time.time()
+        for subscription in self._snapshot():
+            for symbol, price in prices.items():
+                if subscription.wants(symbol):
+                    subscription.push('quote', symbol, {
+                        'symbol': symbol, 'price': price, 'timestamp': now})
+        self.published += 1
+
+    def publish_tape(self, tape):
+        """Publish a new ticker tape to every subscriber."""
+        for subscription in self._snapshot():
+            subscription.push('tape', None, tape)
+        self.published += 1
+
+    def publish_positions(self, user_ids):
+        """Tell the streams of these users that their positions changed."""
+        user_ids = set(user_ids)
+        for subscription in self._snapshot():
+            if subscription.user_id in user_ids:
+                subscription.push('positions', None, None)
+
+    def stats(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            'subscribers': subscribers,
+            'max_subscribers': self.max_subscribers,
+            'published': self.published
+        }
+
+    def _snapshot(self):
+        with self._lock:
+            return list(self._subscribers)
+
+
+def revalue_portfolio(holdings, prices, cash_balance=None):
+    """
+    Value a user's holdings at the given prices.
+
+    :param holdings: A dict mapping ticker to (quantity, average_price).
+    :param prices: A dict mapping ticker to its latest price; tickers without
+                   one are valued at their average price.
+    :param cash_balance: Optional cash balance to include in the response.
+    :return: A dict with per-position values and portfolio totals.
+    """
+    positions = []
+    total_value = 0
+    total_invested = 0
+    for ticker, (quantity, average_price) in holdings.items():
+        price = prices.get(ticker)
+        if price is None:
+            price = average_price
+        value = quantity * price
+        invested = quantity * average_price
+        total_value += value
+        total_invested += invested
+        positions.append({
+            'ticker': ticker,
+            'current_price': price,
+            'total_value': value,
+            'profit_loss': value - invested
+        })
+
+    valuation = {
+        'portfolio': positions,
+        'totalValue': total_value,
+        'totalProfitLoss': total_value - total_invested
+    }
+    if cash_balance is not None:
+        valuation['cash_balance'] = cash_balance
+    return valuation
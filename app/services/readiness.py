@@ -0,0 +1,96 @@
+# app/services/readiness.py
+import threading
+import time
+
+
+class StartupChecks:
+    """
+    Database checks that used to block ``create_app``.
+
+    ``mode`` decides when they run: 'blocking' runs them before the app is
+    returned and lets a failure abort startup, 'background' runs them in a
+    thread so workers serve immediately, and 'probe' waits for the first
+    readiness probe. Until they pass, ``ready()`` retries them at most once
+    per ``retry_interval`` seconds.
+    """
+
+    def __init__(self, mode='background', retry_interval=5.0):
+        self.app = None
+        self.mode = mode
+        self.retry_interval = retry_interval
+        self.passed = False
+        self.error = None
+        self.duration = None
+        self._attempted_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.attempts = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('DATABASE_STARTUP_CHECK', self.mode)
+        self.retry_interval = app.config.get(
+            'STARTUP_CHECK_RETRY_INTERVAL', self.retry_interval)
+        app.extensions['startup_checks'] = self
+
+    def start(self):
+        """Run the checks according to ``mode``; called once the app is built."""
+        if self.mode == 'blocking':
+            if not self.run():
+                raise RuntimeError(self.error)
+        elif self.mode == 'background':
+            self._thread = threading.Thread(
+                target=self.run, name='startup-checks', daemon=True)
+            self._thread.start()
+
+    def run(self):
+        """Run the checks now. Returns True if they passed."""
+        from app.extensions import symbol_index
+        from app.utils.helpers import check_database_extensions
+
+        with self._lock:
+            if self.passed:
+                return True
+            self._attempted_at = time.monotonic()
+            self.attempts += 1
+            started = time.perf_counter()
+            with self.app.app_context():
+                try:
+                    check_database_extensions()
+                    self.passed = True
+                    self.error = None
+                except Exception as e:
+                    self.error = str(e)
+                    self.app.logger.error(f"Startup checks failed: {e}")
+                    return False
+                finally:
+                    self.duration = time.perf_counter() - started
+
+                # Warm the in-process ticker search index
+                if self.app.config['SEARCH_BACKEND'] == 'memory':
+                    try:
+                        symbol_index.load()
+                    except Exception as e:
+                        self.app.logger.warning(
+                            f"Could not load the symbol index: {e}")
+            return True
+
+    def ready(self):
+        """True once the checks have passed, retrying them if they are due."""
+        if self.passed:
+            return True
+        running = self._thread is not None and self._thread.is_alive()
+        due = self._attempted_at is None or \
+            time.monotonic() - self._attempted_at >= self.retry_interval
+        if running or not due:
+            return False
+        return self.run()
+
+    def stats(self):
+        return {
+            'mode': self.mode,
+            'passed': self.passed,
+            'attempts': self.attempts,
+            'duration': self.duration,
+            'error': self.error
+        }
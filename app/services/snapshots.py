@@ -0,0 +1,214 @@
+# app/services/snapshots.py
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, text
+
+from app.extensions import db
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.models.user import User
+from app.services.positions import ledger_source
+from app.services.price_store import get_daily_closes
+from app.utils.upsert import replace, upsert
+
+SNAPSHOT_FIELDS = ['holdings_value', 'cash_balance', 'cost_basis',
+                   'unrealized_pnl', 'realized_pnl']
+USER_BATCH_SIZE = 500
+UPSERT_BATCH_SIZE = 5000
+
+# Closes this far before the first snapshot day are read so a window that
+# starts on a weekend or holiday still has a price to carry forward
+_CLOSE_LOOKBACK = timedelta(days=7)
+
+
+def replay_daily(fills, cash_balance, start, end):
+    """
+    Replay one user's fills into end-of-day positions, cash and realized P&L.
+
+    Positions use the same average-cost method as ``portfolio_view``. Past
+    cash balances are derived from the current one by undoing later fills.
+
+    :param fills: All of the user's fills in ledger order, as rows with
+                  ticker, quantity, transaction_type, price and timestamp.
+    :param cash_balance: The user's current cash balance.
+    :param start: First day to report.
+    :param end: Last day to report.
+    :return: A list of (day, {ticker: (quantity, average_price)}, cash,
+             realized_pnl) tuples, one per calendar day from start to end.
+    """
+    flows = [fill.quantity * fill.price *
+             (-1 if fill.transaction_type == 'BUY' else 1) for fill in fills]
+    cash = cash_balance - sum(flows)
+    positions = {}
+    realized = 0.0
+    days = []
+
+    index = 0
+    day = start
+    while day <= end:
+        while index < len(fills) and fills[index].timestamp.date() <= day:
+            fill = fills[index]
+            quantity, average = positions.get(fill.ticker, (0, 0.0))
+            if fill.transaction_type == 'BUY':
+                total = quantity + fill.quantity
+                average = (quantity * average +
+                           fill.quantity * fill.price) / total
+                quantity = total
+            else:
+                realized += fill.quantity * (fill.price - average)
+                quantity -= fill.quantity
+            positions[fill.ticker] = (quantity, average)
+            cash += flows[index]
+            index += 1
+        days.append((day, {ticker: position
+                           for ticker, position in positions.items()
+                           if position[0] > 0}, cash, realized))
+        day += timedelta(days=1)
+    return days
+
+
+def build_snapshots(user_ids=None, start=None, end=None):
+    """
+    Write end-of-day portfolio snapshots.
+
+    Incremental by default: each user continues from their latest snapshot
+    (recomputed, as it may have been taken before that day's close) or from
+    their first fill. Passing ``start`` recomputes the window from the ledger
+    and price history, overwriting existing rows.
+
+    Holdings with no close on or before a day are valued at cost for that
+    day; those are counted per ticker so callers can tell the result is
+    incomplete.
+
+    :param user_ids: Optional list of users (default: everyone).
+    :param start: Optional first day to (re)compute.
+    :param end: Last day to compute (default: today, UTC).
+    :return: A tuple (rows written, Counter of holding-days valued at cost
+             per ticker).
+    """
+    end = end or datetime.utcnow().date()
+    query = db.session.query(User.id, User.cash_balance).order_by(User.id)
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+    users = query.all()
+
+    written = 0
+    at_cost = Counter()
+    for offset in range(0, len(users), USER_BATCH_SIZE):
+        written += _build_batch(users[offset:offset + USER_BATCH_SIZE],
+                                start, end, at_cost)
+    return written, at_cost
+
+
+def _build_batch(users, start, end, at_cost):
+    import pandas as pd
+
+    ids = [user.id for user in users]
+
+    latest = {}
+    if start is None:
+        latest = dict(db.session.query(
+            PortfolioSnapshot.user_id, func.max(PortfolioSnapshot.date)
+        ).filter(PortfolioSnapshot.user_id.in_(ids)).group_by(
+            PortfolioSnapshot.user_id).all())
+
+    fills_by_user = {user_id: [] for user_id in ids}
+    for fill in db.session.execute(text(f"""
+        SELECT user_id, ticker, quantity, transaction_type, price, timestamp
+        FROM {ledger_source()}
+        WHERE user_id IN :ids
+        ORDER BY user_id, timestamp, id
+    """).bindparams(bindparam('ids', expanding=True)), {'ids': ids}):
+        fills_by_user[fill.user_id].append(fill)
+
+    replayed = {}
+    for user in users:
+        fills = fills_by_user[user.id]
+        if start is not None:
+            first = start
+        elif user.id in latest:
+            first = latest[user.id]
+        elif fills:
+            first = fills[0].timestamp.date()
+        else:
+            first = end
+        if first <= end:
+            replayed[user.id] = replay_daily(fills, user.cash_balance,
+                                             first, end)
+    if not replayed:
+        return 0
+
+    tickers = sorted({ticker for days in replayed.values()
+                      for _, positions, _, _ in days for ticker in positions})
+    first_day = min(days[0][0] for days in replayed.values())
+    closes = _close_calendar(tickers, first_day, end)
+
+    rows = []
+    for user_id, days in replayed.items():
+        for day, positions, cash, realized in days:
+            holdings_value = cost_basis = 0.0
+            for ticker, (quantity, average) in positions.items():
+                close = closes.at[pd.Timestamp(day), ticker]
+                # Value at cost when there is no close yet
+                if pd.isna(close):
+                    close = average
+                    at_cost[ticker] += 1
+                holdings_value += quantity * close
+                cost_basis += quantity * average
+            rows.append({
+                'user_id': user_id,
+                'date': day,
+                'holdings_value': holdings_value,
+                'cash_balance': cash,
+                'cost_basis': cost_basis,
+                'unrealized_pnl': holdings_value - cost_basis,
+                'realized_pnl': realized
+            })
+
+    return _upsert_snapshots(rows)
+
+
+def _close_calendar(tickers, start, end):
+    # Daily closes for every calendar day, carried over non-trading days
+    import pandas as pd
+
+    calendar = pd.date_range(start, end, freq='D')
+    if not tickers:
+        return pd.DataFrame(index=calendar)
+    try:
+        closes = get_daily_closes(tickers, start - _CLOSE_LOOKBACK, end)
+    except Exception as e:
+        print(f"Error fetching price history for {', '.join(tickers)}: {e}")
+        closes = pd.DataFrame()
+    if not closes.empty:
+        closes.index = closes.index.normalize()
+        closes = closes[~closes.index.duplicated(keep='last')]
+        closes = closes.reindex(calendar.union(closes.index)).ffill()
+    return closes.reindex(index=calendar, columns=tickers)
+
+
+def _upsert_snapshots(rows, batch_size=UPSERT_BATCH_SIZE):
+    merge = {column: replace for column in SNAPSHOT_FIELDS}
+    for offset in range(0, len(rows), batch_size):
+        upsert(PortfolioSnapshot.__table__, rows[offset:offset + batch_size],
+               ['user_id', 'date'], merge)
+    db.session.commit()
+    return len(rows)
+
+
+def get_snapshot_series(user_id, start, end=None):
+    """
+    Read a user's daily snapshots over a date range.
+
+    :param user_id: The owner of the snapshots.
+    :param start: First day (inclusive).
+    :param end: Optional last day (inclusive).
+    :return: A list of snapshot dicts in chronological order.
+    """
+    query = PortfolioSnapshot.query.filter(
+        PortfolioSnapshot.user_id == user_id,
+        PortfolioSnapshot.date >= start)
+    if end is not None:
+        query = query.filter(PortfolioSnapshot.date <= end)
+    return [snapshot.to_dict()
+            for snapshot in query.order_by(PortfolioSnapshot.date)]
@@ -1,9 +1,16 @@
 # app/services/stock_service.py
+import asyncio
+import threading
 from datetime import datetime, timedelta
-import random
-import yfinance as yf
+from flask import current_app
 
+from sqlalchemy import case, func
+
+from app.extensions import provider_pool, quote_cache, symbol_index, ticker_tape
 from app.models.stock_ticker import StockTicker
+from app.services.price_store import get_daily_closes
+from app.services.provider_pool import FanOutResult
+from app.services.ticker_metadata import get_ticker_metadata
 
 
 def fetch_ticker_details(ticker):
@@ -13,6 +20,8 @@ def fetch_ticker_details(ticker):
     :param ticker: The stock ticker symbol (e.g., "AAPL", "TSLA")
     :return: A dictionary with the stock details or None if the ticker is invalid.
     """
+    import yfinance as yf
+
     try:
         stock = yf.Ticker(ticker)
         stock_info = stock.info
@@ -24,99 +33,204 @@ def fetch_ticker_details(ticker):
         return None
 
 
-def search_ticker_in_db(query):
+def search_ticker_in_db(query, limit=20):
     """
-    Search the stock_tickers table for matching symbols or company names.
+    Search stock tickers by symbol or company name.
+
+    Uses the in-process symbol index by default, or Postgres pg_trgm when
+    SEARCH_BACKEND is "trigram".
 
     :param query: The search query for ticker symbol or company name.
+    :param limit: Maximum number of results, best match first.
     :return: A list of matching stock records.
     """
     try:
-        search_query = f"%{query}%"
-        results = StockTicker.query.filter(
-            (StockTicker.symbol.ilike(search_query))
-        ).all()
-
-        data = [
-            {
-                "symbol": stock.symbol,
-            } for stock in results
-        ]
-        return data
+        if current_app.config.get('SEARCH_BACKEND') == 'trigram':
+            return _search_ticker_trigram(query, limit)
+        return symbol_index.search(query, limit)
     except Exception as e:
         print(f"Error searching for ticker in DB: {e}")
         return []
 
 
+def _search_ticker_trigram(query, limit):
+    # ILIKE '%q%' is served by the gin_trgm_ops indexes created by
+    # `flask search init`; similarity breaks ties within a rank
+    query = query.strip()
+    pattern = f"%{query}%"
+    prefix = f"{query}%"
+    rank = case(
+        (func.upper(StockTicker.symbol) == query.upper(), 0),
+        (StockTicker.symbol.ilike(prefix), 1),
+        (StockTicker.name.ilike(prefix), 2),
+        (StockTicker.symbol.ilike(pattern), 3),
+        else_=4
+    )
+    results = StockTicker.query.filter(
+        StockTicker.symbol.ilike(pattern) | StockTicker.name.ilike(pattern)
+    ).order_by(
+        rank,
+        func.similarity(StockTicker.symbol, query).desc(),
+        func.length(StockTicker.symbol),
+        StockTicker.symbol
+    ).limit(limit).all()
+    return [stock.to_dict() for stock in results]
+
+
 def get_current_price(ticker):
+    """
+    Get the latest price for a ticker from the shared quote cache.
+
+    :param ticker: The stock ticker symbol.
+    :return: The current price, or None if it could not be fetched.
+    """
     try:
-        stock = yf.Ticker(ticker)
-        stock_info = stock.info
-        current_price = stock_info['currentPrice']
-        return current_price
+        return quote_cache.get(ticker)
     except Exception as e:
         print(f"Error fetching ticker details for {ticker}: {e}")
         return None
 
 
+def get_current_prices(tickers):
+    """
+    Get the latest prices for several tickers with a single batched lookup.
+
+    :param tickers: An iterable of stock ticker symbols.
+    :return: A dict mapping each upper-cased ticker to its price, or None if
+             that ticker's price could not be fetched.
+    """
+    tickers = [ticker.upper() for ticker in tickers]
+    try:
+        return quote_cache.get_many(tickers)
+    except Exception as e:
+        print(f"Error fetching prices for {', '.join(tickers)}: {e}")
+        return {ticker: None for ticker in tickers}
+
+
 def get_historical_prices(ticker, days=30):
-    # Replace with actual implementation to fetch historical prices
-    historical_prices = []
-    base_price = get_current_price(ticker) or 100.0
-    for i in range(days):
-        date = datetime.utcnow() - timedelta(days=i)
-        # Simulate price changes
-        price = base_price + random.uniform(-5, 5)
-        historical_prices.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(price, 2)
-        })
-    # Return in chronological order
-    return list(reversed(historical_prices))
+    """
+    Daily closing prices for a ticker over the last ``days`` days, served
+    from the price store.
 
+    :param ticker: The stock ticker symbol.
+    :param days: Number of calendar days to look back.
+    :return: A list of {'date', 'price'} dictionaries in chronological order.
+    """
+    end = datetime.utcnow()
+    try:
+        closes = get_daily_closes([ticker], end - timedelta(days=days), end)
+    except Exception as e:
+        print(f"Error fetching historical prices for {ticker}: {e}")
+        return []
 
-def get_ticker_tape():
+    if closes.empty:
+        return []
+    return [
+        {'date': date.strftime('%Y-%m-%d'), 'price': round(float(price), 2)}
+        for date, price in closes.iloc[:, 0].dropna().items()
+    ]
+
+
+def get_portfolio_value_series(holdings, start, end, freq='D', fallback_prices=None):
+    """
+    Value a set of holdings over a date range.
+
+    Daily closes for every ticker are read from the price store in one
+    query, forward-filled over non-trading days and combined as a
+    quantity-weighted sum.
+
+    :param holdings: A dict mapping ticker to quantity held.
+    :param start: First date of the range.
+    :param end: Last date of the range.
+    :param freq: Sampling interval as a pandas offset alias (e.g. "D", "W",
+                 "30D"). Sample points are anchored at ``start``.
+    :param fallback_prices: Optional dict of ticker to price used before the
+                            first available close or when a ticker has no
+                            history at all.
+    :return: A list of {'date', 'value'} dictionaries in chronological order.
+    """
+    tickers = list(holdings)
+    if not tickers:
+        return []
+
+    import numpy as np
+    import pandas as pd
+
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    try:
+        closes = get_daily_closes(tickers, start, end)
+    except Exception as e:
+        print(f"Error fetching price history for {', '.join(tickers)}: {e}")
+        closes = pd.DataFrame()
+
+    # Carry the last close across weekends and holidays, including from any
+    # trading day that precedes the calendar start
+    calendar = pd.date_range(start, end, freq='D')
+    if not closes.empty:
+        closes.index = closes.index.normalize()
+        closes = closes[~closes.index.duplicated(keep='last')]
+        closes = closes.reindex(calendar.union(closes.index)).ffill()
+    closes = closes.reindex(index=calendar, columns=tickers)
+    if fallback_prices:
+        closes = closes.fillna(value=fallback_prices)
+    closes = closes.fillna(0.0)
+
+    quantities = np.array([holdings[ticker] for ticker in tickers], dtype=float)
+    values = pd.Series(closes.to_numpy() @ quantities, index=calendar)
+
+    samples = values.reindex(pd.date_range(start, end, freq=freq))
+    return [
+        {'date': date.strftime('%Y-%m-%d'), 'value': float(value)}
+        for date, value in samples.items()
+    ]
+
+
+def get_ticker_tape_symbols():
+    """Symbols shown on the ticker tape (TICKER_TAPE_SYMBOLS setting)."""
+    return list(current_app.config['TICKER_TAPE_SYMBOLS'])
+
+
+def get_ticker_tape(tickers=None):
     """
-    Fetches real-time ticker data for predefined stock symbols from major exchanges.
+    Fetches real-time ticker data for the ticker tape symbols.
+
+    Intraday bars and previous closes come from a single download covering
+    the last few sessions; the previous close is the last bar of the session
+    before the latest one.
 
+    :param tickers: Optional list of symbols (defaults to the configured tape).
     Returns:
         list: A list of dictionaries containing Symbol, Price, and Change.
     """
-    # Define a list of hard-coded tickers from major exchanges
-    tickers = [
-        "AAPL",  # Apple Inc. - NASDAQ
-        "MSFT",  # Microsoft Corporation - NASDAQ
-        "GOOGL",  # Alphabet Inc. - NASDAQ
-        "AMZN",  # Amazon.com Inc. - NASDAQ
-        "TSLA",  # Tesla Inc. - NASDAQ
-        "FB",    # Meta Platforms, Inc. - NASDAQ
-        "BRK-B",  # Berkshire Hathaway Inc. - NYSE
-        "JPM",   # JPMorgan Chase & Co. - NYSE
-        "V",     # Visa Inc. - NYSE
-        "JNJ"    # Johnson & Johnson - NYSE
-    ]
+    import yfinance as yf
+
+    tickers = tickers or get_ticker_tape_symbols()
 
     ticker_tape = []
 
     # Fetch data for all tickers at once for efficiency
-    data = yf.download(tickers, period="1d", interval="1m",
+    data = yf.download(tickers, period="5d", interval="1m",
                        threads=True, group_by='ticker', progress=False)
 
     for ticker in tickers:
         try:
-            ticker_data = data[ticker]
-            latest = ticker_data.iloc[-1]
-            previous_close = yf.Ticker(ticker).info['previousClose']
-            price = latest['Close']
-            change = price - previous_close
+            closes = data[ticker]['Close'].dropna()
+            sessions = closes.index.date
+            price = closes.iloc[-1]
+            previous_session = closes[sessions < sessions[-1]]
+            previous_close = previous_session.iloc[-1] \
+                if not previous_session.empty else None
+            change = price - previous_close if previous_close else 0
             change_percent = (change / previous_close) * \
                 100 if previous_close else 0
 
             ticker_tape.append({
                 "symbol": ticker,
-                "price": round(price, 2),
-                "change": round(change, 2),
-                "change_percent": round(change_percent, 2)
+                "price": round(float(price), 2),
+                "change": round(float(change), 2),
+                "change_percent": round(float(change_percent), 2)
             })
         except Exception as e:
             # Handle cases where data might not be available
@@ -129,3 +243,155 @@ def get_ticker_tape():
             })
 
     return ticker_tape
+
+
+# Async variants
+#
+# Each call runs the sync implementation on the bounded provider pool, in an
+# app context (and so a database session) of its own. A process-wide
+# semaphore per provider additionally bounds how many of those calls hit the
+# same provider at once, across every request and event loop.
+
+_provider_semaphores = {}
+_provider_semaphores_lock = threading.Lock()
+
+
+def _provider_semaphore(provider):
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(provider)
+        if semaphore is None:
+            limit = current_app.config['PROVIDER_CONCURRENCY'][provider]
+            semaphore = threading.BoundedSemaphore(limit)
+            _provider_semaphores[provider] = semaphore
+        return semaphore
+
+
+async def _offload(provider, fn, *args, **kwargs):
+    semaphore = _provider_semaphore(provider)
+
+    def call():
+        with semaphore:
+            return fn(*args, **kwargs)
+
+    return await asyncio.wrap_future(provider_pool.submit(call))
+
+
+def _time_budget(deadline):
+    if deadline is None:
+        return provider_pool.call_timeout
+    return min(provider_pool.call_timeout, deadline.remaining())
+
+
+async def with_deadline(awaitable, deadline=None, default=None):
+    """
+    Await a provider lookup for at most the per-call timeout, capped by what
+    is left of ``deadline``.
+
+    :return: A tuple (value, timed_out); value is ``default`` on timeout or
+             error.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, _time_budget(deadline)), False
+    except asyncio.TimeoutError:
+        return default, True
+    except Exception as e:
+        print(f"Provider lookup failed: {e}")
+        return default, True
+
+
+def resolve_price(ticker, prices, fallback):
+    """
+    Pick the price to show for a ticker and say where it came from.
+
+    :param ticker: The stock ticker symbol.
+    :param prices: Prices returned by a (possibly timed out) lookup, or None.
+    :param fallback: Price to use when nothing better is known.
+    :return: A tuple (price, status) with status "live", "stale" (last cached
+             quote) or "fallback".
+    """
+    price = prices.get(ticker.upper()) if prices else None
+    if price is not None:
+        return price, 'live'
+    price = quote_cache.peek(ticker)
+    if price is not None:
+        return price, 'stale'
+    return fallback, 'fallback'
+
+
+def get_historical_prices_many(tickers, days=30):
+    """
+    Daily closing prices for several tickers over the last ``days`` days,
+    read (and backfilled if needed) with a single price store lookup.
+
+    :param tickers: A list of stock ticker symbols.
+    :param days: Number of calendar days to look back.
+    :return: A dict mapping each upper-cased ticker with closes to a list of
+             {'date', 'price'} dictionaries in chronological order.
+    """
+    tickers = [ticker.upper() for ticker in dict.fromkeys(tickers)]
+    if not tickers:
+        return {}
+
+    end = datetime.utcnow()
+    closes = get_daily_closes(tickers, end - timedelta(days=days), end)
+    history = {}
+    for ticker in tickers:
+        if ticker not in closes.columns:
+            continue
+        prices = [
+            {'date': date.strftime('%Y-%m-%d'), 'price': round(float(price), 2)}
+            for date, price in closes[ticker].dropna().items()
+        ]
+        if prices:
+            history[ticker] = prices
+    return history
+
+
+async def fetch_ticker_details_async(ticker):
+    return await _offload('market_data', fetch_ticker_details, ticker)
+
+
+async def get_ticker_metadata_async(ticker, fields=None):
+    # Usually a primary-key read; only cold symbols reach the provider
+    return await _offload('market_data', get_ticker_metadata, ticker, fields)
+
+
+async def get_current_price_async(ticker):
+    return await _offload('market_data', get_current_price, ticker)
+
+
+async def get_current_prices_async(tickers):
+    return await _offload('market_data', get_current_prices, list(tickers))
+
+
+async def get_historical_prices_async(ticker, days=30):
+    return await _offload('price_store', get_historical_prices, ticker, days)
+
+
+async def get_portfolio_value_series_async(holdings, start, end, freq='D', fallback_prices=None):
+    return await _offload('price_store', get_portfolio_value_series, holdings,
+                          start, end, freq=freq, fallback_prices=fallback_prices)
+
+
+async def get_historical_prices_many_async(tickers, days=30, deadline=None):
+    """
+    Price history for several tickers in one offloaded lookup, bounded by the
+    per-call timeout and ``deadline``.
+
+    :return: A ``FanOutResult``; if the lookup is late or fails every ticker
+             is reported as timed out.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return FanOutResult({}, set(), {})
+    history, late = await with_deadline(
+        _offload('price_store', get_historical_prices_many, tickers, days),
+        deadline)
+    if late:
+        return FanOutResult({}, set(tickers), {})
+    return FanOutResult(history, set(), {})
+
+
+async def get_ticker_tape_async():
+    """Return the current ticker tape snapshot, rebuilding it off the event loop."""
+    return await _offload('market_data', ticker_tape.get)
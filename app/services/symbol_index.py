@@ -0,0 +1,194 @@
+# app/services/symbol_index.py
+import re
+import threading
+import time
+from collections import namedtuple
+
+from app.utils.single_flight import SingleFlight
+
+TickerRecord = namedtuple('TickerRecord', ['symbol', 'name', 'exchange'])
+
+# Ranking tiers, best first
+EXACT, SYMBOL_PREFIX, NAME_PREFIX, SYMBOL_SUBSTRING, NAME_SUBSTRING = range(5)
+
+MAX_GRAM = 3
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class _Index:
+    # Immutable once built; SymbolIndex swaps whole instances on refresh
+
+    def __init__(self, records):
+        self.records = sorted(records, key=lambda r: (len(r.symbol), r.symbol))
+        self.by_symbol = {}
+        self.symbol_trie = _TrieNode()
+        self.name_trie = _TrieNode()
+        self.symbol_grams = {}
+        self.name_grams = {}
+
+        for record_id, record in enumerate(self.records):
+            symbol = record.symbol.lower()
+            self.by_symbol[symbol] = record_id
+            self._insert(self.symbol_trie, symbol, record_id)
+            self._add_grams(self.symbol_grams, symbol, record_id)
+            if record.name:
+                name = record.name.lower()
+                for word in set(_WORD.findall(name)):
+                    self._insert(self.name_trie, word, record_id)
+                self._add_grams(self.name_grams, name, record_id)
+
+    @staticmethod
+    def _insert(trie, key, record_id):
+        node = trie
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.ids.append(record_id)
+
+    @staticmethod
+    def _add_grams(grams, key, record_id):
+        for size in range(1, MAX_GRAM + 1):
+            for start in range(len(key) - size + 1):
+                grams.setdefault(key[start:start + size], set()).add(record_id)
+
+    @staticmethod
+    def prefix(trie, key):
+        node = trie
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    @staticmethod
+    def substring(grams, keys, query):
+        # Intersect the postings of every n-gram of the query, then verify
+        size = min(MAX_GRAM, len(query))
+        candidates = None
+        for start in range(len(query) - size + 1):
+            postings = grams.get(query[start:start + size])
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None \
+                else candidates & postings
+        return {record_id for record_id in candidates or ()
+                if query in keys(record_id)}
+
+
+class SymbolIndex:
+    """
+    In-process ticker search index loaded from ``stock_ticker``.
+
+    Symbols and company-name words live in prefix tries; symbols and full
+    names are also indexed by 1- to 3-grams for substring lookups. Results are
+    ranked exact symbol > symbol prefix > name prefix > symbol substring >
+    name substring and cut at ``limit``.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._index = None
+        self._loaded_at = 0
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.loads = 0
+
+    def init_app(self, app):
+        from sqlalchemy import event
+        from app.models.stock_ticker import StockTicker
+
+        self.refresh_interval = app.config.get(
+            'SEARCH_INDEX_REFRESH_INTERVAL', self.refresh_interval)
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(StockTicker, name, self._on_change):
+                event.listen(StockTicker, name, self._on_change)
+        app.extensions['symbol_index'] = self
+
+    def invalidate(self):
+        """Reload from the database before the next search."""
+        self._dirty = True
+
+    def build(self, records):
+        """Replace the index contents with the given TickerRecords."""
+        index = _Index(records)
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+            self._dirty = False
+            self.loads += 1
+
+    def load(self):
+        """(Re)load every ticker from the stock_ticker table."""
+        from app.extensions import db
+        from app.models.stock_ticker import StockTicker
+
+        rows = db.session.query(
+            StockTicker.symbol, StockTicker.name, StockTicker.exchange).all()
+        self.build(TickerRecord(*row) for row in rows)
+
+    def search(self, query, limit=20):
+        """
+        Search tickers by symbol or company name.
+
+        :param query: The search text.
+        :param limit: Maximum number of results.
+        :return: A list of ticker dictionaries, best match first.
+        """
+        index = self._current()
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        ranked = []
+        seen = set()
+
+        def take(tier, record_ids):
+            for record_id in sorted(set(record_ids) - seen):
+                seen.add(record_id)
+                ranked.append((tier, record_id))
+
+        exact = index.by_symbol.get(query)
+        if exact is not None:
+            take(EXACT, [exact])
+        take(SYMBOL_PREFIX, index.prefix(index.symbol_trie, query))
+        if len(ranked) < limit:
+            take(NAME_PREFIX, index.prefix(index.name_trie, query))
+        if len(ranked) < limit:
+            take(SYMBOL_SUBSTRING, index.substring(
+                index.symbol_grams,
+                lambda i: index.records[i].symbol.lower(), query))
+        if len(ranked) < limit:
+            take(NAME_SUBSTRING, index.substring(
+                index.name_grams,
+                lambda i: (index.records[i].name or '').lower(), query))
+
+        # Records are stored shortest symbol first, so ids sort by relevance
+        # within a tier
+        ranked.sort()
+        return [index.records[record_id]._asdict()
+                for _, record_id in ranked[:limit]]
+
+    def stats(self):
+        index = self._index
+        return {
+            'size': len(index.records) if index else 0,
+            'loads': self.loads,
+            'age': time.monotonic() - self._loaded_at if index else None
+        }
+
+    def _current(self):
+        expired = time.monotonic() - self._loaded_at >= self.refresh_interval
+        if self._index is None or self._dirty or expired:
+            self._flights.do('load', self.load)
+        return self._index
+
+    def _on_change(self, mapper, connection, target):
+        self.invalidate()
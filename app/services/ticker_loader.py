@@ -0,0 +1,152 @@
+# app/services/ticker_loader.py
+import csv
+import re
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.stock_ticker import StockTicker
+from app.utils.upsert import dialect_insert, select_then_upsert
+
+SYMBOL_MAX_LENGTH = StockTicker.__table__.c.symbol.type.length
+_SEPARATORS = re.compile(r'[,\s]+')
+
+
+def read_symbols_txt(file, chunk_size=65536):
+    """
+    Stream symbols from a comma or whitespace separated text file.
+
+    :param file: An open text file.
+    :param chunk_size: Characters read per chunk.
+    :return: A generator of {'symbol': ...} rows.
+    """
+    tail = ''
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        parts = _SEPARATORS.split(tail + chunk)
+        # The last part may be a symbol cut in half by the chunk boundary
+        tail = parts.pop()
+        for part in parts:
+            if part:
+                yield {'symbol': part}
+    if tail.strip():
+        yield {'symbol': tail.strip()}
+
+
+def read_symbols_csv(file):
+    """
+    Stream ticker rows from a CSV file with a header row.
+
+    A ``symbol`` column is required; ``name`` and ``exchange`` are optional.
+    Header names are matched case-insensitively.
+
+    :param file: An open text file.
+    :return: A generator of {'symbol', 'name', 'exchange'} rows.
+    """
+    reader = csv.DictReader(file)
+    columns = {(field or '').strip().lower(): field for field in reader.fieldnames or []}
+    if 'symbol' not in columns:
+        raise ValueError("CSV input needs a 'symbol' column")
+
+    def value(row, column):
+        field = columns.get(column)
+        return (row.get(field) or '').strip() or None if field else None
+
+    for row in reader:
+        yield {
+            'symbol': row[columns['symbol']],
+            'name': value(row, 'name'),
+            'exchange': value(row, 'exchange')
+        }
+
+
+def load_tickers(rows, batch_size=1000, update=False, session=None):
+    """
+    Insert ticker rows in chunks with INSERT ... ON CONFLICT, or on databases
+    without it by looking up the existing symbols first.
+
+    :param rows: An iterable of dicts with a symbol and optional name/exchange.
+    :param batch_size: Rows per INSERT statement.
+    :param update: Overwrite name/exchange of symbols that already exist
+                   (only with non-empty values) instead of skipping them.
+    :param session: SQLAlchemy session to use (defaults to ``db.session``).
+    :return: A tuple (written, skipped). ``written`` counts inserted rows, plus
+             updated rows when ``update`` is set; ``skipped`` counts existing,
+             duplicate and invalid rows.
+    """
+    session = session or db.session
+    insert = dialect_insert(session)
+
+    table = StockTicker.__table__
+    # Keep stored values where the file has none
+    merge = {
+        column: lambda current, new: func.coalesce(new, current)
+        for column in ('name', 'exchange')
+    } if update else None
+    written = 0
+    skipped = 0
+    batch = {}
+
+    def flush():
+        if insert is None:
+            inserted, updated = select_then_upsert(
+                table, list(batch.values()), ['symbol'], merge, session)
+            session.commit()
+            return inserted + updated
+        stmt = insert(table).values(list(batch.values()))
+        if update:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['symbol'],
+                set_={
+                    column: combine(table.c[column], stmt.excluded[column])
+                    for column, combine in merge.items()
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['symbol'])
+        result = session.execute(stmt)
+        session.commit()
+        return result.rowcount
+
+    for row in rows:
+        symbol = (row.get('symbol') or '').strip().upper()
+        if not symbol or len(symbol) > SYMBOL_MAX_LENGTH or symbol in batch:
+            skipped += 1
+            continue
+        batch[symbol] = {
+            'symbol': symbol,
+            'name': row.get('name'),
+            'exchange': row.get('exchange')
+        }
+        if len(batch) >= batch_size:
+            count = flush()
+            written += count
+            skipped += len(batch) - count
+            batch = {}
+
+    if batch:
+        count = flush()
+        written += count
+        skipped += len(batch) - count
+
+    return written, skipped
+
+
+def load_ticker_file(path, file_format=None, batch_size=1000, update=False,
+                     session=None):
+    """
+    Load a ticker universe file into ``stock_ticker``.
+
+    :param path: Path to a .txt (comma/whitespace separated symbols) or .csv
+                 (symbol, name, exchange columns) file.
+    :param file_format: "txt" or "csv"; inferred from the extension if omitted.
+    :return: A tuple (written, skipped), see ``load_tickers``.
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'txt')
+    with open(path, 'r', newline='') as file:
+        rows = read_symbols_csv(file) if file_format == 'csv' \
+            else read_symbols_txt(file)
+        return load_tickers(rows, batch_size=batch_size, update=update,
+                            session=session)
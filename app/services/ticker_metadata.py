@@ -0,0 +1,141 @@
+# app/services/ticker_metadata.py
+import math
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db, provider_pool
+from app.models.ticker_metadata import TickerMetadata
+from app.utils.single_flight import SingleFlight
+from app.utils.upsert import replace, upsert
+
+_flights = SingleFlight()
+
+
+def project(data, fields=None):
+    """
+    Keep only the requested keys of a metadata dict.
+
+    :param data: The stored metadata.
+    :param fields: Optional iterable of keys; None returns everything.
+    :return: A dict with the requested keys that are present.
+    """
+    if not fields:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+
+def get_ticker_metadata(symbol, fields=None):
+    """
+    Return stored metadata for a symbol, fetching and persisting it on a miss.
+
+    Stored rows are served even past their TTL; the refresh job keeps them
+    current so requests never wait on the provider for a known symbol.
+    Concurrent misses for the same symbol share one provider fetch.
+
+    :param symbol: The stock ticker symbol.
+    :param fields: Optional iterable of keys to project the result to.
+    :return: The (projected) metadata dict, or None if the provider has none.
+    """
+    symbol = symbol.upper()
+    row = db.session.get(TickerMetadata, symbol)
+    if row is not None:
+        return project(row.data, fields)
+
+    data = _flights.do(symbol, _fetch_and_store, symbol)
+    if data is None:
+        return None
+    return project(data, fields)
+
+
+def refresh_stale_metadata(ttl=None, limit=500):
+    """
+    Refetch stored metadata older than ``ttl`` seconds, in parallel on the
+    provider pool, and upsert the results.
+
+    Symbols are fetched in chunks no larger than the pool so every call
+    starts at once and finishes within the per-call timeout. Symbols that
+    fail keep their data but have ``fetched_at`` moved to now, so a delisted
+    symbol waits a full TTL instead of heading every following pass.
+
+    :param ttl: Maximum age in seconds (default: TICKER_METADATA_TTL).
+    :param limit: Maximum number of symbols refreshed per call, oldest first.
+    :return: A tuple (refreshed, failed) of counts.
+    """
+    if ttl is None:
+        ttl = current_app.config['TICKER_METADATA_TTL']
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    symbols = [
+        row.symbol for row in db.session.query(TickerMetadata.symbol).filter(
+            TickerMetadata.fetched_at < cutoff
+        ).order_by(TickerMetadata.fetched_at).limit(limit)
+    ]
+    if not symbols:
+        return 0, 0
+
+    refreshed = 0
+    chunk_size = provider_pool.max_workers
+    for offset in range(0, len(symbols), chunk_size):
+        chunk = symbols[offset:offset + chunk_size]
+        fetched = provider_pool.map(_fetch, chunk)
+        rows = [
+            {'symbol': symbol, 'data': data}
+            for symbol, data in fetched.results.items() if data
+        ]
+        store_metadata(rows)
+        _touch([symbol for symbol in chunk
+                if not fetched.results.get(symbol)])
+        refreshed += len(rows)
+    return refreshed, len(symbols) - refreshed
+
+
+def store_metadata(rows):
+    """Upsert {'symbol', 'data'} rows, stamping them as fetched now."""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    upsert(TickerMetadata.__table__,
+           [dict(row, fetched_at=now) for row in rows], ['symbol'],
+           {'data': replace, 'fetched_at': replace})
+    db.session.commit()
+
+
+def _touch(symbols):
+    # Record a failed refresh attempt without discarding the stored data
+    if not symbols:
+        return
+    TickerMetadata.query.filter(TickerMetadata.symbol.in_(symbols)).update(
+        {'fetched_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+
+
+def _fetch(symbol):
+    from app.services.stock_service import fetch_ticker_details
+
+    data = fetch_ticker_details(symbol)
+    # Unknown symbols come back as None or a near-empty dict; don't keep them
+    if not data or not (data.get('symbol') or data.get('shortName')):
+        return None
+    return _json_safe(data)
+
+
+def _json_safe(value):
+    # JSON columns reject NaN and infinity, which the provider does return
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _fetch_and_store(symbol):
+    data = _fetch(symbol)
+    if data is not None:
+        try:
+            store_metadata([{'symbol': symbol, 'data': data}])
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error storing ticker metadata for {symbol}: {e}")
+    return data
@@ -0,0 +1,97 @@
+# app/services/ticker_tape.py
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+Snapshot = namedtuple('Snapshot', ['data', 'etag', 'generated_at'])
+
+
+class TickerTapeSnapshot:
+    """
+    Precomputed ticker tape, rebuilt at most once per ``refresh_interval``.
+
+    While a rebuild is running other callers keep getting the previous
+    snapshot, so only the very first request ever waits on upstream.
+    """
+
+    def __init__(self, refresh_interval=15):
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._refreshed_at = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.refreshes = 0
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get(
+            'TICKER_TAPE_REFRESH_INTERVAL', self.refresh_interval)
+        app.extensions['ticker_tape'] = self
+
+    def add_listener(self, listener):
+        """Call ``listener(data)`` whenever the tape content changes."""
+        # Registered from init_app, which runs again for every app created
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def get(self):
+        """Return the current snapshot, rebuilding it if it has expired."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._expired():
+            return snapshot
+
+        # Only one caller rebuilds; the rest serve the previous snapshot
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is None or self._expired():
+                self._build()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def peek(self):
+        """Return the last built snapshot (or None) without rebuilding."""
+        return self._snapshot
+
+    def refresh(self):
+        """Rebuild the snapshot now."""
+        with self._lock:
+            return self._build()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'refreshes': self.refreshes,
+            'refresh_interval': self.refresh_interval,
+            'age': time.monotonic() - self._refreshed_at if snapshot else None,
+            'etag': snapshot.etag if snapshot else None
+        }
+
+    def _expired(self):
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def _build(self):
+        from app.services.stock_service import get_ticker_tape
+
+        data = get_ticker_tape()
+        body = json.dumps(data, sort_keys=True).encode()
+        etag = hashlib.sha1(body).hexdigest()
+
+        # Keep Last-Modified stable while the tape content does not change
+        previous = self._snapshot
+        changed = previous is None or previous.etag != etag
+        if changed:
+            generated_at = datetime.now(timezone.utc).replace(microsecond=0)
+        else:
+            generated_at = previous.generated_at
+        self._snapshot = Snapshot(data, etag, generated_at)
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+
+        if changed:
+            for listener in self._listeners:
+                listener(data)
+        return self._snapshot
@@ -0,0 +1,90 @@
+# app/utils/compression.py
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+class ResponseCompressor:
+    """
+    Compress responses with brotli or gzip, negotiated from Accept-Encoding.
+
+    Only complete (non-streamed) successful responses of a compressible type
+    and at least ``min_size`` bytes are compressed, so SSE and NDJSON/CSV
+    exports keep flowing chunk by chunk.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4,
+                 mimetypes=None):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = set(mimetypes or ['application/json', 'text/html',
+                                           'text/plain', 'text/csv'])
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get(
+            'COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        if app.config.get('COMPRESS_ENABLED', True):
+            app.after_request(self.compress)
+        app.extensions['response_compressor'] = self
+
+    def encoding_for(self, accept_encodings):
+        """Pick 'br', 'gzip' or None from the client's Accept-Encoding."""
+        if brotli is not None and accept_encodings['br'] > 0:
+            return 'br'
+        if accept_encodings['gzip'] > 0:
+            return 'gzip'
+        return None
+
+    def compress_bytes(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def compress(self, response):
+        if (response.direct_passthrough or response.is_streamed
+                or not 200 <= response.status_code < 300
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in self.mimetypes):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.encoding_for(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        compressed = self.compress_bytes(data, encoding)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        # The compressed body is a different representation of the resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        self.compressed += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(compressed)
+        return response
+
+    def stats(self):
+        return {
+            'compressed': self.compressed,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'brotli': brotli is not None
+        }
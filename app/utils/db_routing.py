@@ -0,0 +1,279 @@
+# app/utils/db_routing.py
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.expression import CompoundSelect, Select, TextualSelect
+
+REPLICA_BIND = 'replica'
+
+# Seconds the standby is behind the primary; 0 when it is fully replayed or
+# is not a standby at all (e.g. a second local database while testing)
+_REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+# Statements a read-only view may send to the replica; anything else,
+# including raw text() SQL that could write, stays on the primary
+_REPLICA_STATEMENTS = (Select, CompoundSelect, TextualSelect)
+
+
+def engine_options(config, uri):
+    """
+    Engine options for ``uri`` from the DB_POOL_* settings.
+
+    Pool sizing only applies to server databases; SQLite keeps the pool
+    Flask-SQLAlchemy picks for it.
+    """
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+    }
+    uri = str(uri or '')
+    if not uri.startswith('sqlite'):
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config.get('DB_POOL_SIZE', 10),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 20),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        })
+    if uri.startswith('postgres'):
+        options['connect_args'] = {
+            'connect_timeout': config.get('DB_CONNECT_TIMEOUT', 5)}
+    return options
+
+
+def configure_engines(config):
+    """
+    Set SQLALCHEMY_ENGINE_OPTIONS and, with DATABASE_REPLICA_URI, the replica
+    bind. Flask-SQLAlchemy does not apply the engine options to binds, so
+    the replica gets its own copy.
+    """
+    config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(
+        config, config.get('SQLALCHEMY_DATABASE_URI')))
+    replica_uri = config.get('DATABASE_REPLICA_URI')
+    if replica_uri:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA_BIND, dict(
+            engine_options(config, replica_uri), url=replica_uri))
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = deque(maxlen=1000)
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                self.waits.append(waited)
+
+    def stats(self):
+        from app.services.order_book import percentile
+
+        with self._stats_lock:
+            waits = sorted(self.waits)
+            checkouts = self.checkouts
+            stats = {
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms': {
+                    'mean': self.wait_total / checkouts * 1000 if checkouts else 0.0,
+                    'p50': percentile(waits, 50) * 1000 if waits else 0.0,
+                    'p95': percentile(waits, 95) * 1000 if waits else 0.0,
+                    'max': self.wait_max * 1000
+                }
+            }
+        capacity = self.size() + max(self._max_overflow, 0)
+        stats.update({
+            'size': self.size(),
+            'max_overflow': self._max_overflow,
+            'checked_out': self.checkedout(),
+            'idle': self.checkedin(),
+            'saturation': round(self.checkedout() / capacity, 3) if capacity else 0.0
+        })
+        return stats
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {'pool': type(pool).__name__, 'status': pool.status()}
+
+
+def read_only(view):
+    """
+    Mark a view as read-only so its queries may be served by the replica.
+
+    Only SELECTs are routed; flushes, DML and raw ``text()`` statements still
+    go to the primary. The view should not depend on reading its own writes.
+    """
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            g.use_replica = True
+            return await view(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def use_replica():
+    return has_app_context() and g.get('use_replica', False)
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of ``read_only`` views to the replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing
+                and isinstance(clause, _REPLICA_STATEMENTS) and use_replica()):
+            from app.extensions import replica_router
+
+            engine = replica_router.engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Decides per read-only query whether the replica may serve it.
+
+    The replica's replay lag is measured at most every ``check_interval``
+    seconds, in a background thread so requests never wait on a slow or
+    unreachable replica; until the first measurement, while it exceeds
+    ``max_lag`` seconds, or while the replica cannot be reached, reads fall
+    back to the primary.
+    """
+
+    def __init__(self, max_lag=5.0, check_interval=5.0):
+        self.app = None
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag = None
+        self._checked_at = None
+        self._measuring = False
+        self._lock = threading.Lock()
+        self.last_error = None
+        self.replica_reads = 0
+        self.fallbacks = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', self.max_lag)
+        self.check_interval = app.config.get(
+            'REPLICA_LAG_CHECK_INTERVAL', self.check_interval)
+        app.extensions['replica_router'] = self
+
+    @property
+    def enabled(self):
+        return (self.app is not None and
+                REPLICA_BIND in (self.app.config.get('SQLALCHEMY_BINDS') or {}))
+
+    def engine(self):
+        """The replica engine if it is configured and fresh enough, else None."""
+        if not self.enabled:
+            return None
+        lag = self.lag()
+        if lag is None or lag > self.max_lag:
+            self.fallbacks += 1
+            return None
+        self.replica_reads += 1
+        from app.extensions import db
+
+        return db.engines[REPLICA_BIND]
+
+    def lag(self):
+        """
+        Last measured replica lag in seconds, or None if it is not known yet
+        or could not be measured. Starts a new measurement when one is due.
+        """
+        due = self._checked_at is None or \
+            time.monotonic() - self._checked_at >= self.check_interval
+        if due:
+            with self._lock:
+                start = not self._measuring
+                self._measuring = True
+            if start:
+                threading.Thread(target=self._measure, name='replica-lag',
+                                 daemon=True).start()
+        return self._lag
+
+    def _measure(self):
+        try:
+            with self.app.app_context():
+                self._lag = self._measure_lag()
+        finally:
+            self._checked_at = time.monotonic()
+            with self._lock:
+                self._measuring = False
+
+    def _measure_lag(self):
+        from app.extensions import db
+
+        engine = db.engines[REPLICA_BIND]
+        if engine.dialect.name != 'postgresql':
+            return 0.0
+        try:
+            with engine.connect() as connection:
+                lag = float(connection.execute(_REPLICA_LAG_SQL).scalar() or 0)
+            self.last_error = None
+            return lag
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error measuring replica lag: {e}")
+            return None
+
+    def stats(self):
+        from app.extensions import db
+
+        stats = {'pools': {
+            key or 'primary': pool_stats(engine)
+            for key, engine in db.engines.items()
+        }}
+        if self.enabled:
+            stats['replica'] = {
+                'lag_seconds': self._lag,
+                'max_lag_seconds': self.max_lag,
+                'reads': self.replica_reads,
+                'fallbacks': self.fallbacks,
+                'last_error': self.last_error
+            }
+        return stats
@@ -0,0 +1,53 @@
+# app/utils/json_provider.py
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, several times faster than the standard
+    library on large nested payloads.
+
+    Dates and datetimes are written as ISO 8601 and numpy scalars and arrays
+    are serialized natively; anything else falls back to Flask's defaults.
+    NaN and infinity become null instead of invalid JSON.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | \
+            orjson.OPT_APPEND_NEWLINE
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    'default': DefaultJSONProvider,
+    'orjson': OrJSONProvider,
+}
+
+
+def json_provider_class(name):
+    """
+    Resolve the JSON_PROVIDER setting, falling back to Flask's provider when
+    orjson is not installed.
+    """
+    if name == 'orjson' and orjson is None:
+        return DefaultJSONProvider
+    return JSON_PROVIDERS[name]
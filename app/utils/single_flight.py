@@ -0,0 +1,110 @@
+# app/utils/single_flight.py
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for that result instead of issuing their own call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` once per in-flight ``key``.
+
+        :param key: Hashable key identifying the call.
+        :param fn: The callable to run.
+        :return: The result of the call, shared by every concurrent caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def do_many(self, keys, fn):
+        """
+        Run ``fn`` once for every key in ``keys`` that is not already in flight.
+
+        ``fn`` receives the list of keys this caller leads and must return a
+        dict of results keyed the same way; keys missing from it resolve to
+        None. Keys led by other callers are waited on.
+
+        :param keys: Iterable of hashable keys.
+        :param fn: Callable taking a list of keys and returning a dict.
+        :return: A dict mapping every key to its result.
+        """
+        led = {}
+        waiting = {}
+        with self._lock:
+            for key in keys:
+                if key in led or key in waiting:
+                    continue
+                call = self._calls.get(key)
+                if call is not None:
+                    self.shared += 1
+                    waiting[key] = call
+                else:
+                    call = _Call()
+                    self._calls[key] = call
+                    led[key] = call
+
+        results = {}
+        if led:
+            try:
+                fetched = fn(list(led)) or {}
+                for key, call in led.items():
+                    call.result = fetched.get(key)
+                    results[key] = call.result
+            except Exception as e:
+                for call in led.values():
+                    call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._calls.pop(key, None)
+                for call in led.values():
+                    call.event.set()
+
+        for key, call in waiting.items():
+            call.event.wait()
+            results[key] = call.result if call.error is None else None
+        return results
@@ -0,0 +1,224 @@
+# app/utils/timescale.py
+import time
+
+from sqlalchemy import text
+from flask import current_app
+from ..extensions import db
+
+# Continuous aggregates rolled up from price_bars, finest first. Each entry is
+# (view name, bucket width, source relation, source time column).
+PRICE_BAR_AGGREGATES = [
+    ('price_bars_1h', '1 hour', 'price_bars', 'timestamp'),
+    ('price_bars_1d', '1 day', 'price_bars_1h', 'bucket'),
+]
+
+# (start_offset, end_offset, schedule_interval) for each aggregate's refresh policy
+PRICE_BAR_REFRESH_POLICIES = {
+    'price_bars_1h': ('3 days', '1 hour', '30 minutes'),
+    'price_bars_1d': ('30 days', '1 day', '1 hour'),
+}
+
+# Plain table that `flask transactions archive` moves old ledger chunks into
+TRANSACTIONS_ARCHIVE = 'transactions_archive'
+
+_RELATION_CHECK_TTL = 300
+_relation_checks = {}
+
+
+def has_timescaledb():
+    """Return True if the bound database is Postgres with TimescaleDB installed."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return _cached_check('extension:timescaledb', lambda: db.session.execute(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    ).scalar() is not None)
+
+
+def relation_exists(name):
+    """Return True if a table or view exists in the bound Postgres database."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return _cached_check(f'relation:{name}', lambda: db.session.execute(
+        text('SELECT to_regclass(:name)'), {'name': name}
+    ).scalar() is not None)
+
+
+def setup_price_bars():
+    """
+    Turn price_bars into a hypertable and create its continuous aggregates
+    (1m -> 1h -> 1d) with refresh policies. Safe to run repeatedly.
+    """
+    statements = [
+        "SELECT create_hypertable('price_bars', 'timestamp', "
+        "chunk_time_interval => INTERVAL '7 days', if_not_exists => TRUE, "
+        "migrate_data => TRUE)"
+    ]
+    for view, width, source, time_column in PRICE_BAR_AGGREGATES:
+        statements.append(f"""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT symbol,
+                   time_bucket(INTERVAL '{width}', {time_column}) AS bucket,
+                   first(open, {time_column}) AS open,
+                   max(high) AS high,
+                   min(low) AS low,
+                   last(close, {time_column}) AS close,
+                   sum(volume) AS volume
+            FROM {source}
+            GROUP BY symbol, time_bucket(INTERVAL '{width}', {time_column})
+            WITH NO DATA
+        """)
+        start_offset, end_offset, schedule = PRICE_BAR_REFRESH_POLICIES[view]
+        statements.append(
+            f"SELECT add_continuous_aggregate_policy('{view}', "
+            f"start_offset => INTERVAL '{start_offset}', "
+            f"end_offset => INTERVAL '{end_offset}', "
+            f"schedule_interval => INTERVAL '{schedule}', "
+            f"if_not_exists => TRUE)"
+        )
+
+    # Continuous aggregates cannot be created inside a transaction block
+    with db.engine.connect().execution_options(
+            isolation_level='AUTOCOMMIT') as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+    _relation_checks.clear()
+    current_app.logger.info('price_bars hypertable and aggregates are ready')
+
+
+def refresh_price_bar_aggregates(start=None, end=None):
+    """Materialize the price_bars aggregates over a window (all time by default)."""
+    with db.engine.connect().execution_options(
+            isolation_level='AUTOCOMMIT') as connection:
+        for view, _, _, _ in PRICE_BAR_AGGREGATES:
+            connection.execute(
+                text('CALL refresh_continuous_aggregate(:view, :start, :end)'),
+                {'view': view, 'start': start, 'end': end}
+            )
+
+
+def setup_transactions(chunk_interval='30 days', compress_after='90 days',
+                       retention=None):
+    """
+    Turn transactions into a hypertable on timestamp with compression of old
+    chunks and, if ``retention`` is given, a retention policy. Safe to run
+    repeatedly.
+
+    Hypertable unique keys must include the time column, so the primary key
+    becomes (id, timestamp) and foreign keys pointing at transactions are
+    dropped (hypertables cannot be referenced).
+
+    Fills without a timestamp are not given one: any value would move them in
+    the ledger's replay order and change positions and P&L, so the
+    conversion is refused until they are fixed by hand.
+
+    :param chunk_interval: Time range covered by each chunk.
+    :param compress_after: Age after which chunks are compressed.
+    :param retention: Age after which chunks are dropped, or None to keep all.
+    :raises ValueError: If some transactions have no timestamp.
+    """
+    missing = db.session.execute(text(
+        "SELECT count(*) FROM transactions WHERE timestamp IS NULL")).scalar()
+    db.session.rollback()
+    if missing:
+        raise ValueError(
+            f"{missing} transactions have no timestamp; set them by hand "
+            f"before converting the table")
+
+    statements = [
+        "ALTER TABLE transactions ALTER COLUMN timestamp SET NOT NULL",
+        """
+        DO $$
+        DECLARE fk record;
+        BEGIN
+            FOR fk IN SELECT conrelid::regclass AS tbl, conname
+                      FROM pg_constraint
+                      WHERE contype = 'f'
+                        AND confrelid = 'transactions'::regclass LOOP
+                EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I',
+                               fk.tbl, fk.conname);
+            END LOOP;
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_index
+                WHERE indrelid = 'transactions'::regclass AND indisprimary
+                  AND indnatts = 2
+            ) THEN
+                ALTER TABLE transactions DROP CONSTRAINT IF EXISTS
+                    transactions_pkey;
+                ALTER TABLE transactions ADD PRIMARY KEY (id, timestamp);
+            END IF;
+        END $$
+        """,
+        f"SELECT create_hypertable('transactions', 'timestamp', "
+        f"chunk_time_interval => INTERVAL '{chunk_interval}', "
+        f"if_not_exists => TRUE, migrate_data => TRUE)",
+        # Segmenting by user and ticker keeps per-user history reads on
+        # compressed chunks to the matching segments only
+        "ALTER TABLE transactions SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'user_id, ticker', "
+        "timescaledb.compress_orderby = 'timestamp DESC, id DESC')",
+        f"SELECT add_compression_policy('transactions', "
+        f"INTERVAL '{compress_after}', if_not_exists => TRUE)",
+    ]
+    if retention:
+        statements.append(
+            f"SELECT add_retention_policy('transactions', "
+            f"INTERVAL '{retention}', if_not_exists => TRUE)")
+
+    with db.engine.connect().execution_options(
+            isolation_level='AUTOCOMMIT') as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+
+    _relation_checks.clear()
+    current_app.logger.info('transactions hypertable is ready')
+
+
+def archive_transactions(older_than):
+    """
+    Move whole transactions chunks older than ``older_than`` into the
+    transactions_archive table and drop them from the hypertable.
+
+    Only chunks that end before the cutoff are moved, so every archived row
+    is removed exactly once.
+
+    :param older_than: An interval string such as '2 years'.
+    :return: The number of rows archived.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {TRANSACTIONS_ARCHIVE} "
+            f"(LIKE transactions INCLUDING DEFAULTS)"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{TRANSACTIONS_ARCHIVE}_user_ticker "
+            f"ON {TRANSACTIONS_ARCHIVE} (user_id, ticker, timestamp)"))
+
+        boundary = connection.execute(text("""
+            SELECT max(range_end) FROM timescaledb_information.chunks
+            WHERE hypertable_name = 'transactions'
+              AND range_end <= now() - CAST(:older_than AS INTERVAL)
+        """), {'older_than': older_than}).scalar()
+        if boundary is None:
+            return 0
+
+        archived = connection.execute(text(
+            f"INSERT INTO {TRANSACTIONS_ARCHIVE} "
+            f"SELECT * FROM transactions WHERE timestamp < :boundary"
+        ), {'boundary': boundary}).rowcount
+        connection.execute(text(
+            "SELECT drop_chunks('transactions', older_than => :boundary)"
+        ), {'boundary': boundary})
+
+    _relation_checks.clear()
+    return archived
+
+
+def _cached_check(key, check):
+    cached = _relation_checks.get(key)
+    now = time.time()
+    if cached is not None and now - cached[1] < _RELATION_CHECK_TTL:
+        return cached[0]
+    result = bool(check())
+    _relation_checks[key] = (result, now)
+    return result
@@ -0,0 +1,106 @@
+# app/utils/upsert.py
+from sqlalchemy import and_, bindparam, select
+
+from ..extensions import db
+
+
+def replace(current, new):
+    """Merge that overwrites the stored value with the incoming one."""
+    return new
+
+
+def dialect_insert(session=None):
+    """
+    The INSERT construct with ON CONFLICT support for the session's
+    database, or None when its dialect has none.
+    """
+    dialect = (session or db.session).get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def upsert(table, rows, keys, merge=None, session=None):
+    """
+    Insert rows, merging them into the rows that already exist.
+
+    Runs INSERT ... ON CONFLICT on Postgres and SQLite and falls back to
+    ``select_then_upsert`` on other databases. Does not commit.
+
+    :param table: The Table to write.
+    :param rows: A list of dicts with every column to insert.
+    :param keys: Names of the unique key columns rows conflict on.
+    :param merge: {column: merge(current, new)} building each updated value
+                  from the stored column and the incoming value (see
+                  ``replace``); None leaves existing rows unchanged.
+    :param session: SQLAlchemy session to use (defaults to ``db.session``).
+    """
+    session = session or db.session
+    if not rows:
+        return
+    insert = dialect_insert(session)
+    if insert is None:
+        select_then_upsert(table, rows, keys, merge, session)
+        return
+
+    stmt = insert(table)
+    if merge:
+        stmt = stmt.on_conflict_do_update(index_elements=keys, set_={
+            column: combine(table.c[column], stmt.excluded[column])
+            for column, combine in merge.items()
+        })
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+    session.execute(stmt, rows)
+
+
+def select_then_upsert(table, rows, keys, merge=None, session=None):
+    """
+    Portable upsert for databases without ON CONFLICT: look up which keys
+    already exist, insert the rest and update the existing rows with
+    ``merge``. Rows repeating a key are applied in order.
+
+    Unlike ON CONFLICT this is not atomic: a concurrent insert of the same
+    key makes the INSERT fail on the unique key instead of merging.
+
+    :return: A tuple (inserted, updated) of row counts.
+    """
+    session = session or db.session
+    key_columns = [table.c[key] for key in keys]
+    wanted = {tuple(row[key] for key in keys) for row in rows}
+    # Filter on the first key column only; tuple IN is not portable either
+    existing = {
+        tuple(found) for found in session.execute(
+            select(*key_columns).where(
+                key_columns[0].in_({key[0] for key in wanted})))
+    } & wanted
+
+    inserts, updates = [], []
+    for row in rows:
+        key = tuple(row[column] for column in keys)
+        if key in existing:
+            updates.append(row)
+        else:
+            inserts.append(row)
+            existing.add(key)
+
+    if inserts:
+        session.execute(table.insert(), inserts)
+    if updates and merge:
+        stmt = table.update().where(and_(*(
+            column == bindparam(f'key_{column.name}')
+            for column in key_columns
+        ))).values({
+            column: combine(table.c[column], bindparam(f'new_{column}'))
+            for column, combine in merge.items()
+        })
+        session.execute(stmt, [
+            dict({f'key_{key}': row[key] for key in keys},
+                 **{f'new_{column}': row[column] for column in merge})
+            for row in updates
+        ])
+    return len(inserts), len(updates) if merge else 0
@@ -0,0 +1,121 @@
+"""
+Serialization time and bytes on the wire for a large /analytics payload.
+
+Builds a synthetic portfolio of --holdings positions, each with its own
+transaction list, plus composition and performance series shaped like the
+/analytics response, then compares Flask's default JSON provider with the
+orjson provider and the body size uncompressed, gzip and brotli.
+
+    python -m benchmarks.json_compression --holdings 500
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.compression import ResponseCompressor, brotli
+from app.utils.json_provider import OrJSONProvider, orjson
+
+
+def synthetic_analytics(holdings, transactions_per_holding, seed=1):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    portfolio = []
+    for index in range(holdings):
+        ticker = f'T{index:04d}'
+        price = rng.uniform(5, 500)
+        transactions = [{
+            'id': index * transactions_per_holding + n,
+            'ticker': ticker,
+            'quantity': rng.randint(1, 100),
+            'transaction_type': rng.choice(['BUY', 'SELL']),
+            'price': round(price * rng.uniform(0.8, 1.2), 2),
+            'timestamp': (now - timedelta(minutes=rng.randint(0, 10 ** 6))).isoformat(),
+            'quote_timestamp': None
+        } for n in range(transactions_per_holding)]
+        shares = rng.randint(1, 1000)
+        portfolio.append({
+            'ticker': ticker,
+            'shares': shares,
+            'average_price': price,
+            'current_price': price * rng.uniform(0.7, 1.5),
+            'price_status': 'live',
+            'total_value': shares * price,
+            'profit_loss': {'dollars': rng.uniform(-1e4, 1e4),
+                            'percent': round(rng.uniform(-50, 50), 2)},
+            'realized_profit_loss': rng.uniform(-1e3, 1e3),
+            'transactions': transactions
+        })
+    return {
+        'totalValue': sum(p['total_value'] for p in portfolio),
+        'totalStocks': holdings,
+        'portfolio': portfolio,
+        'portfolioComposition': [{'name': p['ticker'], 'value': p['total_value']}
+                                 for p in portfolio],
+        'stockPerformance': [{'name': p['ticker'],
+                              'performance': p['profit_loss']['percent']}
+                             for p in portfolio],
+        'performanceData': [{'date': (now - timedelta(days=d)).strftime('%Y-%m-%d'),
+                             'value': rng.uniform(1e5, 1e6)} for d in range(180)],
+        'squared_off_positions': [],
+        'partial': False,
+        'staleTickers': []
+    }
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--holdings', type=int, default=500)
+    parser.add_argument('--transactions', type=int, default=40,
+                        help='Transactions per holding.')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    payload = synthetic_analytics(args.holdings, args.transactions)
+    app = Flask(__name__)
+    providers = {'default (json)': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrJSONProvider(app)
+    else:
+        print('orjson is not installed; only the default provider is timed')
+
+    print(f"{args.holdings} holdings x {args.transactions} transactions, "
+          f"best of {args.repeat}\n")
+    body = None
+    with app.app_context():
+        for name, provider in providers.items():
+            elapsed, response = best_of(lambda: provider.response(payload),
+                                        args.repeat)
+            body = response.get_data()
+            print(f"  serialize  {name:<16} {elapsed:8.1f} ms  "
+                  f"{len(body) / 1024:9.1f} KiB")
+
+    compressor = ResponseCompressor()
+    print()
+    print(f"  {'encoding':<27} {'time':>8}     {'size':>9}")
+    print(f"  {'identity':<27} {0:8.1f} ms  {len(body) / 1024:9.1f} KiB")
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and brotli is None:
+            print('  br: brotli is not installed')
+            continue
+        elapsed, compressed = best_of(
+            lambda: compressor.compress_bytes(body, encoding), args.repeat)
+        print(f"  {encoding:<27} {elapsed:8.1f} ms  "
+              f"{len(compressed) / 1024:9.1f} KiB "
+              f"({len(compressed) / len(body):.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Login throughput versus password-hashing worker count.
+
+Fires --logins password verifications from --clients concurrent threads,
+first inline in the calling threads (the old behaviour) and then through
+the process-pool hasher at each worker count, and reports logins/sec,
+latency percentiles and how many calls were turned away with 429.
+
+    python -m benchmarks.login_throughput --workers 1,2,4,8 --clients 64
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from app.services.order_book import percentile
+from app.services.password_hasher import HasherSaturated, PasswordHasher
+
+
+def run(hasher, pwhash, logins, clients):
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def login(_):
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            assert hasher.verify(pwhash, 'correct horse battery staple')
+        except HasherSaturated:
+            with lock:
+                rejected += 1
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    # Warm the pool so process start-up is not counted
+    hasher.verify(pwhash, 'correct horse battery staple')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(clients) as client_threads:
+        list(client_threads.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, rejected
+
+
+def report(label, throughput, latencies, rejected):
+    print(f"  {label:<14} {throughput:8.1f}/s  "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f}ms  "
+          f"p95 {percentile(latencies, 95) * 1000:7.1f}ms  "
+          f"429s {rejected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    parser.add_argument('--workers', default=None,
+                        help='Comma separated worker counts '
+                             '(default: 1,2,4,... up to the CPU count).')
+    parser.add_argument('--clients', type=int, default=64,
+                        help='Concurrent login requests.')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--max-queue', type=int, default=64)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(',')]
+    else:
+        counts = sorted({min(2 ** n, cpus) for n in range(cpus.bit_length() + 1)})
+
+    pwhash = generate_password_hash('correct horse battery staple',
+                                    method=args.method)
+    print(f"{args.logins} logins from {args.clients} clients, {args.method}, "
+          f"{cpus} CPUs\n")
+
+    report('inline', *run(PasswordHasher(args.method), pwhash,
+                          args.logins, args.clients))
+    for count in counts:
+        hasher = PasswordHasher(args.method, max_workers=count,
+                                max_queue=args.max_queue, inline=False)
+        try:
+            report(f'{count} workers', *run(hasher, pwhash, args.logins,
+                                            args.clients))
+        finally:
+            hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
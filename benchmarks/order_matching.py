@@ -0,0 +1,128 @@
+"""
+Throughput and latency benchmark for the limit order matching engine.
+
+Rests orders around a random-walk price on a set of symbols while ticks move
+the price, reporting sustained orders/sec and per-tick match latency
+percentiles. Matching is measured in memory; pass --write to also persist
+the orders and their fills to DATABASE_URI_CONNECTION (use a disposable
+database) and report fill write throughput.
+
+    python -m benchmarks.order_matching --orders 200000 --symbols 50
+"""
+import argparse
+import random
+import time
+
+from app.services.order_book import MatchingEngine, RestingOrder, percentile
+
+
+def generate(args, rng):
+    """Yield (orders, ticks) rounds: a burst of new orders, then one tick."""
+    prices = {f'SYM{i}': 100.0 for i in range(args.symbols)}
+    symbols = list(prices)
+    order_id = 0
+    per_round = max(1, args.orders // args.ticks)
+    for _ in range(args.ticks):
+        orders = []
+        for _ in range(per_round):
+            order_id += 1
+            symbol = rng.choice(symbols)
+            side = rng.choice(['BUY', 'SELL'])
+            # Rest within 2% on either side so a good share eventually fills
+            offset = rng.uniform(-0.02, 0.02) * prices[symbol]
+            orders.append(RestingOrder(order_id, args.user_id, symbol, side,
+                                       rng.randint(1, 10),
+                                       round(prices[symbol] + offset, 2)))
+        for symbol in symbols:
+            prices[symbol] *= 1 + rng.gauss(0, 0.002)
+        yield orders, dict(prices)
+
+
+def run_in_memory(args):
+    engine = MatchingEngine()
+    rng = random.Random(args.seed)
+    latencies = []
+    submitted = matched = 0
+
+    started = time.perf_counter()
+    for orders, ticks in generate(args, rng):
+        for order in orders:
+            engine.submit(order)
+        submitted += len(orders)
+
+        tick_started = time.perf_counter()
+        matched += len(engine.match(ticks))
+        latencies.append(time.perf_counter() - tick_started)
+        engine._pending.clear()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{submitted} orders, {len(latencies)} ticks x {args.symbols} "
+          f"symbols in {elapsed:.2f}s")
+    print(f"  sustained: {submitted / elapsed:,.0f} orders/sec, "
+          f"{matched} matched ({matched / elapsed:,.0f} fills/sec)")
+    print('  match latency per tick: ' + ', '.join(
+        f"{name} {percentile(latencies, q) * 1000:.3f}ms"
+        for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))))
+    return engine
+
+
+def run_with_writes(args):
+    from app import create_app
+    from app.extensions import db
+    from app.models.order import Order
+    from app.models.user import User
+    from app.services.order_book import resting_order
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    with app.app_context():
+        user = User(email=f'bench-{time.time_ns()}@example.com',
+                    name='bench', cash_balance=1e12)
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+        engine = MatchingEngine(batch_size=args.batch_size)
+        written = 0
+        started = time.perf_counter()
+        for orders, ticks in generate(args, rng):
+            rows = [Order(user_id=user.id, ticker=o.ticker, side=o.side,
+                          quantity=o.quantity, limit_price=o.limit_price)
+                    for o in orders]
+            db.session.add_all(rows)
+            db.session.commit()
+            for row in rows:
+                engine.submit(resting_order(row))
+            engine.match(ticks)
+            written += engine.flush()
+        elapsed = time.perf_counter() - started
+
+        stats = engine.stats()
+        print(f"with writes: {stats['submitted']} orders in {elapsed:.2f}s "
+              f"({stats['submitted'] / elapsed:,.0f} orders/sec), "
+              f"{written} fills in {stats['batches']} batches "
+              f"({written / elapsed:,.0f} fills/sec), "
+              f"{stats['rejected']} rejected, {stats['skipped']} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--write', action='store_true',
+                        help='Also persist orders and fills to the database.')
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Fills per transaction with --write.')
+    args = parser.parse_args()
+
+    run_in_memory(args)
+    if args.write:
+        run_with_writes(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Worker start-up time: importing the app, create_app and the first request.
+
+Each run starts a fresh interpreter that imports ``app``, builds the app
+and serves GET /api/metrics through the test client, timing each step and
+noting which heavy market-data modules were loaded along the way. Reports
+the median over --runs.
+
+    python -m benchmarks.startup_time --runs 5
+
+Without DATABASE_URI_CONNECTION an in-memory SQLite database is used, which
+is enough as no step needs Postgres with the default 'probe' check mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance')
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+response = flask_app.test_client().get('/api/metrics')
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'status': response.status_code,
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def run_once(env):
+    output = subprocess.run(
+        [sys.executable, '-c', _CHILD % (HEAVY_MODULES,)],
+        env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--check', default='probe',
+                        choices=['blocking', 'background', 'probe'],
+                        help='DATABASE_STARTUP_CHECK for the runs.')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URI_CONNECTION', 'sqlite://')
+    env['DATABASE_STARTUP_CHECK'] = args.check
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    print(f"{args.runs} cold starts, DATABASE_STARTUP_CHECK={args.check}\n")
+    total = []
+    for step in ('import', 'create_app', 'first_request'):
+        timings = [run[step] for run in runs]
+        total.append(statistics.median(timings))
+        print(f"  {step:<14} median {statistics.median(timings) * 1000:8.1f} ms  "
+              f"max {max(timings) * 1000:8.1f} ms")
+    print(f"  {'to first reply':<14} median {sum(total) * 1000:8.1f} ms")
+    print(f"\n  first request status: {runs[-1]['status']}")
+    heavy = runs[-1]['heavy']
+    print(f"  heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Concurrency stress test for the trade path.
+
+Fires interleaved buys and sells for one user from many threads against the
+database in DATABASE_URI_CONNECTION (use a disposable local Postgres), then
+checks the invariants the atomic statements are meant to hold:
+
+* cash never goes negative and equals the starting balance minus buys plus
+  sells as recorded in the ledger;
+* no position goes negative and the materialized positions match a full
+  ledger replay.
+
+    DATABASE_URI_CONNECTION=postgresql://localhost/tradex_test \\
+        python -m benchmarks.trade_contention --threads 32 --trades 200
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import func
+
+from app import create_app
+from app.extensions import db
+from app.models.portfolio import Portfolio
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.positions import TradeRejected, execute_trade, \
+    verify_positions
+
+
+def make_user(cash):
+    user = User(email=f'stress-{time.time_ns()}@example.com',
+                name='stress', cash_balance=cash)
+    user.set_password('stress')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+_outcomes_lock = threading.Lock()
+
+
+def tally(outcomes, key):
+    with _outcomes_lock:
+        outcomes[key] += 1
+
+
+def worker(app, user_id, tickers, trades, seed, outcomes):
+    rng = random.Random(seed)
+    with app.app_context():
+        for _ in range(trades):
+            side = rng.choice(['BUY', 'SELL'])
+            try:
+                execute_trade(user_id, rng.choice(tickers), side,
+                              rng.randint(1, 5), round(rng.uniform(5, 50), 2))
+                tally(outcomes, side)
+            except TradeRejected:
+                tally(outcomes, 'rejected')
+            except Exception as e:
+                db.session.rollback()
+                tally(outcomes, 'error')
+                print(f"Error executing trade: {e}")
+        db.session.remove()
+
+
+def check(user_id, cash):
+    failures = []
+
+    user = db.session.get(User, user_id)
+    flows = dict(db.session.query(
+        Transaction.transaction_type,
+        func.sum(Transaction.quantity * Transaction.price)
+    ).filter_by(user_id=user_id).group_by(Transaction.transaction_type).all())
+    expected = cash - (flows.get('BUY') or 0) + (flows.get('SELL') or 0)
+
+    if user.cash_balance < 0:
+        failures.append(f"negative cash balance {user.cash_balance}")
+    if abs(user.cash_balance - expected) > 1e-6:
+        failures.append(f"cash {user.cash_balance} != ledger {expected}")
+
+    negative = Portfolio.query.filter(Portfolio.user_id == user_id,
+                                      Portfolio.total_quantity < 0).count()
+    if negative:
+        failures.append(f"{negative} negative positions")
+
+    for diff in verify_positions(user_id, tolerance=1e-4):
+        failures.append(f"position drift {diff}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--trades', type=int, default=100,
+                        help='Trades per thread.')
+    parser.add_argument('--tickers', default='AAPL,MSFT',
+                        help='Comma separated tickers to contend on.')
+    parser.add_argument('--cash', type=float, default=5000.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    tickers = [t.strip().upper() for t in args.tickers.split(',') if t.strip()]
+
+    with app.app_context():
+        user_id = make_user(args.cash)
+
+    outcomes = Counter()
+    threads = [
+        threading.Thread(target=worker,
+                         args=(app, user_id, tickers, args.trades, seed,
+                               outcomes))
+        for seed in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.threads * args.trades
+    print(f"{total} trades in {elapsed:.2f}s ({total / elapsed:.0f}/s): "
+          f"{dict(outcomes)}")
+
+    with app.app_context():
+        failures = check(user_id, args.cash)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures or outcomes['error']:
+        sys.exit(1)
+    print('All invariants hold.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Range-query latency and on-disk size of the transactions ledger as a plain
+table versus a compressed TimescaleDB hypertable.
+
+Generates the same multi-million-row ledger into two scratch tables in the
+database in DATABASE_URI_CONNECTION (Postgres with TimescaleDB; the live
+transactions table is not touched), converts one the way
+`flask transactions init` converts transactions, and times typical history
+and analytics queries before and after compressing old chunks.
+
+    python -m benchmarks.transactions_hypertable --rows 5000000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from app import create_app
+from app.extensions import db
+from app.services.order_book import percentile
+
+PLAIN = 'bench_transactions_plain'
+HYPER = 'bench_transactions_hyper'
+TICKERS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'TSLA', 'META', 'NVDA', 'JPM',
+           'V', 'JNJ', 'WMT', 'PG', 'XOM', 'BAC', 'KO', 'PFE', 'DIS', 'NFLX',
+           'INTC', 'CSCO']
+
+SCHEMA = """
+    CREATE TABLE {table} (
+        id BIGINT NOT NULL,
+        user_id INTEGER NOT NULL,
+        ticker VARCHAR(10) NOT NULL,
+        quantity INTEGER NOT NULL,
+        transaction_type VARCHAR(4) NOT NULL,
+        price DOUBLE PRECISION NOT NULL,
+        timestamp TIMESTAMP NOT NULL,
+        quote_timestamp TIMESTAMP,
+        PRIMARY KEY ({primary_key})
+    )
+"""
+
+QUERIES = {
+    'user ticker history, last 30 days': """
+        SELECT * FROM {table}
+        WHERE user_id = :user_id AND ticker = :ticker
+          AND timestamp >= now() - INTERVAL '30 days'
+        ORDER BY timestamp DESC, id DESC LIMIT 100
+    """,
+    'user ticker history, a year ago': """
+        SELECT * FROM {table}
+        WHERE user_id = :user_id AND ticker = :ticker
+          AND timestamp >= now() - INTERVAL '395 days'
+          AND timestamp < now() - INTERVAL '365 days'
+        ORDER BY timestamp DESC, id DESC LIMIT 100
+    """,
+    'user fills per ticker, last year': """
+        SELECT ticker, count(*), sum(quantity * price) FROM {table}
+        WHERE user_id = :user_id AND timestamp >= now() - INTERVAL '1 year'
+        GROUP BY ticker
+    """,
+    'platform volume, one day': """
+        SELECT ticker, sum(quantity * price) FROM {table}
+        WHERE timestamp >= now() - INTERVAL '8 days'
+          AND timestamp < now() - INTERVAL '7 days'
+        GROUP BY ticker
+    """,
+}
+
+
+def execute(connection, statement, params=None):
+    return connection.execute(text(statement), params or {})
+
+
+def generate(connection, args):
+    for table in (PLAIN, HYPER):
+        execute(connection, f'DROP TABLE IF EXISTS {table}')
+    execute(connection, SCHEMA.format(table=PLAIN, primary_key='id'))
+    execute(connection, SCHEMA.format(table=HYPER,
+                                      primary_key='id, timestamp'))
+    execute(connection,
+            f"SELECT create_hypertable('{HYPER}', 'timestamp', "
+            f"chunk_time_interval => INTERVAL '{args.chunk_interval}')")
+
+    started = time.perf_counter()
+    execute(connection, f"""
+        INSERT INTO {PLAIN}
+        SELECT i,
+               1 + (i % :users),
+               (ARRAY[{', '.join(f"'{t}'" for t in TICKERS)}])[1 + (i * 7 % {len(TICKERS)})],
+               1 + (i % 50),
+               CASE WHEN i % 3 = 0 THEN 'SELL' ELSE 'BUY' END,
+               10 + (i % 5000) / 10.0,
+               now() - random() * INTERVAL '1 day' * :days,
+               NULL
+        FROM generate_series(1, :rows) AS i
+    """, {'users': args.users, 'days': args.days, 'rows': args.rows})
+    execute(connection, f'INSERT INTO {HYPER} SELECT * FROM {PLAIN}')
+    for table in (PLAIN, HYPER):
+        execute(connection,
+                f'CREATE INDEX ON {table} (user_id, ticker, timestamp)')
+        execute(connection, f'ANALYZE {table}')
+    print(f"Generated {args.rows:,} rows over {args.days} days in "
+          f"{time.perf_counter() - started:.1f}s")
+
+
+def sizes(connection):
+    plain = execute(connection,
+                    f"SELECT pg_total_relation_size('{PLAIN}')").scalar()
+    hyper = execute(connection,
+                    f"SELECT hypertable_size('{HYPER}')").scalar()
+    return plain, hyper
+
+
+def time_queries(connection, args, label):
+    rng = random.Random(args.seed)
+    print(f"\n{label} (ms over {args.repeat} runs)")
+    print(f"  {'query':<36} {'plain p50':>10} {'p95':>8} "
+          f"{'hyper p50':>10} {'p95':>8}")
+    for name, query in QUERIES.items():
+        timings = {PLAIN: [], HYPER: []}
+        for _ in range(args.repeat):
+            params = {'user_id': rng.randint(1, args.users),
+                      'ticker': rng.choice(TICKERS)}
+            for table in (PLAIN, HYPER):
+                started = time.perf_counter()
+                execute(connection, query.format(table=table),
+                        params).fetchall()
+                timings[table].append(
+                    (time.perf_counter() - started) * 1000)
+        row = [name[:36].ljust(36)]
+        for table in (PLAIN, HYPER):
+            values = sorted(timings[table])
+            row.append(f"{percentile(values, 50):>10.2f} "
+                       f"{percentile(values, 95):>8.2f}")
+        print('  ' + ' '.join(row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=730,
+                        help='Spread the ledger over this many days.')
+    parser.add_argument('--chunk-interval', default='30 days')
+    parser.add_argument('--compress-after', default='90 days')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', action='store_true',
+                        help='Keep the scratch tables afterwards.')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        with db.engine.connect().execution_options(
+                isolation_level='AUTOCOMMIT') as connection:
+            generate(connection, args)
+            plain_size, hyper_size = sizes(connection)
+            time_queries(connection, args, 'Uncompressed')
+
+            started = time.perf_counter()
+            execute(connection,
+                    f"ALTER TABLE {HYPER} SET (timescaledb.compress, "
+                    f"timescaledb.compress_segmentby = 'user_id, ticker', "
+                    f"timescaledb.compress_orderby = 'timestamp DESC, id DESC')")
+            compressed = execute(connection, f"""
+                SELECT count(compress_chunk(chunk, if_not_compressed => TRUE))
+                FROM show_chunks('{HYPER}',
+                                 older_than => INTERVAL '{args.compress_after}')
+                    AS chunk
+            """).scalar()
+            execute(connection, f'ANALYZE {HYPER}')
+            print(f"\nCompressed {compressed} chunks older than "
+                  f"{args.compress_after} in "
+                  f"{time.perf_counter() - started:.1f}s")
+
+            _, compressed_size = sizes(connection)
+            time_queries(connection, args, 'After compression')
+
+            mb = 1024 * 1024
+            print(f"\nOn-disk size: plain {plain_size / mb:,.0f} MB, "
+                  f"hypertable {hyper_size / mb:,.0f} MB, "
+                  f"compressed {compressed_size / mb:,.0f} MB "
+                  f"({compressed_size / plain_size:.0%} of plain)")
+
+            if not args.keep:
+                for table in (PLAIN, HYPER):
+                    execute(connection, f'DROP TABLE IF EXISTS {table}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""add ticker names, position P&L and quote timestamps
+
+Revision ID: 1a2e845868cb
+Revises:
+Create Date: 2026-10-18 20:55:53.856478
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a2e845868cb'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# First revision: databases made with db.create_all() from the current
+# models already have these columns, so only the missing ones are added
+COLUMNS = {
+    'stock_ticker': [
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('exchange', sa.String(length=32), nullable=True),
+    ],
+    'portfolio_view': [
+        sa.Column('cost_basis', sa.Float(), nullable=False,
+                  server_default='0'),
+        sa.Column('realized_pnl', sa.Float(), nullable=False,
+                  server_default='0'),
+        sa.Column('realized_cost_basis', sa.Float(), nullable=False,
+                  server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ],
+    'transactions': [
+        sa.Column('quote_timestamp', sa.DateTime(), nullable=True),
+    ],
+}
+
+
+def _existing_columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    for table, columns in COLUMNS.items():
+        existing = _existing_columns(table)
+        if existing is None:
+            continue
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+
+
+def downgrade():
+    for table, columns in COLUMNS.items():
+        existing = _existing_columns(table)
+        if existing is None:
+            continue
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                if column.name in existing:
+                    batch_op.drop_column(column.name)